@@ -1,6 +1,34 @@
 open Bap.Std
 open Core_kernel.Std
 open Yojson.Basic
+include Self()
+
+
+type format = Whole | Ndjson
+
+
+let format = Config.(param (enum ["json", Whole; "ndjson", Ndjson]) "format" ~default:Whole
+  ~doc:"Output the whole program as one json object, or one json record per line")
+
+
+let chunk_size = Config.(param int "chunk-size" ~default:4096
+  ~doc:"Number of callgraph edges or instructions per record in the ndjson format")
+
+
+let batch = Config.(param string "batch" ~default:""
+  ~doc:"File with one tab separated binary and output path per line. \
+        The first binary must be the one given to bap, the others are \
+        lifted in the same process and every result goes to its output path")
+
+
+let batch_symbolizer = Config.(param string "symbolizer" ~default:""
+  ~doc:"Symbolizer given to bap with --symbolizer, the binaries of a batch \
+        after the first are lifted with it too")
+
+
+let batch_rooter = Config.(param string "rooter" ~default:""
+  ~doc:"Rooter given to bap with --rooter, the binaries of a batch \
+        after the first are lifted with it too")
 
 let vars_of_exp = Exp.fold ~init:Var.Set.empty (object
     inherit [Var.Set.t] Exp.visitor
@@ -71,7 +99,7 @@ let startswith str substr =
   else false
 
 
-let top_function init_proj =
+let top_function format chunk_size oc init_proj =
   let proj = deadcode init_proj
   in
 
@@ -340,45 +368,130 @@ let top_function init_proj =
     let json_high_pc = `Int (ssa_high_pc ssa) in
     let json_blks = blks_json ssa in
     let json_cfg = cfg_json ssa in
-    `Assoc [("name", json_name); ("tid", json_tid); ("low_pc", json_low_pc); ("high_pc", json_high_pc); ("blks", json_blks); ("cfg", json_cfg)]
+    [("name", json_name); ("tid", json_tid); ("low_pc", json_low_pc); ("high_pc", json_high_pc); ("blks", json_blks); ("cfg", json_cfg)]
   in
 
 
-  let call_graph_json =
+  let call_graph_edges =
     let open Graphs.Callgraph in
     let string_of_src e = Tid.to_string @@ Edge.src @@ e in
     let string_of_dst e = Tid.to_string @@ Edge.dst @@ e in
-    `List(
-      Program.to_graph prog |>
-      edges |>
-      Seq.fold ~init:[] ~f:(fun ls e -> `Assoc ([("src", `String (string_of_src e)); ("dst", `String (string_of_dst e))]) :: ls))
+    Program.to_graph prog |>
+    edges |>
+    Seq.map ~f:(fun e -> `Assoc ([("src", `String (string_of_src e)); ("dst", `String (string_of_dst e))]))
   in
 
 
-  let subs_json =
-    `List (prog |> Term.enum sub_t |> Seq.fold ~init:[] ~f:(fun subs sub -> (sub_json sub) :: subs))
+  let pcs =
+    let disasm = Project.disasm init_proj in
+    let insns = Disasm.insns disasm in
+    Seq.map insns (fun (mem, insn) ->
+      `Assoc ([("start_pc", `Int (int_of_word @@ Memory.min_addr @@ mem)); ("byte_length", `Int (Memory.length mem)); ("insn_name", `String (Insn.name insn))]))
   in
 
 
-  let pcs_json =
-    let disasm = Project.disasm init_proj in
-    let insns = Disasm.insns disasm in
-    `List (Seq.to_list @@ Seq.map insns (fun (mem, insn) ->
-      `Assoc ([("start_pc", `Int (int_of_word @@ Memory.min_addr @@ mem)); ("byte_length", `Int (Memory.length mem)); ("insn_name", `String (Insn.name insn))])))
+  let print_whole () =
+    let subs_json =
+      `List (prog |> Term.enum sub_t |> Seq.fold ~init:[] ~f:(fun subs sub -> (`Assoc (sub_json sub)) :: subs))
+    in
+    let call_graph_json =
+      `List (call_graph_edges |> Seq.fold ~init:[] ~f:(fun ls e -> e :: ls))
+    in
+    let pcs_json = `List (Seq.to_list pcs)
+    in
+    let proj_json =
+      `Assoc ([
+        ("subs", subs_json);
+        ("callgraph", call_graph_json);
+        ("pcs", pcs_json)
+        ])
+    in
+    (* print_string @@ pretty_to_string proj_json *)
+    Out_channel.output_string oc @@ to_string proj_json
+  in
+
+
+  let print_record attrs =
+    to_channel oc (`Assoc attrs);
+    Out_channel.newline oc
   in
 
 
-  let proj_json =
-    `Assoc ([
-      ("subs", subs_json);
-      ("callgraph", call_graph_json);
-      ("pcs", pcs_json)
-      ])
+  let print_chunks t key items =
+    let flush chunk =
+      if not (List.is_empty chunk) then
+        print_record [("t", `String t); (key, `List (List.rev chunk))] in
+    let (_, last) = items |> Seq.fold ~init:(0, []) ~f:(fun (n, chunk) item ->
+      if n >= chunk_size then begin
+        flush chunk;
+        (1, [item])
+      end else (n + 1, item :: chunk)) in
+    flush last
   in
 
 
-  (* print_string @@ pretty_to_string proj_json *)
-  print_string @@ to_string proj_json
+  (* one record per line, each sub is printed and dropped before the next one is lifted to ssa *)
+  let print_ndjson () =
+    prog |> Term.enum sub_t |> Seq.iter ~f:(fun sub ->
+      print_record (("t", `String "sub") :: sub_json sub));
+    print_chunks "callgraph" "edges" call_graph_edges;
+    print_chunks "pcs" "pcs" pcs;
+    print_record [("t", `String "end")]
+  in
 
 
-let () = Project.register_pass' top_function
+  match format with
+  | Whole -> print_whole ()
+  | Ndjson -> print_ndjson ()
+
+
+let read_batch path =
+  In_channel.read_lines path |>
+  List.filter_map ~f:(fun line ->
+    match String.split line ~on:'\t' with
+    | [input; output] -> Some (input, output)
+    | _ -> None)
+
+
+(* results are renamed into place once complete, so a crash never leaves a partial file *)
+let with_output path f =
+  let tmp = path ^ ".tmp" in
+  Out_channel.with_file tmp ~f;
+  Caml.Sys.rename tmp path
+
+
+(* the source of the provider named like the option given to bap, none if bap
+   was given no such option and so used its default one *)
+let find_source kind find = function
+  | "" -> Ok None
+  | name -> match find name with
+    | Some source -> Ok (Some source)
+    | None -> Or_error.errorf "unknown %s %s" kind name
+
+
+(* bap only applies --symbolizer and --rooter to the project of the first
+   binary, the others get the same providers here so that every binary of a
+   batch is lifted as if bap was run on it alone *)
+let lift_batch format chunk_size list_file symbolizer rooter proj =
+  match read_batch list_file with
+  | [] -> ()
+  | (_, output) :: rest ->
+    with_output output (fun oc -> top_function format chunk_size oc proj);
+    match find_source "symbolizer" Symbolizer.Factory.find symbolizer,
+          find_source "rooter" Rooter.Factory.find rooter with
+    | Error err, _ | _, Error err ->
+      eprintf "loc: failed to lift the batch: %s\n%!" (Error.to_string_hum err)
+    | Ok symbolizer, Ok rooter ->
+      List.iter rest ~f:(fun (input, output) ->
+        try
+          match Project.create ?symbolizer ?rooter (Project.Input.file ~loader:"llvm" ~filename:input) with
+          | Ok proj -> with_output output (fun oc -> top_function format chunk_size oc proj)
+          | Error err -> eprintf "loc: failed to lift %s: %s\n%!" input (Error.to_string_hum err)
+        with exn -> eprintf "loc: failed to lift %s: %s\n%!" input (Exn.to_string exn))
+
+
+let () = Config.when_ready (fun {Config.get=(!)} ->
+  if String.is_empty !batch then
+    Project.register_pass' (top_function !format !chunk_size stdout)
+  else
+    Project.register_pass' (lift_batch !format !chunk_size !batch !batch_symbolizer !batch_rooter))
@@ -0,0 +1,192 @@
+import os
+import gzip
+import fcntl
+import hashlib
+import tempfile
+
+from bap.compact import write_records
+from common.utils import set_default_mode
+
+
+# bump whenever the layout of the cached IR changes so stale entries are never read
+CACHE_VERSION = 2
+# entries of lifted IR are in the compact format, see bap.compact
+CACHE_SUFFIX = '.dbir.gz'
+DEFAULT_CACHE_SIZE = 10 * 1024 * 1024 * 1024
+# file in the cache directory with the running total size of the entries
+INDEX_NAME = 'index'
+# eviction goes down to this fraction of max_size, so it does not run on every put
+LOW_WATER = 0.9
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# content-addressed store of lifted BAP IR: entries are keyed by the binary's
+# SHA-256 plus the BAP flags, gzip-compressed and evicted LRU over max_size bytes
+class BapCache:
+    def __init__(self, *args, **kwargs):
+        self.cache_dir = kwargs['cache_dir']
+        self.max_size = kwargs.get('max_size', DEFAULT_CACHE_SIZE)
+        self.suffix = kwargs.get('suffix', CACHE_SUFFIX)
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, binary_path, flags):
+        h = hashlib.sha256()
+        h.update('v{}'.format(CACHE_VERSION).encode('ascii'))
+        h.update(file_digest(binary_path).encode('ascii'))
+        for flag in flags:
+            h.update(b'\x00')
+            h.update(flag.encode('utf-8'))
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def has(self, key):
+        return os.path.isfile(self.path(key))
+
+    def open(self, key, mode='rb'):
+        path = self.path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            # mtime doubles as the last access time for eviction
+            os.utime(path, None)
+            return gzip.open(path, mode)
+        except OSError:
+            return None
+
+    def get(self, key):
+        f = self.open(key, 'rt')
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def open_writer(self, key):
+        return CacheWriter(cache=self, path=self.path(key))
+
+    def put(self, key, ir):
+        w = self.open_writer(key)
+        try:
+            w.write(ir)
+        except BaseException:
+            w.abort()
+            raise
+        w.commit()
+
+    # stores the records of bap.lifter.iter_ir in the compact format
+    def put_records(self, key, records):
+        w = self.open_writer(key)
+        try:
+            write_records(records, w)
+        except BaseException:
+            w.abort()
+            raise
+        w.commit()
+
+    def entries(self):
+        for sub_dir in os.listdir(self.cache_dir):
+            # entries are in directories named by the first two characters of
+            # their key, the work directories of prewarm_bap are left out
+            sub_path = os.path.join(self.cache_dir, sub_dir)
+            if len(sub_dir) != 2 or not os.path.isdir(sub_path):
+                continue
+            # entries with the suffix of an older version are evicted like the others
+            for name in os.listdir(sub_path):
+                if not name.endswith('.tmp'):
+                    path = os.path.join(sub_path, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    # adds delta to the total in the index, under a lock shared by all processes
+    # using the cache. the directory is only scanned when there is no total yet,
+    # or when the total is over max_size, and then evicted in one batch down to
+    # LOW_WATER of max_size. a total that drifted from other writers is
+    # corrected by the next scan.
+    def add_size(self, delta):
+        with open(os.path.join(self.cache_dir, INDEX_NAME), 'a+') as index:
+            fcntl.flock(index, fcntl.LOCK_EX)
+            index.seek(0)
+            try:
+                total = int(index.read()) + delta
+            except ValueError:
+                total = self.size()
+
+            if total > self.max_size:
+                total = self.evict(self.max_size * LOW_WATER)
+
+            index.seek(0)
+            index.truncate()
+            index.write(str(total))
+
+    # removes the least recently used entries until they take at most low_water
+    # bytes, returns their size
+    def evict(self, low_water):
+        entries = list(self.entries())
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_size:
+            return total
+        for path, size, _ in sorted(entries, key=lambda e: e[2]):
+            if total <= low_water:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        return total
+
+
+# streams one entry into a temporary file next to its final path, so a reader
+# never sees a partially written entry and an aborted lift leaves nothing behind
+class CacheWriter:
+    def __init__(self, *args, **kwargs):
+        self.cache = kwargs['cache']
+        self.path = kwargs['path']
+        entry_dir = os.path.dirname(self.path)
+        os.makedirs(entry_dir, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        self.raw = os.fdopen(fd, 'wb')
+        self.gz = gzip.GzipFile(fileobj=self.raw, mode='wb', compresslevel=6)
+
+    def write(self, data):
+        self.gz.write(data.encode('utf-8') if isinstance(data, str) else data)
+
+    def close(self):
+        self.gz.close()
+        self.raw.close()
+
+    def commit(self):
+        try:
+            self.close()
+            delta = os.path.getsize(self.tmp_path)
+            if os.path.isfile(self.path):
+                delta -= os.path.getsize(self.path)
+            set_default_mode(self.tmp_path)
+            os.replace(self.tmp_path, self.path)
+        except BaseException:
+            self.abort()
+            raise
+        self.cache.add_size(delta)
+
+    def abort(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
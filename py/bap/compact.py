@@ -0,0 +1,487 @@
+import struct
+
+from bap.exps import ExpTable, LoadExp, StoreExp, BinOpExp, UnOpExp, IntExp, CastExp, LetExp, UnknownExp, IteExp, ExtractExp, ConcatExp
+from bap.vars import VirtualVar, RegVar, FlagVar, MemVar, OtherVar, format_virtual
+from bap.stmts import DefStmt, PhiStmt, JmpStmt, DirectLabel, IndirectLabel, CallKind, GotoKind, RetKind, IntentKind
+from bap.others import Blk
+
+
+# compact BAP-IR: a header followed by length-prefixed records.
+# every node starts with an integer tag, integers are (zigzag) varints,
+# tids are written inline and all other strings are references into a string
+# table that grows through STRINGS records placed before the records using them.
+# the blocks of a sub are length-prefixed, so they can be decoded only when used.
+# virtual vars are stored by the name and index format_virtual splits them into.
+MAGIC = b'DBIR'
+VERSION = 3
+HEADER = MAGIC + struct.pack('<H', VERSION)
+RECORD_HEADER = struct.Struct('<BI')
+
+REC_END = 0
+REC_STRINGS = 1
+REC_SUB = 2
+REC_CALLGRAPH = 3
+REC_PCS = 4
+
+LOAD = 1
+STORE = 2
+BINOP = 3
+UNOP = 4
+INT = 5
+CAST = 6
+LET = 7
+UNKNOWN = 8
+ITE = 9
+EXTRACT = 10
+CONCAT = 11
+VIRTUAL = 12
+REG = 13
+FLAG = 14
+MEM = 15
+OTHER = 16
+
+DEF = 20
+PHI = 21
+JMP = 22
+
+DIRECT = 30
+INDIRECT = 31
+NO_LABEL = 32
+
+CALL = 40
+GOTO = 41
+RET = 42
+INTENT = 43
+
+HAS_INSN = 1
+HAS_PC = 2
+
+EXP_TAGS = {
+    'Load': LOAD, 'Store': STORE, 'BinOp': BINOP, 'UnOp': UNOP, 'Int': INT, 'Cast': CAST,
+    'Let': LET, 'Unknown': UNKNOWN, 'Ite': ITE, 'Extract': EXTRACT, 'Concat': CONCAT
+}
+VAR_TAGS = {'Virtual': VIRTUAL, 'Reg': REG, 'Flag': FLAG, 'Mem': MEM, 'Other': OTHER}
+VAR_CLASSES = {VIRTUAL: VirtualVar, REG: RegVar, FLAG: FlagVar, MEM: MemVar, OTHER: OtherVar}
+STMT_TAGS = {'Def': DEF, 'Phi': PHI, 'Jmp': JMP}
+KIND_TAGS = {'Call': CALL, 'Goto': GOTO, 'Ret': RET, 'Intent': INTENT}
+
+
+def is_compact(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+# encodes the json records produced by the loc plugin, see bap.lifter.iter_ir
+class CompactWriter:
+    def __init__(self, *args, **kwargs):
+        self.out = kwargs['out']
+        self.strings = dict()
+        self.new_strings = []
+        self.out.write(HEADER)
+
+    def write_record(self, record):
+        buf = bytearray()
+        t = record['t']
+        if t == 'sub':
+            rec = REC_SUB
+            self.put_sub(buf, record)
+        elif t == 'callgraph':
+            rec = REC_CALLGRAPH
+            self.put_uint(buf, len(record['edges']))
+            for l in record['edges']:
+                self.put_str(buf, l['src'])
+                self.put_str(buf, l['dst'])
+        elif t == 'pcs':
+            rec = REC_PCS
+            self.put_uint(buf, len(record['pcs']))
+            for item in record['pcs']:
+                self.put_int(buf, item['start_pc'])
+                self.put_uint(buf, item['byte_length'])
+                self.put_ref(buf, item['insn_name'])
+        else:
+            return
+
+        if len(self.new_strings) > 0:
+            strings = bytearray()
+            self.put_uint(strings, len(self.new_strings))
+            for s in self.new_strings:
+                self.put_str(strings, s)
+            self.new_strings = []
+            self.put_record(REC_STRINGS, strings)
+        self.put_record(rec, buf)
+
+    def close(self):
+        self.put_record(REC_END, b'')
+
+    def put_record(self, rec, payload):
+        self.out.write(RECORD_HEADER.pack(rec, len(payload)))
+        self.out.write(payload)
+
+    def put_uint(self, buf, n):
+        while n >= 0x80:
+            buf.append((n & 0x7f) | 0x80)
+            n >>= 7
+        buf.append(n)
+
+    def put_int(self, buf, n):
+        self.put_uint(buf, n << 1 if n >= 0 else ((-n) << 1) - 1)
+
+    def put_str(self, buf, s):
+        b = s.encode('utf-8')
+        self.put_uint(buf, len(b))
+        buf += b
+
+    def put_ref(self, buf, s):
+        if s not in self.strings:
+            self.strings[s] = len(self.strings)
+            self.new_strings.append(s)
+        self.put_uint(buf, self.strings[s])
+
+    def put_sub(self, buf, sub):
+        self.put_ref(buf, sub['name'])
+        self.put_str(buf, sub['tid'])
+        self.put_int(buf, sub['low_pc'])
+        self.put_int(buf, sub['high_pc'])
+        blks = bytearray()
+        self.put_uint(blks, len(sub['blks']))
+        for blk in sub['blks']:
+            self.put_str(blks, blk['tid'])
+            self.put_uint(blks, len(blk['stmts']))
+            for s in blk['stmts']:
+                self.put_stmt(blks, s)
+        self.put_uint(buf, len(blks))
+        buf += blks
+        self.put_uint(buf, len(sub['cfg']))
+        for l in sub['cfg']:
+            self.put_str(buf, l['src'])
+            self.put_str(buf, l['dst'])
+
+    def put_stmt(self, buf, s):
+        t = s['t']
+        buf.append(STMT_TAGS[t])
+        self.put_str(buf, s['tid'])
+        flags = (HAS_INSN if 'insn' in s else 0) | (HAS_PC if 'pc' in s else 0)
+        buf.append(flags)
+        if 'insn' in s:
+            self.put_ref(buf, s['insn'])
+        if 'pc' in s:
+            self.put_int(buf, s['pc'])
+        if t == 'Def':
+            self.put_exp(buf, s['lhs'])
+            self.put_exp(buf, s['rhs'])
+        elif t == 'Phi':
+            self.put_exp(buf, s['lhs'])
+            self.put_uint(buf, len(s['rhs']))
+            for e in s['rhs']:
+                self.put_exp(buf, e)
+        elif t == 'Jmp':
+            self.put_exp(buf, s['cond'])
+            self.put_kind(buf, s['kind'])
+
+    def put_kind(self, buf, k):
+        t = k['t']
+        buf.append(KIND_TAGS[t])
+        if t == 'Call':
+            self.put_label(buf, k['call']['target'])
+            self.put_label(buf, k['call']['rtn'])
+        elif t == 'Goto' or t == 'Ret':
+            self.put_label(buf, k['label'])
+
+    def put_label(self, buf, l):
+        if l == 'None':
+            buf.append(NO_LABEL)
+        elif l['t'] == 'Direct':
+            buf.append(DIRECT)
+            self.put_str(buf, l['target_tid'])
+        else:
+            buf.append(INDIRECT)
+            self.put_exp(buf, l['exp'])
+
+    def put_exp(self, buf, e):
+        t = e['t']
+        if t == 'Var':
+            buf.append(VAR_TAGS[e['kind']])
+            if e['kind'] == 'Virtual':
+                name, index = format_virtual(e['name'])
+            else:
+                name, index = e['name'], e['index']
+            self.put_ref(buf, name)
+            self.put_int(buf, index)
+            return
+
+        buf.append(EXP_TAGS[t])
+        if t == 'Load':
+            self.put_exp(buf, e['addr'])
+            self.put_ref(buf, e['endian'])
+            self.put_uint(buf, e['size'])
+        elif t == 'Store':
+            self.put_exp(buf, e['addr'])
+            self.put_exp(buf, e['exp'])
+            self.put_ref(buf, e['endian'])
+            self.put_uint(buf, e['size'])
+        elif t == 'BinOp':
+            self.put_ref(buf, e['op'])
+            self.put_exp(buf, e['e1'])
+            self.put_exp(buf, e['e2'])
+        elif t == 'UnOp':
+            self.put_ref(buf, e['op'])
+            self.put_exp(buf, e['e'])
+        elif t == 'Int':
+            self.put_int(buf, int(e['value']))
+            self.put_uint(buf, e['width'])
+        elif t == 'Cast':
+            self.put_ref(buf, e['kind'])
+            self.put_uint(buf, e['size'])
+            self.put_exp(buf, e['e'])
+        elif t == 'Let':
+            self.put_exp(buf, e['v'])
+            self.put_exp(buf, e['head'])
+            self.put_exp(buf, e['body'])
+        elif t == 'Unknown':
+            self.put_ref(buf, e['msg'])
+        elif t == 'Ite':
+            self.put_exp(buf, e['cond'])
+            self.put_exp(buf, e['yes'])
+            self.put_exp(buf, e['no'])
+        elif t == 'Extract':
+            self.put_uint(buf, e['hi'])
+            self.put_uint(buf, e['lo'])
+            self.put_exp(buf, e['e'])
+        elif t == 'Concat':
+            self.put_exp(buf, e['e1'])
+            self.put_exp(buf, e['e2'])
+
+
+# passes the records on while writing them to out, so they are encoded as they
+# are lifted
+def iter_write(records, out):
+    writer = CompactWriter(out=out)
+    for record in records:
+        writer.write_record(record)
+        yield record
+    writer.close()
+
+
+def write_records(records, out):
+    for _ in iter_write(records, out):
+        pass
+
+
+# decodes one record payload straight into bap.exps/bap.stmts objects
+class CompactDecoder:
+    def __init__(self, *args, **kwargs):
+        self.data = kwargs['data']
+        self.strings = kwargs['strings']
+        self.table = kwargs['table'] if 'table' in kwargs else ExpTable()
+        self.pos = 0
+
+    def uint(self):
+        data = self.data
+        b = data[self.pos]
+        self.pos += 1
+        if b < 0x80:
+            return b
+        n = b & 0x7f
+        shift = 7
+        while True:
+            b = data[self.pos]
+            self.pos += 1
+            n |= (b & 0x7f) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    def int(self):
+        n = self.uint()
+        return n >> 1 if n & 1 == 0 else -((n + 1) >> 1)
+
+    def byte(self):
+        b = self.data[self.pos]
+        self.pos += 1
+        return b
+
+    def str(self):
+        n = self.uint()
+        s = bytes(self.data[self.pos:self.pos + n]).decode('utf-8')
+        self.pos += n
+        return s
+
+    def ref(self):
+        return self.strings[self.uint()]
+
+    def sub(self):
+        name = self.ref()
+        tid = self.str()
+        low_pc = self.int()
+        high_pc = self.int()
+        n = self.uint()
+        blks = CompactBlks(data=self.data[self.pos:self.pos + n], strings=self.strings)
+        self.pos += n
+        cfg = []
+        for _ in range(self.uint()):
+            src = self.str()
+            cfg.append((src, self.str()))
+        return {'t': 'sub', 'name': name, 'tid': tid, 'low_pc': low_pc, 'high_pc': high_pc, 'blks': blks, 'cfg': cfg}
+
+    def blks(self):
+        blks = []
+        for _ in range(self.uint()):
+            blk_tid = self.str()
+            stmts = [self.stmt() for _ in range(self.uint())]
+            blks.append(Blk(tid=blk_tid, stmts=stmts, table=self.table))
+        return blks
+
+    def edges(self):
+        edges = []
+        for _ in range(self.uint()):
+            src = self.str()
+            edges.append({'src': src, 'dst': self.str()})
+        return {'t': 'callgraph', 'edges': edges}
+
+    def pcs(self):
+        pcs = []
+        for _ in range(self.uint()):
+            start_pc = self.int()
+            byte_length = self.uint()
+            pcs.append({'start_pc': start_pc, 'byte_length': byte_length, 'insn_name': self.ref()})
+        return {'t': 'pcs', 'pcs': pcs}
+
+    def stmt(self):
+        tag = self.byte()
+        tid = self.str()
+        flags = self.byte()
+        insn = self.ref() if flags & HAS_INSN else None
+        pc = self.int() if flags & HAS_PC else None
+        if tag == DEF:
+            lhs = self.exp()
+            return DefStmt(lhs, self.exp(), tid, insn, pc)
+        elif tag == PHI:
+            lhs = self.exp()
+            # same deduplication as make_stmt does for json input
+            rhs = []
+            rhs_exp_set = set()
+            for _ in range(self.uint()):
+                exp = self.exp()
+                if exp not in rhs_exp_set:
+                    rhs_exp_set.add(exp)
+                    rhs.append(exp)
+            return PhiStmt(lhs, rhs, tid, insn, pc)
+        elif tag == JMP:
+            cond = self.exp()
+            return JmpStmt(cond, self.kind(), tid, insn, pc)
+        raise ValueError('unknown statement tag {}'.format(tag))
+
+    def kind(self):
+        tag = self.byte()
+        if tag == CALL:
+            target = self.label()
+            return CallKind(target, self.label())
+        elif tag == GOTO:
+            return GotoKind(self.label())
+        elif tag == RET:
+            return RetKind(self.label())
+        elif tag == INTENT:
+            return IntentKind()
+        raise ValueError('unknown jump kind tag {}'.format(tag))
+
+    def label(self):
+        tag = self.byte()
+        if tag == DIRECT:
+            return DirectLabel(self.str())
+        elif tag == INDIRECT:
+            return IndirectLabel(self.exp())
+        elif tag == NO_LABEL:
+            return None
+        raise ValueError('unknown label tag {}'.format(tag))
+
+    def exp(self):
+        node = self.table.node
+        tag = self.byte()
+        if tag in VAR_CLASSES:
+            name = self.ref()
+            return node(VAR_CLASSES[tag], name, self.int())
+        elif tag == LOAD:
+            addr = self.exp()
+            endian = self.ref()
+            return node(LoadExp, addr, endian, self.uint())
+        elif tag == STORE:
+            addr = self.exp()
+            exp = self.exp()
+            endian = self.ref()
+            return node(StoreExp, addr, exp, endian, self.uint())
+        elif tag == BINOP:
+            op = self.ref()
+            e1 = self.exp()
+            return node(BinOpExp, op, e1, self.exp())
+        elif tag == UNOP:
+            op = self.ref()
+            return node(UnOpExp, op, self.exp())
+        elif tag == INT:
+            value = self.int()
+            return node(IntExp, value, self.uint())
+        elif tag == CAST:
+            kind = self.ref()
+            size = self.uint()
+            return node(CastExp, kind, size, self.exp())
+        elif tag == LET:
+            v = self.exp()
+            head = self.exp()
+            return node(LetExp, v, head, self.exp())
+        elif tag == UNKNOWN:
+            return node(UnknownExp, self.ref())
+        elif tag == ITE:
+            cond = self.exp()
+            yes = self.exp()
+            return node(IteExp, cond, yes, self.exp())
+        elif tag == EXTRACT:
+            hi = self.uint()
+            lo = self.uint()
+            return node(ExtractExp, hi, lo, self.exp())
+        elif tag == CONCAT:
+            e1 = self.exp()
+            return node(ConcatExp, e1, self.exp())
+        raise ValueError('unknown expression tag {}'.format(tag))
+
+
+# encoded blocks of a sub, see bap.others.Sub.blks
+class CompactBlks:
+    def __init__(self, *args, **kwargs):
+        self.data = kwargs['data']
+        self.strings = kwargs['strings']
+
+    def build(self, table):
+        return CompactDecoder(data=self.data, strings=self.strings, table=table).blks()
+
+
+def iter_raw_records(stream):
+    header = stream.read(len(HEADER))
+    if header[:len(MAGIC)] != MAGIC:
+        raise ValueError('not a compact BAP-IR file')
+    if header != HEADER:
+        raise ValueError('unsupported compact BAP-IR version {}'.format(struct.unpack('<H', header[len(MAGIC):])[0]))
+    while True:
+        head = stream.read(RECORD_HEADER.size)
+        if len(head) < RECORD_HEADER.size:
+            raise ValueError('truncated compact BAP-IR file')
+        rec, length = RECORD_HEADER.unpack(head)
+        if rec == REC_END:
+            return
+        payload = memoryview(stream.read(length))
+        if len(payload) < length:
+            raise ValueError('truncated compact BAP-IR file')
+        yield rec, payload
+
+
+def iter_records(stream):
+    strings = []
+    for rec, payload in iter_raw_records(stream):
+        decoder = CompactDecoder(data=payload, strings=strings)
+        if rec == REC_STRINGS:
+            for _ in range(decoder.uint()):
+                strings.append(decoder.str())
+        elif rec == REC_SUB:
+            yield decoder.sub()
+        elif rec == REC_CALLGRAPH:
+            yield decoder.edges()
+        elif rec == REC_PCS:
+            yield decoder.pcs()
@@ -3,36 +3,81 @@ from common.utils import adapt_int_width
 
 
 def build_exp(**kwargs):
-    t = kwargs['t']
+    return make_exp(kwargs, ExpTable())
+
+
+def make_exp(d, table):
+    if not isinstance(d, dict):
+        return d
+    t = d['t']
     if t == 'Load':
-        return LoadExp(**kwargs)
+        return table.node(LoadExp, make_exp(d['addr'], table), d['endian'], d['size'])
     elif t == 'Store':
-        return StoreExp(**kwargs)
+        return table.node(StoreExp, make_exp(d['addr'], table), make_exp(d['exp'], table), d['endian'], d['size'])
     elif t == 'BinOp':
-        return BinOpExp(**kwargs)
+        return table.node(BinOpExp, d['op'], make_exp(d['e1'], table), make_exp(d['e2'], table))
     elif t == 'UnOp':
-        return UnOpExp(**kwargs)
+        return table.node(UnOpExp, d['op'], make_exp(d['e'], table))
     elif t == 'Int':
-        return IntExp(**kwargs)
+        return table.node(IntExp, d['value'], d['width'])
     elif t == 'Cast':
-        return CastExp(**kwargs)
+        return table.node(CastExp, d['kind'], d['size'], make_exp(d['e'], table))
     elif t == 'Let':
-        return LetExp(**kwargs)
+        return table.node(LetExp, bap.vars.make_var(d['v'], table), make_exp(d['head'], table), make_exp(d['body'], table))
     elif t == 'Unknown':
-        return UnknownExp(**kwargs)
+        return table.node(UnknownExp, d['msg'])
     elif t == 'Ite':
-        return IteExp(**kwargs)
+        return table.node(IteExp, make_exp(d['cond'], table), make_exp(d['yes'], table), make_exp(d['no'], table))
     elif t == 'Extract':
-        return ExtractExp(**kwargs)
+        return table.node(ExtractExp, d['hi'], d['lo'], make_exp(d['e'], table))
     elif t == 'Concat':
-        return ConcatExp(**kwargs)
+        return table.node(ConcatExp, make_exp(d['e1'], table), make_exp(d['e2'], table))
     elif t == 'Var':
-        return bap.vars.build_var(**kwargs)
+        return bap.vars.make_var(d, table)
 
 
-class Exp:
+# hash-consing table, one per binary (see bap.others.Prog): structurally equal
+# exps built through it are one shared node, so they can be compared by identity.
+# the key is built from the fields as the constructor normalizes them, so e.g.
+# equal constants written differently are one node. every node stores the hash
+# of its key, and children are interned before their parents, so the key of a
+# parent hashes its children in constant time.
+class ExpTable:
     def __init__(self, *args, **kwargs):
-        self.t = kwargs['t']
+        self.nodes = dict()
+
+    def node(self, cls, *fields):
+        key = (cls,) + cls.normalize(*fields)
+        n = self.nodes.get(key)
+        if n is None:
+            n = cls(*fields)
+            n.hash = hash(key)
+            self.nodes[key] = n
+        return n
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+# IR nodes use __slots__ and positional constructors, there are millions of them
+# per binary. build_exp/make_exp build them from the json records of the loc plugin.
+# nodes may be shared through an ExpTable and must not be modified once built.
+class Exp:
+    __slots__ = ('hash',)
+    t = 'Exp'
+
+    # the fields of a node built from these constructor arguments
+    @staticmethod
+    def normalize(*fields):
+        return fields
+
+    # nodes are equal only if they are the same node, so any hash will do, the
+    # one of an interned node is its structural hash
+    def __hash__(self):
+        try:
+            return self.hash
+        except AttributeError:
+            return id(self) >> 4
 
     def __repr__(self):
         return 'Exp'
@@ -42,11 +87,13 @@ class Exp:
 
 
 class LoadExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.addr = build_exp(**kwargs['addr']) if isinstance(kwargs['addr'], dict) else kwargs['addr']
-        self.endian = kwargs['endian']
-        self.size = kwargs['size']
+    __slots__ = ('addr', 'endian', 'size')
+    t = 'Load'
+
+    def __init__(self, addr, endian, size):
+        self.addr = addr
+        self.endian = endian
+        self.size = size
 
     def __repr__(self):
         return '(Load [{}])'.format(repr(self.addr))
@@ -56,12 +103,14 @@ class LoadExp(Exp):
 
 
 class StoreExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.addr = build_exp(**kwargs['addr']) if isinstance(kwargs['addr'], dict) else kwargs['addr']
-        self.exp = build_exp(**kwargs['exp']) if isinstance(kwargs['exp'], dict) else kwargs['exp']
-        self.endian = kwargs['endian']
-        self.size = kwargs['size']
+    __slots__ = ('addr', 'exp', 'endian', 'size')
+    t = 'Store'
+
+    def __init__(self, addr, exp, endian, size):
+        self.addr = addr
+        self.exp = exp
+        self.endian = endian
+        self.size = size
 
     def __repr__(self):
         return '(Store [{}] {})'.format(repr(self.addr), repr(self.exp))
@@ -71,14 +120,19 @@ class StoreExp(Exp):
 
 
 class BinOpExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.op = kwargs['op']
-        self.e1 = build_exp(**kwargs['e1']) if isinstance(kwargs['e1'], dict) else kwargs['e1']
-        self.e2 = build_exp(**kwargs['e2']) if isinstance(kwargs['e2'], dict) else kwargs['e2']
+    __slots__ = ('op', 'e1', 'e2')
+    t = 'BinOp'
+
+    def __init__(self, op, e1, e2):
+        self.op, self.e1, self.e2 = BinOpExp.normalize(op, e1, e2)
 
-        if isinstance(self.e1, IntExp):
-            self.e1, self.e2 = self.e2, self.e1
+    # constants go second
+    @staticmethod
+    def normalize(op, e1, e2):
+        if isinstance(e1, IntExp):
+            return op, e2, e1
+        else:
+            return op, e1, e2
 
     def __repr__(self):
         return '({} {} {})'.format(self.op, repr(self.e1), repr(self.e2))
@@ -91,10 +145,12 @@ class BinOpExp(Exp):
 
 
 class UnOpExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.op = kwargs['op']
-        self.e = build_exp(**kwargs['e']) if isinstance(kwargs['e'], dict) else kwargs['e']
+    __slots__ = ('op', 'e')
+    t = 'UnOp'
+
+    def __init__(self, op, e):
+        self.op = op
+        self.e = e
 
     def __repr__(self):
         return '({} {})'.format(self.op, repr(self.e))
@@ -104,11 +160,13 @@ class UnOpExp(Exp):
 
 
 class CastExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.kind = kwargs['kind']
-        self.size = kwargs['size']
-        self.e = build_exp(**kwargs['e']) if isinstance(kwargs['e'], dict) else kwargs['e']
+    __slots__ = ('kind', 'size', 'e')
+    t = 'Cast'
+
+    def __init__(self, kind, size, e):
+        self.kind = kind
+        self.size = size
+        self.e = e
 
     def __repr__(self):
         return '({} {} {})'.format(self.kind, self.size, repr(self.e))
@@ -121,10 +179,15 @@ class CastExp(Exp):
 
 
 class IntExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.value = adapt_int_width(kwargs['value'], kwargs['width'])
-        self.width = kwargs['width']
+    __slots__ = ('value', 'width')
+    t = 'Int'
+
+    def __init__(self, value, width):
+        self.value, self.width = IntExp.normalize(value, width)
+
+    @staticmethod
+    def normalize(value, width):
+        return adapt_int_width(value, width), width
 
     def __repr__(self):
         return '({} {})'.format(self.width, self.value)
@@ -137,11 +200,13 @@ class IntExp(Exp):
 
 
 class LetExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.v = bap.vars.build_var(**kwargs['v']) if isinstance(kwargs['v'], dict) else kwargs['v']
-        self.head = build_exp(**kwargs['head']) if isinstance(kwargs['head'], dict) else kwargs['head']
-        self.body = build_exp(**kwargs['body']) if isinstance(kwargs['body'], dict) else kwargs['body']
+    __slots__ = ('v', 'head', 'body')
+    t = 'Let'
+
+    def __init__(self, v, head, body):
+        self.v = v
+        self.head = head
+        self.body = body
 
     def __repr__(self):
         return '(Let {} {} {})'.format(repr(self.v), repr(self.head), repr(self.body))
@@ -151,9 +216,11 @@ class LetExp(Exp):
 
 
 class UnknownExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.msg = kwargs['msg']
+    __slots__ = ('msg',)
+    t = 'Unknown'
+
+    def __init__(self, msg):
+        self.msg = msg
 
     def __repr__(self):
         return '(Unknown {})'.format(self.msg)
@@ -163,11 +230,13 @@ class UnknownExp(Exp):
 
 
 class IteExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.cond = build_exp(**kwargs['cond']) if isinstance(kwargs['cond'], dict) else kwargs['cond']
-        self.yes = build_exp(**kwargs['yes']) if isinstance(kwargs['yes'], dict) else kwargs['yes']
-        self.no = build_exp(**kwargs['no']) if isinstance(kwargs['no'], dict) else kwargs['no']
+    __slots__ = ('cond', 'yes', 'no')
+    t = 'Ite'
+
+    def __init__(self, cond, yes, no):
+        self.cond = cond
+        self.yes = yes
+        self.no = no
 
     def __repr__(self):
         return '(Ite {} {} {})'.format(repr(self.cond), repr(self.yes), repr(self.no))
@@ -177,11 +246,13 @@ class IteExp(Exp):
 
 
 class ExtractExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.hi = kwargs['hi']
-        self.lo = kwargs['lo']
-        self.e = build_exp(**kwargs['e']) if isinstance(kwargs['e'], dict) else kwargs['e']
+    __slots__ = ('hi', 'lo', 'e')
+    t = 'Extract'
+
+    def __init__(self, hi, lo, e):
+        self.hi = hi
+        self.lo = lo
+        self.e = e
 
     def __repr__(self):
         return '(Extract {} {} {})'.format(self.hi, self.lo, repr(self.e))
@@ -191,10 +262,12 @@ class ExtractExp(Exp):
 
 
 class ConcatExp(Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.e1 = build_exp(**kwargs['e1']) if isinstance(kwargs['e1'], dict) else kwargs['e1']
-        self.e2 = build_exp(**kwargs['e2']) if isinstance(kwargs['e2'], dict) else kwargs['e2']
+    __slots__ = ('e1', 'e2')
+    t = 'Concat'
+
+    def __init__(self, e1, e2):
+        self.e1 = e1
+        self.e2 = e2
 
     def __repr__(self):
         return '(Concat {} {})'.format(repr(self.e1), repr(self.e2))
@@ -0,0 +1,287 @@
+import os
+import re
+import json
+import tempfile
+import subprocess
+
+from bap.cache import BapCache
+from bap.compact import is_compact, iter_records, iter_write, write_records
+
+
+READ_SIZE = 1 << 16
+CHUNK_SIZE = 4096
+# the loc plugin emits either one object for the whole program, or with
+# --loc-format=ndjson one record per line, each tagged by its type
+NDJSON_PREFIX = '{"t":'
+CHUNK_KEYS = {'callgraph': 'edges', 'pcs': 'pcs'}
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def bap_flags(has_symtab, byteweight_sigs=''):
+    if byteweight_sigs == '':
+        if has_symtab:
+            return ['--pass=loc', '--symbolizer=objdump', '--rooter=internal']
+        else:
+            return ['--pass=loc', '--symbolizer=objdump']
+    else:
+        return ['--pass=loc', '--symbolizer=objdump', '--byteweight-sigs={}'.format(byteweight_sigs)]
+
+
+# the output format is left out of bap_flags so it does not change cache keys,
+# readers tell both formats apart by themselves
+def format_flags(fmt):
+    if fmt == 'ndjson':
+        return ['--loc-format=ndjson', '--loc-chunk-size={}'.format(CHUNK_SIZE)]
+    return []
+
+
+# incremental reader over the single top-level object printed by the loc plugin,
+# keeps only the not yet decoded tail of the output in memory
+class IRReader:
+    def __init__(self, *args, **kwargs):
+        self.stream = kwargs['stream']
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def start(self):
+        # for some reason this is necessary when bap decides to log to stdout
+        while True:
+            line = self.stream.readline()
+            if line == '':
+                return False
+            start = line.find('{')
+            if start != -1 and line[:start].strip() == '':
+                self.feed(line[start:])
+                return True
+
+    def feed(self, data):
+        if self.pos > 0:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += data
+
+    def fill(self):
+        if self.eof:
+            return False
+        # read at least as much as is pending, so retried decodes stay linear
+        data = self.stream.read(max(READ_SIZE, len(self.buf) - self.pos))
+        if data == '':
+            self.eof = True
+            return False
+        self.feed(data)
+        return True
+
+    def skip_ws(self):
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return
+
+    def peek(self):
+        self.skip_ws()
+        if self.pos >= len(self.buf):
+            raise ValueError('unexpected end of BAP output')
+        return self.buf[self.pos]
+
+    def expect(self, c):
+        if self.peek() != c:
+            raise ValueError('expected {} at {} of BAP output'.format(c, self.buf[self.pos:self.pos + 50]))
+        self.pos += 1
+
+    def value(self):
+        self.skip_ws()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a number may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except ValueError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def items(self):
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            if self.peek() == '[':
+                self.pos += 1
+                if self.peek() == ']':
+                    self.pos += 1
+                else:
+                    while True:
+                        yield key, self.value()
+                        if self.peek() == ',':
+                            self.pos += 1
+                        else:
+                            self.expect(']')
+                            break
+            else:
+                yield key, self.value()
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect('}')
+                return
+
+
+    def records(self):
+        chunks = dict((key, []) for key in CHUNK_KEYS)
+        for key, item in self.items():
+            if key == 'subs':
+                item['t'] = 'sub'
+                yield item
+            elif key in chunks:
+                chunks[key].append(item)
+                if len(chunks[key]) >= CHUNK_SIZE:
+                    yield {'t': key, CHUNK_KEYS[key]: chunks[key]}
+                    chunks[key] = []
+        for key, chunk in chunks.items():
+            if len(chunk) > 0:
+                yield {'t': key, CHUNK_KEYS[key]: chunk}
+
+    def lines(self):
+        line = self.buf[self.pos:]
+        self.buf = ''
+        self.pos = 0
+        while line != '':
+            if line.startswith('{'):
+                record = json.loads(line)
+                if record['t'] == 'end':
+                    return
+                yield record
+            line = self.stream.readline()
+        raise ValueError('truncated BAP output')
+
+
+def iter_ir(stream):
+    reader = IRReader(stream=stream)
+    if not reader.start():
+        raise Exception('BAP produced no IR')
+    if reader.buf.startswith(NDJSON_PREFIX):
+        yield from reader.lines()
+    else:
+        yield from reader.records()
+
+
+def iter_bap_process(path, flags):
+    # log messages go to a separate file so they never mix with the IR
+    with tempfile.TemporaryFile(mode='w+') as err:
+        proc = subprocess.Popen(['bap', path] + flags,
+                                stdout=subprocess.PIPE,
+                                stderr=err,
+                                universal_newlines=True)
+        try:
+            yield from iter_ir(proc.stdout)
+            proc.stdout.read()
+            proc.wait()
+        except Exception:
+            proc.kill()
+            err.seek(0)
+            print('bap error on {}: {}'.format(path, err.read()[-500:]))
+            raise
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+
+
+# the loc plugin creates the projects of a batch after the first itself, and
+# has to be told the providers the flags select for bap
+def batch_flags(flags):
+    loc_flags = []
+    for flag in flags:
+        for name in ('symbolizer', 'rooter'):
+            prefix = '--{}='.format(name)
+            if flag.startswith(prefix):
+                loc_flags.append('--loc-{}={}'.format(name, flag[len(prefix):]))
+    return loc_flags
+
+
+# lifts binaries sharing the same flags in one bap process: bap is started on
+# the first binary and the loc plugin creates projects for the others itself
+def run_bap_batch(entries, flags, fmt='json'):
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.batch') as batch, \
+            tempfile.TemporaryFile(mode='w+') as err:
+        for path, output in entries:
+            batch.write('{}\t{}\n'.format(os.path.abspath(path), os.path.abspath(output)))
+        batch.flush()
+        subprocess.call(['bap', entries[0][0]] + flags + format_flags(fmt) + batch_flags(flags) +
+                        ['--loc-batch={}'.format(batch.name)],
+                        stdout=err, stderr=err)
+        failed = [path for path, output in entries if not os.path.isfile(output)]
+        if len(failed) > 0:
+            err.seek(0)
+            print('bap error on {}: {}'.format(' '.join(failed), err.read()[-500:]))
+    return failed
+
+
+def make_cache(config):
+    if config.BAP_CACHE_DIR == '':
+        return None
+    return BapCache(cache_dir=config.BAP_CACHE_DIR, max_size=config.BAP_CACHE_SIZE)
+
+
+# key is the cache key of path and flags, if the caller already has it
+def iter_lift(path, flags, cache=None, fmt='json', key=None):
+    if cache is None:
+        yield from iter_bap_process(path, flags + format_flags(fmt))
+        return
+
+    if key is None:
+        key = cache.key(path, flags)
+    f = cache.open(key)
+    if f is not None:
+        with f:
+            yield from iter_records(f)
+        return
+
+    writer = cache.open_writer(key)
+    try:
+        yield from iter_write(iter_bap_process(path, flags + format_flags(fmt)), writer)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit()
+
+
+def lift(path, flags, cache=None, fmt='json', key=None):
+    for _ in iter_lift(path, flags, cache, fmt, key):
+        pass
+
+
+# writes the IR of path to the binary file f in the compact format
+def lift_to_file(path, flags, f, fmt='json'):
+    write_records(iter_bap_process(path, flags + format_flags(fmt)), f)
+
+
+def iter_bap(config, has_symtab):
+    if config.BAP_FILE_PATH != '' and os.path.exists(config.BAP_FILE_PATH):
+        if is_compact(config.BAP_FILE_PATH):
+            with open(config.BAP_FILE_PATH, 'rb') as f:
+                yield from iter_records(f)
+        else:
+            with open(config.BAP_FILE_PATH) as f:
+                yield from iter_ir(f)
+        return
+
+    flags = bap_flags(has_symtab, config.BYTEWEIGHT_SIGS_PATH)
+    yield from iter_lift(config.BINARY_PATH, flags, make_cache(config), config.BAP_FORMAT)
+
+
+def load_bap(config, prog, insn_map):
+    for record in iter_bap(config, prog.has_symtab):
+        if record['t'] == 'pcs':
+            insn_map.add_record(record)
+        else:
+            prog.add_record(record)
+    prog.finalize()
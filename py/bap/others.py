@@ -1,12 +1,14 @@
-from bap.stmts import build_stmt, PhiStmt
+from bap.stmts import make_stmt, PhiStmt
+from bap.exps import ExpTable
 
 
 class Blk:
     def __init__(self, *args, **kwargs):
         self.tid = kwargs['tid']
         self.stmts = []
+        table = kwargs['table'] if 'table' in kwargs else ExpTable()
         for s in kwargs['stmts']:
-            stmt = build_stmt(**s)
+            stmt = make_stmt(s, table) if isinstance(s, dict) else s
             if not (isinstance(stmt, PhiStmt) and len(stmt.rhs) == 1):
                 self.stmts.append(stmt)
 
@@ -17,18 +19,36 @@ class Sub:
         self.prog = kwargs['prog']
         self.tid = kwargs['tid']
         self.low_pc = kwargs['low_pc']
-        high_pc = self.prog.binary.insn_map.get_pc(kwargs['high_pc'])
-        if kwargs['high_pc'] == -1:
+        # the instruction map may still be streaming in, see init_high_pc
+        self.high_pc = kwargs['high_pc']
+        # the body is built on first access of blks, many subs (plt stubs,
+        # functions which are not analyzed) never need it
+        self.raw_blks = kwargs['blks']
+        self.built_blks = None
+        self.cfg = [(l['src'], l['dst']) if isinstance(l, dict) else l for l in kwargs['cfg']]
+        self.callers = set()
+        self.callees = set()
+
+    @property
+    def blks(self):
+        if self.built_blks is None:
+            if isinstance(self.raw_blks, list):
+                self.built_blks = [Blk(**b, table=self.prog.exp_table) if isinstance(b, dict) else b for b in self.raw_blks]
+            else:
+                self.built_blks = self.raw_blks.build(self.prog.exp_table)
+            self.raw_blks = None
+        return self.built_blks
+
+    def init_high_pc(self):
+        bap_high_pc = self.high_pc
+        high_pc = self.prog.binary.insn_map.get_pc(bap_high_pc)
+        if bap_high_pc == -1:
             self.high_pc = self.low_pc
-        elif high_pc > kwargs['high_pc'] \
+        elif high_pc > bap_high_pc \
                 and high_pc > self.low_pc:
             self.high_pc = high_pc
         else:
-            self.high_pc = kwargs['high_pc']
-        self.blks = [Blk(**b) for b in kwargs['blks']]
-        self.cfg = [(l['src'], l['dst']) for l in kwargs['cfg']]
-        self.callers = set()
-        self.callees = set()
+            self.high_pc = bap_high_pc
 
     def add_caller(self, caller):
         self.callers.add(caller)
@@ -39,10 +59,39 @@ class Sub:
 
 class Prog:
     def __init__(self, *args, **kwargs):
-        self.callgraph = [(l['src'], l['dst']) for l in kwargs['callgraph']]
         self.binary = kwargs['binary']
+        self.has_symtab = kwargs['has_symtab']
+        self.exp_table = ExpTable()
+        self.keep_all_subs = 'has_symtab' in kwargs or kwargs['has_symtab']
+        self.callgraph = []
+        self.sub_dict = dict()
+        self.subs = []
+
+        if 'subs' in kwargs:
+            for s in kwargs['subs']:
+                self.add_sub(s)
+            for l in kwargs['callgraph']:
+                self.add_call(l)
+            self.finalize()
+
+    def add_sub(self, sub_json):
+        sub = Sub(**sub_json, prog=self)
+        self.sub_dict[sub.tid] = sub
+
+    def add_call(self, call_json):
+        self.callgraph.append((call_json['src'], call_json['dst']))
+
+    def add_record(self, record):
+        if record['t'] == 'sub':
+            self.add_sub(record)
+        elif record['t'] == 'callgraph':
+            for l in record['edges']:
+                self.add_call(l)
 
-        subs = dict([(s['tid'], Sub(**s, prog=self)) for s in kwargs['subs']])
+    def finalize(self):
+        subs = self.sub_dict
+        for sub in subs.values():
+            sub.init_high_pc()
         for src, dst in self.callgraph:
             if src in subs and dst in subs:
                 subs[src].add_callee(dst)
@@ -50,7 +99,7 @@ class Prog:
         subs = list(subs.values())
         subs = sorted(subs, key=lambda s: s.low_pc)
 
-        if 'has_symtab' in kwargs or kwargs['has_symtab']:
+        if self.keep_all_subs:
             self.subs = subs
         else:
             subs_tmp = []
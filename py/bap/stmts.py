@@ -1,59 +1,90 @@
-from bap.exps import build_exp
-from bap.vars import build_var
+from bap.exps import make_exp, ExpTable
+from bap.vars import make_var
 from bap.exps import IntExp
 from elements.givs import IntConst
 
 
 def build_stmt(**kwargs):
-    t = kwargs['t']
+    return make_stmt(kwargs, ExpTable())
+
+
+def make_stmt(d, table):
+    t = d['t']
+    insn = d['insn'] if 'insn' in d else None
+    pc = d['pc'] if 'pc' in d else None
     if t == 'Def':
-        return DefStmt(**kwargs)
+        return DefStmt(make_var(d['lhs'], table), make_exp(d['rhs'], table), d['tid'], insn, pc)
     elif t == 'Phi':
-        return PhiStmt(**kwargs)
+        # operands are interned, so duplicates are the same object
+        rhs = []
+        rhs_exp_set = set()
+        for e in d['rhs']:
+            if isinstance(e, dict):
+                exp = make_exp(e, table)
+                if exp not in rhs_exp_set:
+                    rhs_exp_set.add(exp)
+                    rhs.append(exp)
+            else:
+                rhs.append(e)
+        return PhiStmt(make_var(d['lhs'], table), rhs, d['tid'], insn, pc)
     elif t == 'Jmp':
-        return JmpStmt(**kwargs)
+        return JmpStmt(make_exp(d['cond'], table), make_jmpkind(d['kind'], table), d['tid'], insn, pc)
 
 
 def build_label(**kwargs):
-    t = kwargs['t']
+    return make_label(kwargs, ExpTable())
+
+
+def make_label(d, table):
+    if not isinstance(d, dict):
+        return d
+    t = d['t']
     if t == 'Direct':
-        return DirectLabel(**kwargs)
+        return DirectLabel(d['target_tid'])
     elif t == 'Indirect':
-        return IndirectLabel(**kwargs)
+        return IndirectLabel(make_exp(d['exp'], table))
 
 
 def build_jmpkind(**kwargs):
-    t = kwargs['t']
+    return make_jmpkind(kwargs, ExpTable())
+
+
+def make_jmpkind(d, table):
+    if not isinstance(d, dict):
+        return d
+    t = d['t']
     if t == 'Call':
-        return CallKind(**kwargs)
+        rtn = d['call']['rtn']
+        return CallKind(make_label(d['call']['target'], table), None if rtn == 'None' else make_label(rtn, table))
     elif t == 'Goto':
-        return GotoKind(**kwargs)
+        return GotoKind(make_label(d['label'], table))
     elif t == 'Ret':
-        return RetKind(**kwargs)
+        return RetKind(make_label(d['label'], table))
     elif t == 'Intent':
-        return IntentKind(**kwargs)
+        return IntentKind()
 
 
 class Stmt:
-    def __init__(self, *args, **kwargs):
-        self.t = kwargs['t']
-        self.tid = kwargs['tid']
-        self.insn = None
-        self.pc = None
-        if 'insn' in kwargs:
-            self.insn = kwargs['insn']
-        if 'pc' in kwargs:
-            self.pc = kwargs['pc']
+    __slots__ = ('tid', 'insn', 'pc')
+    t = 'Stmt'
+
+    def __init__(self, tid, insn=None, pc=None):
+        self.tid = tid
+        self.insn = insn
+        self.pc = pc
 
     def __repr__(self):
         return 'Stmt'
 
 
 class DefStmt(Stmt):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.lhs = build_var(**kwargs['lhs']) if isinstance(kwargs['lhs'], dict) else kwargs['lhs']
-        self.rhs = build_exp(**kwargs['rhs']) if isinstance(kwargs['rhs'], dict) else kwargs['rhs']
+    __slots__ = ('lhs', 'rhs')
+    t = 'Def'
+
+    def __init__(self, lhs, rhs, tid, insn=None, pc=None):
+        super().__init__(tid, insn, pc)
+        self.lhs = lhs
+        self.rhs = rhs
 
     def __repr__(self):
         return '{} = {}'.format(repr(self.lhs), repr(self.rhs))
@@ -63,20 +94,13 @@ class DefStmt(Stmt):
 
 
 class PhiStmt(Stmt):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.lhs = build_var(**kwargs['lhs']) if isinstance(kwargs['lhs'], dict) else kwargs['lhs']
-        self.rhs = []
-        rhs_exp_set = set()
-        for e in kwargs['rhs']:
-            if isinstance(e, dict):
-                exp = build_exp(**e)
-                if repr(exp) not in rhs_exp_set:
-                    rhs_exp_set.add(repr(exp))
-                    self.rhs.append(exp)
-            else:
-                self.rhs.append(e)
-        self.rhs = list(sorted(self.rhs, key=lambda e: e.index))
+    __slots__ = ('lhs', 'rhs')
+    t = 'Phi'
+
+    def __init__(self, lhs, rhs, tid, insn=None, pc=None):
+        super().__init__(tid, insn, pc)
+        self.lhs = lhs
+        self.rhs = list(sorted(rhs, key=lambda e: e.index))
 
     def __repr__(self):
         return '{} = Phi[{}]'.format(repr(self.lhs), ', '.join(map(repr, self.rhs)))
@@ -86,10 +110,13 @@ class PhiStmt(Stmt):
 
 
 class JmpStmt(Stmt):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.cond = build_exp(**kwargs['cond']) if isinstance(kwargs['cond'], dict) else kwargs['cond']
-        self.kind = build_jmpkind(**kwargs['kind']) if isinstance(kwargs['kind'], dict) else kwargs['kind']
+    __slots__ = ('cond', 'kind')
+    t = 'Jmp'
+
+    def __init__(self, cond, kind, tid, insn=None, pc=None):
+        super().__init__(tid, insn, pc)
+        self.cond = cond
+        self.kind = kind
 
     def __repr__(self):
         if (isinstance(self.cond, IntExp) or isinstance(self.cond, IntConst)) and self.cond.value == 1:
@@ -105,8 +132,8 @@ class JmpStmt(Stmt):
 
 
 class JmpLabel():
-    def __init__(self, *args, **kwargs):
-        self.t = kwargs['t']
+    __slots__ = ()
+    t = 'JmpLabel'
 
     def __repr__(self):
         return 'JmpLabel'
@@ -116,9 +143,11 @@ class JmpLabel():
 
 
 class DirectLabel(JmpLabel):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.target_tid = kwargs['target_tid']
+    __slots__ = ('target_tid',)
+    t = 'Direct'
+
+    def __init__(self, target_tid):
+        self.target_tid = target_tid
 
     def __repr__(self):
         return self.target_tid
@@ -128,9 +157,11 @@ class DirectLabel(JmpLabel):
 
 
 class IndirectLabel(JmpLabel):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.exp = build_exp(**kwargs['exp']) if isinstance(kwargs['exp'], dict) else kwargs['exp']
+    __slots__ = ('exp',)
+    t = 'Indirect'
+
+    def __init__(self, exp):
+        self.exp = exp
 
     def __repr__(self):
         return repr(self.exp)
@@ -140,8 +171,8 @@ class IndirectLabel(JmpLabel):
 
 
 class JmpKind():
-    def __init__(self, *args, **kwargs):
-        self.t = kwargs['t']
+    __slots__ = ()
+    t = 'JmpKind'
 
     def __repr__(self):
         return 'JmpKind'
@@ -151,18 +182,13 @@ class JmpKind():
 
 
 class CallKind(JmpKind):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if 'call' in kwargs:
-            self.target = build_label(**kwargs['call']['target'])
-            self.rtn = None if kwargs['call']['rtn'] == 'None' else build_label(**kwargs['call']['rtn'])
-        else:
-            self.target = kwargs['target']
-            self.rtn = kwargs['rtn']
-        if 'args' in kwargs:
-            self.args = kwargs['args']
-        else:
-            self.args = dict()
+    __slots__ = ('target', 'rtn', 'args')
+    t = 'Call'
+
+    def __init__(self, target, rtn, args=None):
+        self.target = target
+        self.rtn = rtn
+        self.args = args if args is not None else dict()
 
     def __repr__(self):
         if self.rtn is None:
@@ -178,9 +204,11 @@ class CallKind(JmpKind):
 
 
 class GotoKind(JmpKind):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.label = build_label(**kwargs['label']) if isinstance(kwargs['label'], dict) else kwargs['label']
+    __slots__ = ('label',)
+    t = 'Goto'
+
+    def __init__(self, label):
+        self.label = label
 
     def __repr__(self):
         return 'Goto {}'.format(repr(self.label))
@@ -190,9 +218,11 @@ class GotoKind(JmpKind):
 
 
 class RetKind(JmpKind):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.label = build_label(**kwargs['label']) if isinstance(kwargs['label'], dict) else kwargs['label']
+    __slots__ = ('label',)
+    t = 'Ret'
+
+    def __init__(self, label):
+        self.label = label
 
     def __repr__(self):
         return 'Ret {}'.format(repr(self.label))
@@ -202,8 +232,8 @@ class RetKind(JmpKind):
 
 
 class IntentKind(JmpKind):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    __slots__ = ()
+    t = 'Intent'
 
     def __repr__(self):
         return 'IntentKind'
@@ -2,23 +2,33 @@ import bap
 
 
 def build_var(**kwargs):
-    k = kwargs['kind']
+    return make_var(kwargs, bap.exps.ExpTable())
+
+
+def make_var(d, table):
+    if not isinstance(d, dict):
+        return d
+    k = d['kind']
     if k == 'Virtual':
-        return VirtualVar(**kwargs)
+        return table.node(VirtualVar, *format_virtual(d['name']))
     elif k == 'Reg':
-        return RegVar(**kwargs)
+        return table.node(RegVar, d['name'], d['index'])
     elif k == 'Flag':
-        return FlagVar(**kwargs)
+        return table.node(FlagVar, d['name'], d['index'])
     elif k == 'Mem':
-        return MemVar(**kwargs)
+        return table.node(MemVar, d['name'], d['index'])
     elif k == 'Other':
-        return OtherVar(**kwargs)
+        return table.node(OtherVar, d['name'], d['index'])
 
 
 class Var(bap.exps.Exp):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.kind = kwargs['kind']
+    __slots__ = ('name', 'index')
+    t = 'Var'
+    kind = 'Var'
+
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
 
     def __repr__(self):
         return 'Var'
@@ -39,9 +49,8 @@ def format_virtual(name_index):
 
 
 class VirtualVar(Var):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.name, self.index = format_virtual(kwargs['name'])
+    __slots__ = ()
+    kind = 'Virtual'
 
     def __repr__(self):
         return '{}.{}'.format(self.name, self.index)
@@ -51,10 +60,8 @@ class VirtualVar(Var):
     
 
 class RegVar(Var):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.name = kwargs['name']
-        self.index = kwargs['index']
+    __slots__ = ()
+    kind = 'Reg'
 
     def __repr__(self):
         return '{}.{}'.format(self.name, self.index)
@@ -67,10 +74,8 @@ class RegVar(Var):
 
 
 class FlagVar(Var):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.name = kwargs['name']
-        self.index = kwargs['index']
+    __slots__ = ()
+    kind = 'Flag'
 
     def __repr__(self):
         return '{}.{}'.format(self.name, self.index)
@@ -80,10 +85,8 @@ class FlagVar(Var):
 
 
 class MemVar(Var):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.name = kwargs['name']
-        self.index = kwargs['index']
+    __slots__ = ()
+    kind = 'Mem'
 
     def __repr__(self):
         return '{}.{}'.format(self.name, self.index)
@@ -93,10 +96,8 @@ class MemVar(Var):
 
 
 class OtherVar(Var):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.name = kwargs['name']
-        self.index = kwargs['index']
+    __slots__ = ()
+    kind = 'Other'
 
     def __repr__(self):
         return '{}.{}'.format(self.name, self.index)
@@ -0,0 +1,127 @@
+import gc
+import time
+import random
+import argparse
+import resource
+
+from bap.lifter import iter_ir
+from bap.compact import is_compact, iter_records
+from bap.others import Blk
+from bap.exps import ExpTable
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Debin to hack binaries. '
+                                     'This script measures the time and memory needed to build the BAP-IR objects '
+                                     'of a binary. Run it once per commit to compare IR representations.')
+
+    parser.add_argument('--bap', dest='bap', type=str, default='',
+                        help='BAP-IR file to build, e.g. of examples/stripped/lcrack (see prewarm_bap.py --bap_dir).')
+    parser.add_argument('--synthetic', dest='synthetic', type=int, default=0,
+                        help='number of subs of a synthetic IR to build instead.')
+    parser.add_argument('--seed', dest='seed', type=int, default=0,
+                        help='seed of the synthetic IR.')
+
+    args = parser.parse_args()
+    if (args.bap == '') == (args.synthetic == 0):
+        parser.error('exactly one of --bap and --synthetic is required.')
+    return args
+
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+
+def reg(name, index):
+    return {'t': 'Var', 'kind': 'Reg', 'name': name, 'index': index}
+
+
+def const(value, width=64):
+    return {'t': 'Int', 'value': str(value), 'width': width}
+
+
+def synthetic_stmt(rnd, i):
+    regs = ('RAX', 'RBX', 'RCX', 'RDX', 'RSI', 'RDI', 'RBP', 'RSP')
+    r = reg(rnd.choice(regs), rnd.randint(0, 20))
+    addr = {'t': 'BinOp', 'op': 'PLUS', 'e1': reg('RBP', 0), 'e2': const(-8 * rnd.randint(1, 16))}
+    choice = rnd.randint(0, 9)
+    stmt = {'tid': '%{:08x}'.format(i), 'pc': 0x400000 + 4 * i, 'insn': 'MOV64rr'}
+    if choice < 4:
+        stmt.update({'t': 'Def', 'lhs': r, 'rhs': {'t': 'Load', 'addr': addr, 'endian': 'LittleEndian', 'size': 8}})
+    elif choice < 6:
+        stmt.update({'t': 'Def', 'lhs': {'t': 'Var', 'kind': 'Mem', 'name': 'mem', 'index': i},
+                     'rhs': {'t': 'Store', 'addr': addr, 'exp': r, 'endian': 'LittleEndian', 'size': 8}})
+    elif choice < 8:
+        stmt.update({'t': 'Def', 'lhs': r,
+                     'rhs': {'t': 'BinOp', 'op': rnd.choice(('PLUS', 'MINUS', 'AND')), 'e1': reg('RAX', 1), 'e2': const(rnd.randint(0, 255))}})
+    elif choice < 9:
+        stmt.update({'t': 'Phi', 'lhs': r, 'rhs': [reg(r['name'], rnd.randint(0, 20)) for _ in range(2)]})
+    else:
+        stmt.update({'t': 'Jmp', 'cond': const(1, 1),
+                     'kind': {'t': 'Goto', 'label': {'t': 'Direct', 'target_tid': '%00000000'}}})
+    return stmt
+
+
+def synthetic_records(n, seed):
+    rnd = random.Random(seed)
+    i = 0
+    for s in range(n):
+        blks = []
+        for b in range(rnd.randint(1, 12)):
+            stmts = []
+            for _ in range(rnd.randint(2, 20)):
+                stmts.append(synthetic_stmt(rnd, i))
+                i += 1
+            blks.append({'tid': '%{:08x}'.format(i), 'stmts': stmts})
+        yield {'t': 'sub', 'name': 'sub_{:x}'.format(s), 'tid': '@{}'.format(s),
+               'low_pc': 0x400000 + s, 'high_pc': 0x400000 + s, 'blks': blks, 'cfg': []}
+
+
+def load_records(args):
+    if args.synthetic > 0:
+        return list(synthetic_records(args.synthetic, args.seed))
+    if is_compact(args.bap):
+        with open(args.bap, 'rb') as f:
+            return list(iter_records(f))
+    with open(args.bap) as f:
+        return list(iter_ir(f))
+
+
+def build(records):
+    table = ExpTable()
+    blks = []
+    stmts = 0
+    for record in records:
+        if record['t'] != 'sub':
+            continue
+        raw = record['blks']
+        built = [Blk(**b, table=table) if isinstance(b, dict) else b for b in raw] if isinstance(raw, list) else raw.build(table)
+        for blk in built:
+            stmts += len(blk.stmts)
+        blks.append(built)
+    return blks, stmts, len(table)
+
+
+def main():
+    args = get_args()
+
+    records = load_records(args)
+    gc.collect()
+    rss_before = rss()
+    start = time.time()
+    blks, stmts, nodes = build(records)
+    elapsed = time.time() - start
+    gc.collect()
+    rss_after = rss()
+
+    print('subs: {}'.format(len(blks)))
+    print('statements: {}'.format(stmts))
+    print('distinct exps: {}'.format(nodes))
+    print('build time: {:.3f}s'.format(elapsed))
+    print('rss growth: {:.1f}MB'.format((rss_after - rss_before) / (1024 * 1024)))
+    print('peak rss: {:.1f}MB'.format(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import time
+import argparse
+
+from benchmark_ir import load_records, build
+from common.visitors import ExpVisitor, StmtVisitor
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Debin to hack binaries. '
+                                     'This script measures how many IR nodes per second the statement and '
+                                     'expression visitors dispatch. Run it once per commit to compare visitor dispatch.')
+
+    parser.add_argument('--bap', dest='bap', type=str, default='',
+                        help='BAP-IR file to visit, e.g. of examples/stripped/lcrack (see prewarm_bap.py --bap_dir).')
+    parser.add_argument('--synthetic', dest='synthetic', type=int, default=0,
+                        help='number of subs of a synthetic IR to visit instead.')
+    parser.add_argument('--seed', dest='seed', type=int, default=0,
+                        help='seed of the synthetic IR.')
+    parser.add_argument('--rounds', dest='rounds', type=int, default=5,
+                        help='number of passes over the IR.')
+
+    args = parser.parse_args()
+    if (args.bap == '') == (args.synthetic == 0):
+        parser.error('exactly one of --bap and --synthetic is required.')
+    return args
+
+
+# only counts the visited nodes, so the measured time is mostly dispatch
+class CountingExpVisitor(ExpVisitor):
+    def __init__(self, *args, **kwargs):
+        self.count = 0
+
+    def children(self, *exps):
+        self.count += 1
+        for e in exps:
+            self.visit(e)
+
+    def visit_load_exp(self, exp):
+        self.children(exp.addr)
+
+    def visit_store_exp(self, exp):
+        self.children(exp.addr, exp.exp)
+
+    def visit_binop_exp(self, exp):
+        self.children(exp.e1, exp.e2)
+
+    def visit_unop_exp(self, exp):
+        self.children(exp.e)
+
+    def visit_cast_exp(self, exp):
+        self.children(exp.e)
+
+    def visit_let_exp(self, exp):
+        self.children(exp.v, exp.head, exp.body)
+
+    def visit_ite_exp(self, exp):
+        self.children(exp.cond, exp.yes, exp.no)
+
+    def visit_extract_exp(self, exp):
+        self.children(exp.e)
+
+    def visit_concat_exp(self, exp):
+        self.children(exp.e1, exp.e2)
+
+    def visit_int_exp(self, exp):
+        self.children()
+
+    def visit_unknown_exp(self, exp):
+        self.children()
+
+    def visit_virtual_var(self, exp):
+        self.children()
+
+    def visit_reg_var(self, exp):
+        self.children()
+
+    def visit_flag_var(self, exp):
+        self.children()
+
+    def visit_mem_var(self, exp):
+        self.children()
+
+    def visit_other_var(self, exp):
+        self.children()
+
+
+class CountingStmtVisitor(StmtVisitor):
+    def __init__(self, *args, **kwargs):
+        self.exp_visitor = kwargs['exp_visitor']
+        self.count = 0
+
+    def visit_def(self, stmt):
+        self.count += 1
+        self.exp_visitor.visit(stmt.lhs)
+        self.exp_visitor.visit(stmt.rhs)
+
+    def visit_phi(self, stmt):
+        self.count += 1
+        self.exp_visitor.visit(stmt.lhs)
+        for e in stmt.rhs:
+            self.exp_visitor.visit(e)
+
+    def visit_jmp(self, stmt):
+        self.count += 1
+        self.exp_visitor.visit(stmt.cond)
+
+
+def main():
+    args = get_args()
+
+    blks, _, _ = build(load_records(args))
+    stmts = [stmt for built in blks for blk in built for stmt in blk.stmts]
+
+    exp_visitor = CountingExpVisitor()
+    stmt_visitor = CountingStmtVisitor(exp_visitor=exp_visitor)
+    start = time.time()
+    for _ in range(args.rounds):
+        for stmt in stmts:
+            stmt_visitor.visit(stmt)
+    elapsed = time.time() - start
+
+    visits = stmt_visitor.count + exp_visitor.count
+    print('statements: {}'.format(len(stmts)))
+    print('visits: {}'.format(visits))
+    print('visit time: {:.3f}s'.format(elapsed))
+    print('visits/sec: {:.0f}'.format(visits / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ import argparse
 import pickle
 import subprocess
 from common.config import Config
+from common.features import HashVectorizer
 from binary import Binary
 
 
@@ -18,9 +19,19 @@ def get_args():
                         help='path of the debugging info.')
     parser.add_argument('--bap', dest='bap', type=str, default='',
                         help='path of cached BAP-IR file.')
+    parser.add_argument('--bap_cache', dest='bap_cache', type=str, default='',
+                        help='directory of the content-addressed BAP-IR cache.')
+    parser.add_argument('--bap_format', dest='bap_format', type=str, default='json', choices=['json', 'ndjson'],
+                        help='output format of the loc plugin when lifting, ndjson needs a plugin built from ocaml/loc.ml.')
+    parser.add_argument('--label_cache', dest='label_cache', type=str, default='',
+                        help='directory of the cache of ground truth labels taken from debug information.')
 
     parser.add_argument('-two_pass', dest='two_pass', action='store_true', default=False,
                         help='whether to use two passes (variable classification and structured prediction). Setting it to false only will only invoke structured prediction.')
+    parser.add_argument('-fused_pipeline', dest='fused_pipeline', action='store_true', default=False,
+                        help='whether to extract features and dependency elements of a statement in one traversal. The output is the same as without it.')
+    parser.add_argument('-stream_debug_info', dest='stream_debug_info', action='store_true', default=False,
+                        help='whether to read the debugging info one compilation unit at a time, so its memory does not grow with the size of the debugging info. The output is the same as without it.')
     parser.add_argument('--fp_model', dest='fp_model', type=str, default='',
                         help='path of the models for the first pass (variable classification).')
 
@@ -47,10 +58,15 @@ def main():
     config.BINARY_NAME = args.binary
     config.DEBUG_INFO_PATH = args.debug_info
     config.BAP_FILE_PATH = args.bap
+    config.BAP_CACHE_DIR = args.bap_cache
+    config.BAP_FORMAT = args.bap_format
+    config.LABEL_CACHE_DIR = args.label_cache
 
     config.GRAPH_PATH = args.graph
 
     config.TWO_PASS = args.two_pass
+    config.FUSED_PIPELINE = args.fused_pipeline
+    config.STREAM_DEBUG_INFO = args.stream_debug_info
     config.FP_MODEL_PATH = args.fp_model
     if config.TWO_PASS:
         reg_dict = open(os.path.join(config.FP_MODEL_PATH, 'reg.dict'), 'rb')
@@ -71,11 +87,16 @@ def main():
         config.OFF_MODEL = pickle.load(off_model, encoding='latin1')
         config.OFF_MODEL.n_jobs = 1
 
+        # the features of the binary are extracted the way the models were trained on
+        if isinstance(config.REG_DICT, HashVectorizer):
+            config.FEATURE_HASH_BITS = config.REG_DICT.bits
+
     with open(config.BINARY_PATH, 'rb') as elffile, open(config.DEBUG_INFO_PATH, 'rb') as debug_elffile:
         b = Binary(config, elffile, debug_elffile)
 
         if config.GRAPH_PATH != '':
             b.dump_graph()
+        b.close()
 
     if config.TWO_PASS:
         reg_dict.close()
@@ -6,12 +6,14 @@ import requests
 
 from elfs.sections import Sections
 from elfs.debuginfo import DebugInfo
+from elfs.labels import LabelCache
 from elfs.tables import StringTable, SymbolTable, DebugLoc
 from elfs.insnmap import InsnMap
 from elftools.elf.elffile import ELFFile
 from elftools.dwarf.descriptions import set_global_machine_arch
 
 from bap.others import Prog
+from bap.lifter import load_bap
 
 from elements.function import Functions
 from elements.offsets import Offset
@@ -46,7 +48,8 @@ class Binary:
         self.config = config
         self.name = self.config.BINARY_NAME
         self.path = self.config.BINARY_PATH
-        self.elffile = ELFFile(elffile)
+        self.mapping = utils.map_file(elffile)
+        self.elffile = ELFFile(self.mapping)
         self.entry_point = self.elffile.header['e_entry'] if 'e_entry' in self.elffile.header else None
         self.binary_type = self.elffile.header['e_type'] if 'e_type' in self.elffile.header else None
         self.init_pc = None
@@ -78,26 +81,9 @@ class Binary:
 
         self.sections = Sections(binary=self)
 
-        if self.config.BAP_FILE_PATH == '' or not os.path.exists(self.config.BAP_FILE_PATH):
-            if self.config.BYTEWEIGHT_SIGS_PATH == '':
-                if self.sections.has_sec(SYMTAB):
-                    bap_result = subprocess.getoutput('bap {} --pass=loc --symbolizer=objdump --rooter=internal'.format(self.path))
-                else:
-                    bap_result = subprocess.getoutput('bap {} --pass=loc --symbolizer=objdump'.format(self.path))
-            else:
-                bap_result = subprocess.getoutput('bap {} --pass=loc --symbolizer=objdump --byteweight-sigs={}'.format(self.path, self.config.BYTEWEIGHT_SIGS_PATH))
-            try:
-                # for some reason this is necessary when bap decides to log to stdout
-                res = ''.join([x for x in bap_result.split('\n') if x.startswith('{')])
-                bap_json = json.loads(res)
-            except Exception as e:
-                print('bap error on {}: {}'.format(self.path, bap_result[:500]))
-                raise e
-        else:
-            bap_json = json.load(open(self.config.BAP_FILE_PATH))
-
-        self.insn_map = InsnMap(**bap_json)
-        self.bap = Prog(**bap_json, binary=self, has_symtab=self.sections.has_sec(SYMTAB))
+        self.insn_map = InsnMap()
+        self.bap = Prog(binary=self, has_symtab=self.sections.has_sec(SYMTAB))
+        load_bap(self.config, self.bap, self.insn_map)
 
         self.functions = Functions(bap=self.bap.subs, binary=self)
         self.functions.initialize()
@@ -114,14 +100,30 @@ class Binary:
         self.symbol_table = None
         self.debug_loc = None
 
+        self.debug_info = None
         if self.config.MODE == self.config.TRAIN:
             self.stats = Stats(self)
-            self.debug_info = DebugInfo(binary=self, debug_elffile=debug_elffile)
-            self.debug_info.binary_train_info()
+            label_cache = LabelCache(binary=self) if self.config.LABEL_CACHE_DIR != '' else None
+            if label_cache is None or not label_cache.load():
+                self.debug_info = DebugInfo(binary=self, debug_elffile=debug_elffile)
+                self.debug_info.binary_train_info()
+                if label_cache is not None:
+                    label_cache.save()
 
         self.nodes.initialize()
         self.edges.initialize()
 
+    # closes the mappings of the binary and its debug info once it is done.
+    # the sections hold views of the mapping, arrays over them included, so
+    # they are dropped and the views released first
+    def close(self):
+        if self.debug_info is not None:
+            self.debug_info.close()
+            self.debug_info = None
+        self.sections = None
+        self.elffile.release_views()
+        self.mapping.close()
+
     def dump_debug(self):
         with open(self.config.DEBUG_PATH, 'w') as w:
             for f in self.functions.functions:
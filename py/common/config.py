@@ -9,6 +9,10 @@ class Config:
 
         self.INDIRECT_OFFSET_WITH_INDEX = False
         self.TWO_PASS = False
+        self.FUSED_PIPELINE = False
+        self.STREAM_DEBUG_INFO = False
+        # 0 keeps the features of the variable classification as strings
+        self.FEATURE_HASH_BITS = 0
         self.USE_SUPPORT = False
         self.UNK_GIV = False
 
@@ -19,6 +23,11 @@ class Config:
         self.DEBUG_INFO_PATH = ''
         self.GRAPH_PATH = ''
         self.BAP_FILE_PATH = ''
+        self.BAP_CACHE_DIR = ''
+        self.BAP_CACHE_SIZE = 10 * 1024 * 1024 * 1024
+        self.BAP_FORMAT = 'json'
+        self.LABEL_CACHE_DIR = ''
+        self.LABEL_CACHE_SIZE = 1024 * 1024 * 1024
         self.FP_MODEL_PATH = ''
         self.STAT_PATH = ''
         self.PREDICTEDS_PATH = ''
@@ -0,0 +1,84 @@
+import zlib
+from array import array
+
+import numpy
+import scipy.sparse
+
+
+# the id of a feature among 2 ** bits, the same in every process unlike hash()
+def feature_id(feature, bits):
+    return zlib.crc32(feature.encode('utf-8')) & ((1 << bits) - 1)
+
+
+# the features of a Reg or an IndirectOffset as hashed ids in an array instead
+# of a set of strings. the ids are deduplicated whenever the array has doubled
+# since the last time.
+class HashedFeatures:
+    def __init__(self, *args, **kwargs):
+        self.bits = kwargs['bits']
+        self.ids = array('I')
+        self.num_unique = 0
+
+    def add(self, feature):
+        self.ids.append(feature_id(feature, self.bits))
+        if len(self.ids) > 2 * self.num_unique + 64:
+            self.compact()
+
+    def compact(self):
+        ids = numpy.unique(numpy.frombuffer(self.ids, dtype=numpy.uint32))
+        self.ids = array('I', ids.tobytes())
+        self.num_unique = len(self.ids)
+
+    # a copy, since the array cannot grow while numpy views its buffer
+    def get_ids(self):
+        if len(self.ids) > self.num_unique:
+            self.compact()
+        return numpy.frombuffer(self.ids, dtype=numpy.uint32).copy()
+
+    def __len__(self):
+        return len(self.get_ids())
+
+    def __iter__(self):
+        return iter(self.get_ids().tolist())
+
+
+# the features of a new node, hashed if config.FEATURE_HASH_BITS is set
+def make_features(config):
+    if config.FEATURE_HASH_BITS > 0:
+        return HashedFeatures(bits=config.FEATURE_HASH_BITS)
+    else:
+        return set()
+
+
+# takes the place of DictVectorizer for models trained on hashed features:
+# it is pickled as the .dict of a model and restricted to the support the same
+# way, and turns the features of a node into a row of the model
+class HashVectorizer:
+    def __init__(self, *args, **kwargs):
+        self.bits = kwargs['bits']
+        # the ids of the columns, all 2 ** bits ids if None
+        self.columns = None
+
+    def restrict(self, support):
+        self.columns = numpy.flatnonzero(support).astype(numpy.uint32)
+        return self
+
+    def transform(self, features):
+        if isinstance(features, HashedFeatures):
+            if features.bits != self.bits:
+                raise ValueError('features hashed to {} bits, the model to {} bits'.format(features.bits, self.bits))
+            ids = features.get_ids()
+        else:
+            ids = numpy.unique(numpy.array([feature_id(f, self.bits) for f in features], dtype=numpy.uint32))
+
+        if self.columns is None:
+            indices = ids.astype(numpy.int64)
+            width = 1 << self.bits
+        else:
+            positions = numpy.searchsorted(self.columns, ids)
+            found = positions < len(self.columns)
+            found[found] = self.columns[positions[found]] == ids[found]
+            indices = positions[found]
+            width = len(self.columns)
+        return scipy.sparse.csr_matrix((numpy.ones(len(indices)), indices, [0, len(indices)]),
+                                       shape=(1, width))
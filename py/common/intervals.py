@@ -0,0 +1,49 @@
+from bisect import bisect_right
+
+
+# static index over closed intervals [low, high] of items, e.g. of functions or
+# call frame entries. the items are sorted by low, and a max-tree over their
+# highs prunes every subtree whose intervals end too early, so a query costs
+# O((m + 1) log n) for m results instead of a scan over all n items.
+class IntervalIndex:
+    def __init__(self, *args, **kwargs):
+        low = kwargs.get('low', lambda item: item.low_pc)
+        high = kwargs.get('high', lambda item: item.high_pc)
+        # stable, so items with the same low keep their order
+        self.items = sorted(kwargs['items'], key=low)
+        self.lows = [low(item) for item in self.items]
+
+        self.size = 1
+        while self.size < len(self.items):
+            self.size *= 2
+        self.tree = [float('-inf')] * (2 * self.size)
+        for i, item in enumerate(self.items):
+            self.tree[self.size + i] = high(item)
+        for i in reversed(range(1, self.size)):
+            self.tree[i] = max(self.tree[2 * i], self.tree[2 * i + 1])
+
+    def __len__(self):
+        return len(self.items)
+
+    # items with low <= max_low and high >= min_high, ordered by low
+    def query(self, max_low, min_high):
+        end = bisect_right(self.lows, max_low)
+        stack = [(1, 0, self.size)]
+        while len(stack) > 0:
+            node, start, stop = stack.pop()
+            if start >= end or self.tree[node] < min_high:
+                continue
+            if node >= self.size:
+                yield self.items[start]
+            else:
+                mid = (start + stop) // 2
+                stack.append((2 * node + 1, mid, stop))
+                stack.append((2 * node, start, mid))
+
+    # items whose interval contains pc
+    def containing(self, pc):
+        return self.query(pc, pc)
+
+    # items whose interval shares at least one pc with [low, high]
+    def overlapping(self, low, high):
+        return self.query(high, low)
@@ -0,0 +1,127 @@
+import os
+import json
+
+import numpy
+import scipy.sparse
+
+from common.utils import write_file
+
+
+SHARD_SUFFIX = '.npz'
+KINDS = ('reg', 'off')
+
+
+# the features of one binary (as returned by Binary.get_features) as one CSR
+# matrix per kind of variable. every feature is 1, so a matrix is only its
+# indptr and indices, over the columns of the terms of the shard:
+#   terms: the features of the binary, sorted
+#   reg_indptr, reg_indices, reg_y: the registers and their labels
+#   off_indptr, off_indices, off_y: the stack offsets and their labels
+# features hashed to hash_bits bits (see common/features.py) are their own
+# columns, then the shard has hash_bits instead of terms.
+def make_shard(features, hash_bits=0):
+    reg_x, reg_y, off_x, off_y = features
+    if hash_bits > 0:
+        shard = dict(hash_bits=numpy.int64(hash_bits))
+    else:
+        terms = sorted(set(f for x in (reg_x, off_x) for row in x for f in row))
+        columns = dict((term, i) for i, term in enumerate(terms))
+        shard = dict(terms=numpy.array(terms, dtype=str))
+
+    for kind, x, y in (('reg', reg_x, reg_y), ('off', off_x, off_y)):
+        indptr = numpy.zeros(len(x) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(row) for row in x], out=indptr[1:])
+        shard[kind + '_indptr'] = indptr
+        if hash_bits > 0:
+            shard[kind + '_indices'] = numpy.array([f for row in x for f in row], dtype=numpy.uint32)
+        else:
+            shard[kind + '_indices'] = numpy.array([columns[f] for row in x for f in row], dtype=numpy.int32)
+        shard[kind + '_y'] = numpy.frombuffer(bytes(y), dtype=numpy.uint8)
+    return shard
+
+
+def write_shard(path, features, hash_bits=0):
+    write_file(path, lambda f: numpy.savez_compressed(f, **make_shard(features, hash_bits)))
+
+
+def get_hash_bits(shard):
+    return int(shard['hash_bits']) if 'hash_bits' in shard.files else 0
+
+
+# ids of features shared by all shards, kept in a file with one json string per
+# line so that retraining on the same shards reuses them
+class Vocabulary:
+    def __init__(self, *args, **kwargs):
+        self.path = kwargs['path']
+        self.terms = []
+        self.ids = dict()
+        self.changed = False
+        if os.path.isfile(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    self.add(json.loads(line))
+
+    def add(self, term):
+        if term not in self.ids:
+            self.ids[term] = len(self.terms)
+            self.terms.append(term)
+            self.changed = True
+        return self.ids[term]
+
+    def get_ids(self, terms):
+        return numpy.array([self.add(term) for term in terms.tolist()], dtype=numpy.int64)
+
+    def save(self):
+        if self.changed:
+            lines = ''.join(json.dumps(term) + '\n' for term in self.terms)
+            write_file(self.path, lambda f: f.write(lines.encode('utf-8')))
+            self.changed = False
+
+
+# the first num_p positive and num_n negative samples of kind over the shards
+# in order, as one CSR matrix over the ids of the vocabulary, or over the
+# 2 ** hash_bits ids of hashed features. only the labels of the shards are
+# read to pick the samples, and each shard is read at most once more for the
+# features of its samples.
+def load_samples(paths, kind, num_p, num_n, vocabulary, hash_bits=0):
+    picked = []
+    for path in paths:
+        if num_p <= 0 and num_n <= 0:
+            break
+        with numpy.load(path) as shard:
+            if get_hash_bits(shard) != hash_bits:
+                raise ValueError('{} has features hashed to {} bits, not {}'.format(path, get_hash_bits(shard), hash_bits))
+            y = shard[kind + '_y']
+        positives = numpy.flatnonzero(y == 1)[:max(num_p, 0)]
+        negatives = numpy.flatnonzero(y == 0)[:max(num_n, 0)]
+        num_p -= len(positives)
+        num_n -= len(negatives)
+        rows = numpy.sort(numpy.concatenate([positives, negatives]))
+        if len(rows) > 0:
+            picked.append((path, rows, y[rows]))
+
+    indices = []
+    lengths = []
+    for path, rows, _ in picked:
+        with numpy.load(path) as shard:
+            indptr = shard[kind + '_indptr']
+            shard_indices = shard[kind + '_indices']
+            if hash_bits > 0:
+                ids = shard_indices.astype(numpy.int64)
+            else:
+                ids = vocabulary.get_ids(shard['terms'])[shard_indices]
+        starts = indptr[rows]
+        row_lengths = indptr[rows + 1] - starts
+        # positions of the features of the rows in shard_indices
+        positions = numpy.arange(row_lengths.sum()) + numpy.repeat(starts - (numpy.cumsum(row_lengths) - row_lengths), row_lengths)
+        indices.append(ids[positions])
+        lengths.append(row_lengths)
+
+    indptr = numpy.zeros(sum(len(rows) for _, rows, _ in picked) + 1, dtype=numpy.int64)
+    if len(lengths) > 0:
+        numpy.cumsum(numpy.concatenate(lengths), out=indptr[1:])
+    indices = numpy.concatenate(indices) if len(indices) > 0 else numpy.zeros(0, dtype=numpy.int64)
+    X = scipy.sparse.csr_matrix((numpy.ones(len(indices)), indices, indptr),
+                                shape=(len(indptr) - 1, 1 << hash_bits if hash_bits > 0 else len(vocabulary.terms)))
+    Y = numpy.concatenate([y for _, _, y in picked]) if len(picked) > 0 else numpy.zeros(0, dtype=numpy.uint8)
+    return X, Y
@@ -0,0 +1,83 @@
+from bap.exps import LoadExp, StoreExp, BinOpExp, UnOpExp, CastExp
+from bap.exps import LetExp, IteExp, ExtractExp, ConcatExp
+
+from elements.givs import VirtualExp
+
+
+# traversals of expression trees with an explicit stack, so deep expressions
+# (e.g. of unrolled or vectorized code) cost neither a python frame nor a
+# generator per level. children(node) returns the nodes below node in the
+# order they are visited, leaves return an empty tuple.
+CHILDREN = {
+    LoadExp: lambda exp: (exp.addr,),
+    StoreExp: lambda exp: (exp.addr, exp.exp),
+    BinOpExp: lambda exp: (exp.e1, exp.e2),
+    UnOpExp: lambda exp: (exp.e,),
+    CastExp: lambda exp: (exp.e,),
+    LetExp: lambda exp: (exp.v, exp.head, exp.body),
+    IteExp: lambda exp: (exp.cond, exp.yes, exp.no),
+    ExtractExp: lambda exp: (exp.e,),
+    ConcatExp: lambda exp: (exp.e1, exp.e2),
+    VirtualExp: lambda exp: (exp.exp,),
+}
+
+
+def exp_children(exp):
+    children = CHILDREN.get(type(exp), None)
+    return children(exp) if children is not None else ()
+
+
+def preorder(root, children=exp_children):
+    stack = [root]
+    while len(stack) > 0:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(children(node)))
+
+
+# pre-order walk for visitors that pick the children of a node while visiting
+# it: expand(node) does the work of node and returns the nodes to walk next
+def walk(root, expand):
+    stack = [root]
+    while len(stack) > 0:
+        nodes = expand(stack.pop())
+        if nodes:
+            stack.extend(reversed(nodes))
+
+
+# marks a node on the stack whose children are already visited
+VISITED = object()
+
+
+def postorder(root, children=exp_children):
+    stack = [root]
+    while len(stack) > 0:
+        node = stack.pop()
+        if node is VISITED:
+            yield stack.pop()
+        else:
+            stack.append(node)
+            stack.append(VISITED)
+            stack.extend(reversed(children(node)))
+
+
+# build(node, values) gets the values built for the children of node and
+# returns the value of node. children are called in pre-order and build in
+# post-order, both from left to right, as in a recursive visitor.
+def rebuild(root, build, children=exp_children):
+    stack = [(root, -1)]
+    values = []
+    while len(stack) > 0:
+        node, n = stack.pop()
+        if n < 0:
+            nodes = children(node)
+            if len(nodes) == 0:
+                values.append(build(node, ()))
+            else:
+                stack.append((node, len(nodes)))
+                stack.extend((child, -1) for child in reversed(nodes))
+        else:
+            args = values[-n:]
+            del values[-n:]
+            values.append(build(node, args))
+    return values[0]
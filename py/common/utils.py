@@ -1,9 +1,43 @@
 import os
+import mmap
 import ctypes
+import tempfile
 from common import constants
 
 get_char = constants.PRINTABLE.__getitem__
 
+# mkstemp creates files only their owner can read, files renamed into place
+# get the permissions of a file created with open instead
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def set_default_mode(path):
+    os.chmod(path, 0o666 & ~UMASK)
+
+
+# read-only mapping of an open file, ELFFile reads sections of it in place.
+# it is closed by its owner after ELFFile.release_views, see Binary.close
+def map_file(f):
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+# writes into a temporary file next to path first, so an interrupted run never
+# leaves a partial file behind that a later run would take as done
+def write_file(path, write):
+    out_dir = os.path.dirname(os.path.abspath(path))
+    os.makedirs(out_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        set_default_mode(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 
 def write_progress(msg, binary):
     if binary.config.PROGRESS_PATH != '':
@@ -15,14 +15,76 @@ from elements.regs import GivReg, Reg
 from elements.ttype import Ttype
 
 
+# (type, method) pairs in the order they are tried, the first type a node is an
+# instance of decides the method, so subclasses go before their base classes
+STMT_METHODS = (
+    (DefStmt, 'visit_def'),
+    (PhiStmt, 'visit_phi'),
+    (JmpStmt, 'visit_jmp'),
+)
+
+EXP_METHODS = (
+    (LoadExp, 'visit_load_exp'),
+    (StoreExp, 'visit_store_exp'),
+    (BinOpExp, 'visit_binop_exp'),
+    (UnOpExp, 'visit_unop_exp'),
+    (CastExp, 'visit_cast_exp'),
+    (IntExp, 'visit_int_exp'),
+    (LetExp, 'visit_let_exp'),
+    (UnknownExp, 'visit_unknown_exp'),
+    (IteExp, 'visit_ite_exp'),
+    (ExtractExp, 'visit_extract_exp'),
+    (ConcatExp, 'visit_concat_exp'),
+    (VirtualVar, 'visit_virtual_var'),
+    (RegVar, 'visit_reg_var'),
+    (FlagVar, 'visit_flag_var'),
+    (MemVar, 'visit_mem_var'),
+    (OtherVar, 'visit_other_var'),
+    (IntConst, 'visit_int_const'),
+    (StringConst, 'visit_string_const'),
+    (SwitchTable, 'visit_switch_table'),
+    (Flag, 'visit_flag'),
+    (Insn, 'visit_insn'),
+    (CodeOffset, 'visit_code_offset'),
+    (VirtualElm, 'visit_virtual_elm'),
+    (VirtualExp, 'visit_virtual_exp'),
+    (OtherVarNode, 'visit_othervar_node'),
+    (UnknownNode, 'visit_unknown_node'),
+    (GivOffset, 'visit_giv_offset'),
+    (TempOffset, 'visit_temp_offst'),
+    (StringArrayOffset, 'visit_string_array'),
+    (DirectOffset, 'visit_direct_offset'),
+    (IndirectOffset, 'visit_indirect_offset'),
+    (GivReg, 'visit_giv_reg'),
+    (Reg, 'visit_reg'),
+    (Ttype, 'visit_ttype'),
+)
+
+# visitor class -> node type -> unbound visit method, filled on the first
+# visit of each node type instead of trying all types on every visit
+TABLES = dict()
+
+
+def resolve(visitor_cls, node_cls):
+    method = None
+    for cls, name in visitor_cls.methods:
+        if issubclass(node_cls, cls):
+            method = getattr(visitor_cls, name)
+            break
+    TABLES.setdefault(visitor_cls, dict())[node_cls] = method
+    return method
+
+
 class StmtVisitor:
+    methods = STMT_METHODS
+
     def visit(self, stmt, *args, **kwargs):
-        if isinstance(stmt, DefStmt):
-            return self.visit_def(stmt, *args, **kwargs)
-        elif isinstance(stmt, PhiStmt):
-            return self.visit_phi(stmt, *args, **kwargs)
-        elif isinstance(stmt, JmpStmt):
-            return self.visit_jmp(stmt, *args, **kwargs)
+        try:
+            method = TABLES[type(self)][type(stmt)]
+        except KeyError:
+            method = resolve(type(self), type(stmt))
+        if method is not None:
+            return method(self, stmt, *args, **kwargs)
 
     @abc.abstractmethod
     def visit_def(self, stmt, *args, **kwargs):
@@ -38,75 +100,15 @@ class StmtVisitor:
 
 
 class ExpVisitor:
+    methods = EXP_METHODS
+
     def visit(self, exp, *args, **kwargs):
-        if isinstance(exp, LoadExp):
-            return self.visit_load_exp(exp, *args, **kwargs)
-        elif isinstance(exp, StoreExp):
-            return self.visit_store_exp(exp, *args, **kwargs)
-        elif isinstance(exp, BinOpExp):
-            return self.visit_binop_exp(exp, *args, **kwargs)
-        elif isinstance(exp, UnOpExp):
-            return self.visit_unop_exp(exp, *args, **kwargs)
-        elif isinstance(exp, CastExp):
-            return self.visit_cast_exp(exp, *args, **kwargs)
-        elif isinstance(exp, IntExp):
-            return self.visit_int_exp(exp, *args, **kwargs)
-        elif isinstance(exp, LetExp):
-            return self.visit_let_exp(exp, *args, **kwargs)
-        elif isinstance(exp, UnknownExp):
-            return self.visit_unknown_exp(exp, *args, **kwargs)
-        elif isinstance(exp, IteExp):
-            return self.visit_ite_exp(exp, *args, **kwargs)
-        elif isinstance(exp, ExtractExp):
-            return self.visit_extract_exp(exp, *args, **kwargs)
-        elif isinstance(exp, ConcatExp):
-            return self.visit_concat_exp(exp, *args, **kwargs)
-        elif isinstance(exp, VirtualVar):
-            return self.visit_virtual_var(exp, *args, **kwargs)
-        elif isinstance(exp, RegVar):
-            return self.visit_reg_var(exp, *args, **kwargs)
-        elif isinstance(exp, FlagVar):
-            return self.visit_flag_var(exp, *args, **kwargs)
-        elif isinstance(exp, MemVar):
-            return self.visit_mem_var(exp, *args, **kwargs)
-        elif isinstance(exp, OtherVar):
-            return self.visit_other_var(exp, *args, **kwargs)
-        elif isinstance(exp, IntConst):
-            return self.visit_int_const(exp, *args, **kwargs)
-        elif isinstance(exp, StringConst):
-            return self.visit_string_const(exp, *args, **kwargs)
-        elif isinstance(exp, SwitchTable):
-            return self.visit_switch_table(exp, *args, **kwargs)
-        elif isinstance(exp, Flag):
-            return self.visit_flag(exp, *args, **kwargs)
-        elif isinstance(exp, Insn):
-            return self.visit_insn(exp, *args, **kwargs)
-        elif isinstance(exp, CodeOffset):
-            return self.visit_code_offset(exp, *args, **kwargs)
-        elif isinstance(exp, VirtualElm):
-            return self.visit_virtual_elm(exp, *args, **kwargs)
-        elif isinstance(exp, VirtualExp):
-            return self.visit_virtual_exp(exp, *args, **kwargs)
-        elif isinstance(exp, OtherVarNode):
-            return self.visit_othervar_node(exp, *args, **kwargs)
-        elif isinstance(exp, UnknownNode):
-            return self.visit_unknown_node(exp, *args, **kwargs)
-        elif isinstance(exp, GivOffset):
-            return self.visit_giv_offset(exp, *args, **kwargs)
-        elif isinstance(exp, TempOffset):
-            return self.visit_temp_offst(exp, *args, **kwargs)
-        elif isinstance(exp, StringArrayOffset):
-            return self.visit_string_array(exp, *args, **kwargs)
-        elif isinstance(exp, DirectOffset):
-            return self.visit_direct_offset(exp, *args, **kwargs)
-        elif isinstance(exp, IndirectOffset):
-            return self.visit_indirect_offset(exp, *args, **kwargs)
-        elif isinstance(exp, GivReg):
-            return self.visit_giv_reg(exp, *args, **kwargs)
-        elif isinstance(exp, Reg):
-            return self.visit_reg(exp, *args, **kwargs)
-        elif isinstance(exp, Ttype):
-            return self.visit_ttype(exp, *args, **kwargs)
+        try:
+            method = TABLES[type(self)][type(exp)]
+        except KeyError:
+            method = resolve(type(self), type(exp))
+        if method is not None:
+            return method(self, exp, *args, **kwargs)
 
     @abc.abstractmethod
     def visit_load_exp(self, exp, *args, **kwargs):
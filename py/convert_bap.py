@@ -0,0 +1,61 @@
+import os
+import gzip
+import argparse
+import traceback
+
+from bap.lifter import iter_ir
+from bap.compact import is_compact, write_records
+from common.utils import write_file
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Debin to hack binaries. '
+                                     'This script converts json BAP-IR files into the compact BAP-IR format.')
+
+    parser.add_argument('--input', dest='input', type=str, required=True,
+                        help='json BAP-IR file, or a directory of them (e.g. the bap_dir of training). gzip-compressed files are accepted.')
+    parser.add_argument('--output', dest='output', type=str, required=True,
+                        help='compact BAP-IR file, or a directory for them. It may be the same as input.')
+
+    args = parser.parse_args()
+    return args
+
+
+def open_json(path):
+    with open(path, 'rb') as f:
+        gzipped = f.read(2) == b'\x1f\x8b'
+    return gzip.open(path, 'rt') if gzipped else open(path)
+
+
+def convert(src, dst):
+    if is_compact(src):
+        return False
+
+    with open_json(src) as f:
+        write_file(dst, lambda out: write_records(iter_ir(f), out))
+    return True
+
+
+def main():
+    args = get_args()
+
+    if not os.path.isdir(args.input):
+        convert(args.input, args.output)
+        return
+
+    os.makedirs(args.output, exist_ok=True)
+    names = sorted(os.listdir(args.input))
+    for i, name in enumerate(names):
+        src = os.path.join(args.input, name)
+        if not os.path.isfile(src):
+            continue
+        try:
+            status = 'converted' if convert(src, os.path.join(args.output, name)) else 'skipped'
+        except Exception:
+            traceback.print_exc()
+            status = 'failed'
+        print('[{}/{}] {} {}'.format(i + 1, len(names), status, name))
+
+
+if __name__ == '__main__':
+    main()
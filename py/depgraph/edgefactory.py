@@ -1,5 +1,6 @@
 from common.constants import GIV_REGS, TEXT
 from common.visitors import StmtVisitor, ExpVisitor
+from common.traversal import preorder, walk, exp_children
 
 from elements.regs import GivReg, Reg, RegBase
 from elements.offsets import DirectOffset, IndirectOffset, GivOffset, StringArrayOffset, TempOffset
@@ -18,86 +19,101 @@ from depgraph.nodes import GIV_NODES, INF_NODES, NODES, FINE_NODES
 from depgraph.infos import coarse, fine
 
 
+# the elements of an expression are its leaves that are nodes of the graph
+def elms_children(exp):
+    if type(exp) is LetExp:
+        return exp.head, exp.body
+    return exp_children(exp)
+
+
 class ExpElmsExtractor(ExpVisitor):
+    def visit(self, exp, *args, **kwargs):
+        dispatch = super().visit
+        for node in preorder(exp, elms_children):
+            elm = dispatch(node)
+            if elm is not None:
+                yield elm
+
+    # children are visited by preorder
     def visit_binop_exp(self, exp, *args, **kwargs):
-        yield from self.visit(exp.e1)
-        yield from self.visit(exp.e2)
+        pass
 
     def visit_unop_exp(self, exp, *args, **kwargs):
-        yield from self.visit(exp.e)
+        pass
 
     def visit_cast_exp(self, exp, *args, **kwargs):
-        yield from self.visit(exp.e)
+        pass
 
     def visit_unknown_node(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_let_exp(self, exp, *args, **kwargs):
-        yield from self.visit(exp.head)
-        yield from self.visit(exp.body)
+        pass
 
     def visit_ite_exp(self, exp, *args, **kwargs):
-        yield from self.visit(exp.cond)
-        yield from self.visit(exp.yes)
-        yield from self.visit(exp.no)
+        pass
 
     def visit_extract_exp(self, exp, *args, **kwargs):
-        yield from self.visit(exp.e)
+        pass
 
     def visit_concat_exp(self, exp, *args, **kwargs):
-        yield from self.visit(exp.e1)
-        yield from self.visit(exp.e2)
+        pass
 
     def visit_virtual_var(self, exp, *args, **kwargs):
-        yield from []
+        pass
 
     def visit_othervar_node(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_int_const(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_string_const(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_switch_table(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_flag(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_code_offset(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_virtual_exp(self, exp, *args, **kwargs):
-        yield from self.visit(exp.exp)
+        pass
 
     def visit_giv_offset(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_temp_offst(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_string_array(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_direct_offset(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_indirect_offset(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_giv_reg(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
     def visit_reg(self, exp, *args, **kwargs):
-        yield exp
+        return exp
 
 
 EXP_ELMS_EXTRACTOR = ExpElmsExtractor()
 
 
 class ExpEdgeExtractor(ExpVisitor):
+    # visit methods return the nodes to walk next
+    def visit(self, exp, *args, **kwargs):
+        dispatch = super().visit
+        walk(exp, lambda node: dispatch(node, *args, **kwargs))
+
     def visit_binop_exp(self, exp, *args, **kwargs):
         function = kwargs['function']
         binary = function.binary
@@ -120,11 +136,9 @@ class ExpEdgeExtractor(ExpVisitor):
             )
             add_unop_edge(a_op, a, function)
             add_unop_edge(b_op, b, function)
-            self.visit(a, function=function)
-            self.visit(b, function=function)
+            return a, b
         else:
-            self.visit(exp.e1, function=function)
-            self.visit(exp.e2, function=function)
+            return exp.e1, exp.e2
 
     def visit_unop_exp(self, exp, *args, **kwargs):
         function = kwargs['function']
@@ -132,9 +146,9 @@ class ExpEdgeExtractor(ExpVisitor):
 
         if type(operand) in INF_NODES:
             add_unop_edge(op_name, operand, function)
-            self.visit(operand, function=function)
+            return (operand,)
         else:
-            self.visit(exp.e, function=function)
+            return (exp.e,)
 
     def visit_cast_exp(self, exp, *args, **kwargs):
         function = kwargs['function']
@@ -142,21 +156,15 @@ class ExpEdgeExtractor(ExpVisitor):
 
         if type(operand) in INF_NODES:
             add_unop_edge(op_name, operand, function)
-            self.visit(operand, function=function)
+            return (operand,)
         else:
-            self.visit(exp.e, function=function)
+            return (exp.e,)
 
     def visit_let_exp(self, exp, *args, **kwargs):
-        function = kwargs['function']
-        self.visit(exp.v, function=function)
-        self.visit(exp.head, function=function)
-        self.visit(exp.body, function=function)
+        return exp.v, exp.head, exp.body
 
     def visit_ite_exp(self, exp, *args, **kwargs):
-        function = kwargs['function']
-        self.visit(exp.cond, function=function)
-        self.visit(exp.yes, function=function)
-        self.visit(exp.no, function=function)
+        return exp.cond, exp.yes, exp.no
 
     def visit_extract_exp(self, exp, *args, **kwargs):
         function = kwargs['function']
@@ -170,14 +178,12 @@ class ExpEdgeExtractor(ExpVisitor):
                 op_node,
                 'EXTRACT[{}]'
             )
-            self.visit(operand, function=function)
+            return (operand,)
         else:
-            self.visit(exp.e, function=function)
+            return (exp.e,)
 
     def visit_concat_exp(self, exp, *args, **kwargs):
-        function = kwargs['function']
-        self.visit(exp.e1, function=function)
-        self.visit(exp.e2, function=function)
+        return exp.e1, exp.e2
 
     def visit_virtual_var(self, exp, *args, **kwargs):
         pass
@@ -219,13 +225,13 @@ class ExpEdgeExtractor(ExpVisitor):
         pass
 
     def visit_virtual_exp(self, exp, *args, **kwargs):
-        self.visit(exp.exp, function=kwargs['function'])
+        return (exp.exp,)
 
     def visit_othervar_node(self, exp, *args, **kwargs):
         pass
 
     def visit_giv_offset(self, exp, *args, **kwargs):
-        self.visit(exp.exp, function=kwargs['function'])
+        return (exp.exp,)
 
     def visit_temp_offst(self, exp, *args, **kwargs):
         pass
@@ -271,7 +277,11 @@ class StmtEdgeExtractor(StmtVisitor):
                     fine if type(lhs) in FINE_NODES else coarse
                 )
 
-            rhs_elms = list(EXP_ELMS_EXTRACTOR.visit(rhs))
+            # the fused pipeline already collected them with the features
+            if kwargs.get('rhs_elms', None) is not None:
+                rhs_elms = list(kwargs['rhs_elms'])
+            else:
+                rhs_elms = list(EXP_ELMS_EXTRACTOR.visit(rhs))
             for i, elm in enumerate(rhs_elms):
                 binary.edges.add_edge(
                     lhs,
@@ -445,17 +455,17 @@ STMT_EDGE_EXTRACTOR = StmtEdgeExtractor()
 
 
 def get_inner_node(exp):
-    exp = exp.exp if type(exp) is VirtualExp else exp
-    if type(exp) is CastExp:
-        node, op = get_inner_node(exp.e)
-        return node, '({}{})'.format(exp.kind, exp.size) + op
-    elif type(exp) is UnOpExp:
-        node, op = get_inner_node(exp.e)
-        return node, '({})'.format(exp.op) + op
-    elif type(exp) in NODES:
-        return exp, ''
-    else:
-        return exp, ''
+    ops = []
+    while True:
+        exp = exp.exp if type(exp) is VirtualExp else exp
+        if type(exp) is CastExp:
+            ops.append('({}{})'.format(exp.kind, exp.size))
+            exp = exp.e
+        elif type(exp) is UnOpExp:
+            ops.append('({})'.format(exp.op))
+            exp = exp.e
+        else:
+            return exp, ''.join(ops)
 
 
 def add_unop_edge(op_name, node, function):
@@ -271,8 +271,13 @@ class Edges:
         for function in self.binary.functions.functions:
             if not (self.binary.config.MODE == self.binary.config.TRAIN and not function.init_run):
                 for blk in function.blks.values():
-                    for stmt in blk.stmts:
-                        STMT_EDGE_EXTRACTOR.visit(stmt, function=function)
+                    if blk.rhs_elms is not None:
+                        for stmt, rhs_elms in zip(blk.stmts, blk.rhs_elms):
+                            STMT_EDGE_EXTRACTOR.visit(stmt, function=function, rhs_elms=rhs_elms)
+                        blk.rhs_elms = None
+                    else:
+                        for stmt in blk.stmts:
+                            STMT_EDGE_EXTRACTOR.visit(stmt, function=function)
 
     def dump(self):
         for edge in sorted(self.edges, key=lambda e: e.f2):
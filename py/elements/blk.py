@@ -21,6 +21,7 @@ class Blk:
         self.callees = set()
         self.callers = set()
         self.stmts = []
+        self.rhs_elms = None
 
         temp_offsets(self)
         for stmt_bap in self.bap.stmts:
@@ -45,6 +46,10 @@ class Blk:
                 self.stmts.append(stmt)
 
     def init_features(self):
+        if self.binary.config.FUSED_PIPELINE:
+            self.init_features_fused()
+            return
+
         def_stmts = []
 
         for stmt in self.stmts:
@@ -55,12 +60,33 @@ class Blk:
 
         self.def_features(def_stmts)
 
+    # one walk per statement collects its features and the elements of its rhs,
+    # the elements are kept for the edges of the statement
+    def init_features_fused(self):
+        defs = []
+        self.rhs_elms = []
+
+        for stmt in self.stmts:
+            if isinstance(stmt, DefStmt):
+                elms = []
+                STMT_FEATURE_EXTRACTOR.visit(stmt, function=self.function, elms=elms)
+                # consumed once, like the generators of the staged pipeline
+                defs.append((stmt.insn, stmt.lhs, iter(elms)))
+                self.rhs_elms.append(elms)
+            else:
+                STMT_FEATURE_EXTRACTOR.visit(stmt, function=self.function)
+                self.rhs_elms.append(None)
+
+        self.context_features(defs)
+
     def def_features(self, def_stmts):
         for stmt in def_stmts:
             EXP_FEATURE_EXTRACTOR.visit(stmt.rhs)
 
         defs = list(map(lambda d: (d.insn, d.lhs, EXP_ELMS_EXTRACTOR.visit(d.rhs, function=self.function)), def_stmts))
+        self.context_features(defs)
 
+    def context_features(self, defs):
         for i in range(0, len(defs)):
             insn = defs[i][0]
             lhs = defs[i][1]
@@ -1,8 +1,9 @@
 import sys
 import traceback
 
-from common.constants import GIV_REGS, TEXT
+from common.constants import GIV_REGS, TEXT, RODATA, DATA, BSS, PLT, GOTPLT
 from common.visitors import StmtVisitor, ExpVisitor
+from common.traversal import preorder, rebuild, exp_children
 
 from elements.regs import GivReg, Reg, RegBase
 from elements.offsets import DirectOffset, IndirectOffset, GivOffset, StringArrayOffset, TempOffset
@@ -16,47 +17,49 @@ from bap.exps import IntExp, LetExp, UnknownExp, IteExp, ExtractExp, ConcatExp
 from bap.stmts import DefStmt, JmpStmt, PhiStmt
 from bap.stmts import DirectLabel, IndirectLabel, CallKind, GotoKind, RetKind, IntentKind
 
+# sections whose addresses are memory offsets rather than integer constants
+MEM_SEC_KINDS = frozenset([BSS, DATA, RODATA, TEXT, PLT])
+
 
 class ExpInitializer(ExpVisitor):
+    def visit(self, exp, *args, **kwargs):
+        dispatch = super().visit
+        for node in preorder(exp):
+            dispatch(node, *args, **kwargs)
+
+    # children are visited by preorder
     def visit_load_exp(self, exp, *args, **kwargs):
-        self.visit(exp.addr, *args, **kwargs)
+        pass
 
     def visit_store_exp(self, exp, *args, **kwargs):
-        self.visit(exp.addr, *args, **kwargs)
-        self.visit(exp.exp, *args, **kwargs)
+        pass
 
     def visit_binop_exp(self, exp, *args, **kwargs):
-        self.visit(exp.e1, *args, **kwargs)
-        self.visit(exp.e2, *args, **kwargs)
+        pass
 
     def visit_unop_exp(self, exp, *args, **kwargs):
-        self.visit(exp.e, *args, **kwargs)
+        pass
 
     def visit_cast_exp(self, exp, *args, **kwargs):
-        self.visit(exp.e, *args, **kwargs)
+        pass
 
     def visit_int_exp(self, exp, *args, **kwargs):
         pass
 
     def visit_let_exp(self, exp, *args, **kwargs):
-        self.visit(exp.v, *args, **kwargs)
-        self.visit(exp.head, *args, **kwargs)
-        self.visit(exp.body, *args, **kwargs)
+        pass
 
     def visit_unknown_exp(self, exp, *args, **kwargs):
         pass
 
     def visit_ite_exp(self, exp, *args, **kwargs):
-        self.visit(exp.cond, *args, **kwargs)
-        self.visit(exp.yes, *args, **kwargs)
-        self.visit(exp.no, *args, **kwargs)
+        pass
 
     def visit_extract_exp(self, exp, *args, **kwargs):
-        self.visit(exp.e, *args, **kwargs)
+        pass
 
     def visit_concat_exp(self, exp, *args, **kwargs):
-        self.visit(exp.e1, *args, **kwargs)
-        self.visit(exp.e2, *args, **kwargs)
+        pass
 
     def visit_virtual_var(self, exp, *args, **kwargs):
         pass
@@ -136,35 +139,46 @@ class StmtInitializer(StmtVisitor):
 STMT_INITIALIZER = StmtInitializer()
 
 
+# the address of a memory access is transformed before mem_addr looks at it,
+# the stored expression only after the memory node is made
+def transform_children(exp):
+    if type(exp) in (LoadExp, StoreExp):
+        return (exp.addr,)
+    return exp_children(exp)
+
+
 class ExpTransformer(ExpVisitor):
+    # the transformed children of an expression are passed to its visit method as
+    # args, so positional args of the caller could be mistaken for them
+    def visit(self, exp, *args, **kwargs):
+        if len(args) > 0:
+            raise TypeError('ExpTransformer.visit takes only keyword arguments, got {} positional'.format(len(args)))
+        dispatch = super().visit
+        return rebuild(exp, lambda node, values: dispatch(node, *values, **kwargs), transform_children)
+
     def visit_load_exp(self, exp, *args, **kwargs):
         blk = kwargs['blk']
         pc = kwargs['pc']
-        self.visit(exp.addr, *args, **kwargs)
         base_pointer, offset, access = mem_addr(exp.addr, blk, pc)
         return make_mem(exp.addr, base_pointer, offset, blk, pc, access)
 
     def visit_store_exp(self, exp, *args, **kwargs):
         blk = kwargs['blk']
         pc = kwargs['pc']
-        self.visit(exp.addr, *args, **kwargs)
         base_pointer, offset, access = mem_addr(exp.addr, blk, pc)
         lhs = make_mem(exp.addr, base_pointer, offset, blk, pc, access)
-        rhs = self.visit(exp.exp, *args, **kwargs)
+        rhs = self.visit(exp.exp, **kwargs)
         return lhs, rhs
 
     def visit_binop_exp(self, exp, *args, **kwargs):
-        e1 = self.visit(exp.e1, *args, **kwargs)
-        e2 = self.visit(exp.e2, *args, **kwargs)
-        return BinOpExp(op=exp.op, e1=e1, e2=e2, t=exp.t)
+        e1, e2 = args
+        return BinOpExp(exp.op, e1, e2)
 
     def visit_unop_exp(self, exp, *args, **kwargs):
-        e = self.visit(exp.e, *args, **kwargs)
-        return UnOpExp(op=exp.op, e=e, t=exp.t)
+        return UnOpExp(exp.op, args[0])
 
     def visit_cast_exp(self, exp, *args, **kwargs):
-        e = self.visit(exp.e, *args, **kwargs)
-        return CastExp(kind=exp.kind, size=exp.size, e=e, t=exp.t)
+        return CastExp(exp.kind, exp.size, args[0])
 
     def visit_int_exp(self, exp, *args, **kwargs):
         blk = kwargs['blk']
@@ -173,38 +187,28 @@ class ExpTransformer(ExpVisitor):
         value = exp.value
         if 'allint' in kwargs and kwargs['allint']:
             return make_int_const(value, exp.width, blk, pc)
-        elif binary.sections.is_in_bss_sec(value) \
-                or binary.sections.is_in_data_sec(value) \
-                or binary.sections.is_in_rodata_sec(value) \
-                or binary.sections.is_in_text_sec(value) \
-                or binary.sections.is_in_plt_sec(value):
+        elif binary.sections.get_sec_kind(value) in MEM_SEC_KINDS:
             return make_mem(exp, None, value, blk, pc, None)
         else:
             return make_int_const(value, exp.width, blk, pc)
 
     def visit_let_exp(self, exp, *args, **kwargs):
-        v = self.visit(exp.v, *args, **kwargs)
-        head = self.visit(exp.head, *args, **kwargs)
-        body = self.visit(exp.body, *args, **kwargs)
-        return LetExp(v=v, head=head, body=body, t=exp.t)
+        v, head, body = args
+        return LetExp(v, head, body)
 
     def visit_unknown_exp(self, exp, *args, **kwargs):
         return make_unknown_node(kwargs['blk'].binary)
 
     def visit_ite_exp(self, exp, *args, **kwargs):
-        cond = self.visit(exp.cond, *args, **kwargs)
-        yes = self.visit(exp.yes, *args, **kwargs)
-        no = self.visit(exp.no, *args, **kwargs)
-        return IteExp(cond=cond, yes=yes, no=no, t=exp.t)
+        cond, yes, no = args
+        return IteExp(cond, yes, no)
 
     def visit_extract_exp(self, exp, *args, **kwargs):
-        e = self.visit(exp.e, *args, **kwargs)
-        return ExtractExp(hi=exp.hi, lo=exp.lo, e=e, t=exp.t)
+        return ExtractExp(exp.hi, exp.lo, args[0])
 
     def visit_concat_exp(self, exp, *args, **kwargs):
-        e1 = self.visit(exp.e1, *args, **kwargs)
-        e2 = self.visit(exp.e2, *args, **kwargs)
-        return ConcatExp(e1=e1, e2=e2, t=exp.t)
+        e1, e2 = args
+        return ConcatExp(e1, e2)
 
     def visit_virtual_var(self, exp, *args, **kwargs):
         blk = kwargs['blk']
@@ -259,7 +263,7 @@ class StmtTransformer(StmtVisitor):
             # elif isinstance(stmt.lhs, OtherVar):
             #     lhs = stmt.lhs
             #     rhs = EXP_TRANSFORMER.visit(stmt.rhs, blk=blk, pc=pc)
-            return DefStmt(lhs=lhs, rhs=rhs, t=stmt.t, tid=stmt.tid, insn=stmt.insn, pc=stmt.pc)
+            return DefStmt(lhs, rhs, stmt.tid, stmt.insn, stmt.pc)
 
     def visit_phi(self, stmt, *args, **kwargs):
         blk = kwargs['blk']
@@ -289,7 +293,7 @@ class StmtTransformer(StmtVisitor):
             # elif isinstance(stmt.lhs, OtherVar):
             #     lhs = stmt.lhs
             #     rhs = stmt.rhs
-            return PhiStmt(lhs=lhs, rhs=rhs, t=stmt.t, tid=stmt.tid, insn=stmt.insn, pc=stmt.pc)
+            return PhiStmt(lhs, rhs, stmt.tid, stmt.insn, stmt.pc)
 
     def visit_jmp(self, stmt, *args, **kwargs):
         blk = kwargs['blk']
@@ -302,33 +306,33 @@ class StmtTransformer(StmtVisitor):
             target = kind.target
             if isinstance(target, IndirectLabel):
                 exp = EXP_TRANSFORMER.visit(target.exp, *args, **kwargs)
-                target = IndirectLabel(exp=exp, t=target.t)
+                target = IndirectLabel(exp)
             elif isinstance(target, DirectLabel):
                 target = blk.binary.functions.get_function_by_tid(target.target_tid)
             rtn = kind.rtn
             if isinstance(rtn, IndirectLabel):
                 exp = EXP_TRANSFORMER.visit(rtn.exp, *args, **kwargs)
-                rtn = IndirectLabel(exp=exp, t=rtn.t)
+                rtn = IndirectLabel(exp)
             args = dict()
             for key, value in kind.args.items():
                 args[key] = EXP_TRANSFORMER.visit(value[0], blk=blk, pc=value[1])
-            kind = CallKind(target=target, rtn=rtn, args=args, t=kind.t)
+            kind = CallKind(target, rtn, args)
         elif isinstance(kind, GotoKind):
             label = kind.label
             if isinstance(label, IndirectLabel):
                 exp = EXP_TRANSFORMER.visit(label.exp, *args, **kwargs)
-                label = IndirectLabel(exp=exp, t=label.t)
-            kind = GotoKind(label=label, t=kind.t)
+                label = IndirectLabel(exp)
+            kind = GotoKind(label)
         elif isinstance(kind, RetKind):
             label = kind.label
             if isinstance(label, IndirectLabel):
                 exp = EXP_TRANSFORMER.visit(label.exp, *args, **kwargs)
-                label = IndirectLabel(exp=exp, t=label.t)
-            kind = RetKind(label=label, t=kind.t)
+                label = IndirectLabel(exp)
+            kind = RetKind(label)
         elif isinstance(kind, IntentKind):
             kind = kind
 
-        return JmpStmt(cond=cond, kind=kind, t=stmt.t, tid=stmt.tid, insn=stmt.insn, pc=stmt.pc)
+        return JmpStmt(cond, kind, stmt.tid, stmt.insn, stmt.pc)
 
 
 STMT_TRANSFORMER = StmtTransformer()
@@ -492,12 +496,13 @@ def make_mem(addr, base_pointer, offset, blk, pc, access=None):
         return make_indirect_offset(addr, base_pointer, 0, blk, pc)
     elif base_pointer is None and offset is not None:
         binary = blk.binary
-        if binary.sections.is_in_gotplt_sec(offset):
+        kind = binary.sections.get_sec_kind(offset)
+        if kind == GOTPLT:
             offset = binary.sections.get_gotplt_offset(offset)
-        if binary.sections.is_in_bss_sec(offset) \
-                or binary.sections.is_in_data_sec(offset):
+            kind = binary.sections.get_sec_kind(offset)
+        if kind == BSS or kind == DATA:
             return make_direct_offset(offset, blk, pc, access)
-        elif binary.sections.is_in_rodata_sec(offset):
+        elif kind == RODATA:
             rodata_addrs = binary.sections.get_rodata_addrs(offset)
             text_addrs = binary.sections.get_text_addrs(offset)
             if len(rodata_addrs) > 0:
@@ -514,8 +519,7 @@ def make_mem(addr, base_pointer, offset, blk, pc, access=None):
                     return make_direct_offset(offset, blk, pc, access)
                 else:
                     return make_string_const(offset, blk, pc, access)
-        elif binary.sections.is_in_text_sec(offset) \
-                or binary.sections.is_in_plt_sec(offset):
+        elif kind == TEXT or kind == PLT:
             return make_code_offset(offset, blk, access)
         elif access is not None:
             return make_giv_offset(addr, blk, pc, access)
@@ -673,7 +677,8 @@ def make_indirect_offset(addr_bap, base_pointer, offset, blk, pc):
     else:
         new_offset = offset
 
-    if binary.sections.is_in_rodata_sec(new_offset):
+    kind = binary.sections.get_sec_kind(new_offset)
+    if kind == RODATA:
         rodata_addrs = binary.sections.get_rodata_addrs(new_offset)
         text_addrs = binary.sections.get_text_addrs(new_offset)
         if len(rodata_addrs) > 0:
@@ -690,8 +695,7 @@ def make_indirect_offset(addr_bap, base_pointer, offset, blk, pc):
                 return make_direct_offset(new_offset, blk, pc, base_pointer)
             else:
                 return make_string_const(new_offset, blk, pc, base_pointer)
-    elif binary.sections.is_in_data_sec(new_offset) \
-            or binary.sections.is_in_bss_sec(new_offset):
+    elif kind == DATA or kind == BSS:
         return make_direct_offset(new_offset, blk, pc, base_pointer)
     elif key in binary.temp_offsets \
             and pc is not None \
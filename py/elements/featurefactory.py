@@ -3,6 +3,7 @@ from elements.givs import Flag, IntConst
 from elements.offsets import IndirectOffset
 from elements.function import Function
 from common.visitors import StmtVisitor, ExpVisitor
+from common.traversal import walk
 from bap.exps import BinOpExp
 from bap.stmts import CallKind
 from depgraph.edgefactory import get_inner_node
@@ -11,6 +12,11 @@ from depgraph.nodes import GIV_NODES, INF_NODES, NODES, FINE_NODES
 
 
 class ExpFeatureExtractor(ExpVisitor):
+    # visit methods return the nodes to walk next
+    def visit(self, exp, *args, **kwargs):
+        dispatch = super().visit
+        walk(exp, lambda node: dispatch(node, *args, **kwargs))
+
     def visit_binop_exp(self, exp, *args, **kwargs):
         a, a_op = get_inner_node(exp.e1)
         b, b_op = get_inner_node(exp.e2)
@@ -26,11 +32,9 @@ class ExpFeatureExtractor(ExpVisitor):
             feature = '{}[{}][{}]'.format(exp.op, '{}', '{}')
             add_binary_feature(feature, a, b)
 
-            self.visit(a)
-            self.visit(b)
+            return a, b
         else:
-            self.visit(exp.e1)
-            self.visit(exp.e2)
+            return exp.e1, exp.e2
 
     def visit_unop_exp(self, exp, *args, **kwargs):
         operand, op_name = get_inner_node(exp)
@@ -39,9 +43,9 @@ class ExpFeatureExtractor(ExpVisitor):
             feature = 'UNOP[{}][{}]'.format(op_name, '{}')
             add_unary_feature(feature, operand)
 
-            self.visit(operand)
+            return (operand,)
         else:
-            self.visit(exp.e)
+            return (exp.e,)
 
     def visit_cast_exp(self, exp, *args, **kwargs):
         operand, op_name = get_inner_node(exp)
@@ -50,19 +54,16 @@ class ExpFeatureExtractor(ExpVisitor):
             feature = 'UNOP[{}][{}]'.format(op_name, '{}')
             add_unary_feature(feature, operand)
 
-            self.visit(operand)
+            return (operand,)
         else:
-            self.visit(exp.e)
+            return (exp.e,)
 
     def visit_let_exp(self, exp, *args, **kwargs):
         self.visit(exp.v)
-        self.visit(exp.head)
-        self.visit(exp.body)
+        return exp.head, exp.body
 
     def visit_ite_exp(self, exp, *args, **kwargs):
-        self.visit(exp.cond)
-        self.visit(exp.yes)
-        self.visit(exp.no)
+        return exp.cond, exp.yes, exp.no
 
     def visit_extract_exp(self, exp, *args, **kwargs):
         operand, op_name = get_inner_node(exp.e)
@@ -74,13 +75,12 @@ class ExpFeatureExtractor(ExpVisitor):
             feature = 'EXTRACT[{}][{}][{}]'.format(exp.hi, exp.lo, '{}')
             add_unary_feature(feature, operand)
 
-            self.visit(operand)
+            return (operand,)
         else:
-            self.visit(exp.e)
+            return (exp.e,)
 
     def visit_concat_exp(self, exp, *args, **kwargs):
-        self.visit(exp.e1)
-        self.visit(exp.e2)
+        return exp.e1, exp.e2
 
     def visit_virtual_var(self, exp, *args, **kwargs):
         pass
@@ -98,55 +98,55 @@ class ExpFeatureExtractor(ExpVisitor):
         pass
 
     def visit_unknown_node(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_int_const(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_string_const(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_switch_table(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_flag(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_insn(self, exp, *args, **kwargs):
         pass
 
     def visit_code_offset(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_virtual_elm(self, exp, *args, **kwargs):
         pass
 
     def visit_virtual_exp(self, exp, *args, **kwargs):
-        self.visit(exp.exp)
+        return (exp.exp,)
 
     def visit_othervar_node(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_giv_offset(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_temp_offst(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_string_array(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_direct_offset(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_indirect_offset(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_giv_reg(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_reg(self, exp, *args, **kwargs):
-        pass
+        add_elm(exp, *args, **kwargs)
 
     def visit_ttype(self, exp, *args, **kwargs):
         pass
@@ -159,7 +159,7 @@ class StmtFeatureExtractor(StmtVisitor):
     def visit_def(self, stmt, *args, **kwargs):
         from depgraph.edgefactory import EXP_ELMS_EXTRACTOR
 
-        EXP_FEATURE_EXTRACTOR.visit(stmt.rhs)
+        EXP_FEATURE_EXTRACTOR.visit(stmt.rhs, elms=kwargs.get('elms', None))
 
     def visit_phi(self, stmt, *args, **kwargs):
         lhs = stmt.lhs
@@ -309,6 +309,14 @@ class StmtFeatureExtractor(StmtVisitor):
 STMT_FEATURE_EXTRACTOR = StmtFeatureExtractor()
 
 
+# in the fused pipeline the feature extractor also collects the elements
+# EXP_ELMS_EXTRACTOR yields for the same expression, in the same order
+def add_elm(exp, *args, **kwargs):
+    elms = kwargs.get('elms', None)
+    if elms is not None:
+        elms.append(exp)
+
+
 def add_unary_feature(feature, node):
     if isinstance(node, Reg):
         node.features.add(feature.format(coarse(node)))
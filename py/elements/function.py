@@ -2,9 +2,11 @@ import multiprocessing.dummy
 import time
 
 from common.idgen import IDGEN
+from common.intervals import IntervalIndex
 from common.timer import TIMER
 from common import utils
 from common.utils import decode_sleb128, encode_address
+from common.features import HashVectorizer
 from common.constants import UNKNOWN_LABEL, LOC_VAR, FUN_ARG, VOID
 from common.constants import ENUM_DW_FORM_exprloc, ENUM_ABBREV_CODE
 from common.constants import X64_FUN_ARG_REGS, ARM_FUN_ARG_REGS, TTYPES
@@ -34,6 +36,7 @@ class Functions:
 
         self.functions_by_lowpc = dict([(f.low_pc, f) for f in self.functions])
         self.functions_by_tid = dict([(f.tid, f) for f in self.functions])
+        self.functions_by_pc = IntervalIndex(items=self.functions)
 
         self.low_pc = min(map(lambda f: f.low_pc, self.functions))
         self.high_pc = max(map(lambda f: f.high_pc, self.functions))
@@ -86,25 +89,31 @@ class Functions:
     def is_lowpc_function(self, low_pc):
         return low_pc in self.functions_by_lowpc
 
+    # the functions are sorted by low_pc, so the first function containing pc
+    # in the index is also the first one in self.functions
     def get_function_by_pc(self, pc):
-        for f in self.functions:
-            if pc >= f.low_pc and pc <= f.high_pc:
-                return f
-        else:
-            return None
+        return next(self.functions_by_pc.containing(pc), None)
+
+
+# models trained on hashed features take the features of a node as they are
+def vectorize(dict_vec, features):
+    if isinstance(dict_vec, HashVectorizer):
+        return dict_vec.transform(features)
+    else:
+        return dict_vec.transform(dict(map(lambda f: (f, 1), features)))
 
 
 def predict(loc, binary):
     if isinstance(loc, Reg):
         reg = loc
-        feature = binary.config.REG_DICT.transform(dict(map(lambda f: (f, 1), reg.features)))
+        feature = vectorize(binary.config.REG_DICT, reg.features)
         if binary.config.REG_MODEL.predict(feature)[0] == 1:
             reg.n2p_type = binary.config.INF
         else:
             reg.n2p_type = binary.config.GIV
     elif isinstance(loc, IndirectOffset):
         off = loc
-        feature = binary.config.OFF_DICT.transform(dict(map(lambda f: (f, 1), off.features)))
+        feature = vectorize(binary.config.OFF_DICT, off.features)
         if binary.config.OFF_MODEL.predict(feature)[0] == 1:
             off.n2p_type = binary.config.INF
         else:
@@ -401,9 +410,7 @@ class Function(Node):
                     loc_reg = self.binary.config.REG_MAPPING[loc[0] - ENUM_DW_FORM_exprloc['DW_OP_reg0']]
                     self.frame_bases = [FrameBase(base_register=loc_reg, offset=0, low_pc=0, high_pc=self.binary.config.HIGH_PC)]
                 elif form == 'DW_FORM_exprloc' and len(loc) == 1 and loc[0] == ENUM_DW_FORM_exprloc['DW_OP_call_frame_cfa']:
-                    for frame_base in self.binary.debug_info.call_frames:
-                        if not (frame_base.low_pc > self.high_pc + self.low_pc or self.low_pc > frame_base.high_pc):
-                            self.frame_bases.append(frame_base)
+                    self.frame_bases += self.binary.debug_info.call_frames.overlapping(self.low_pc, self.high_pc + self.low_pc)
                 elif form == 'DW_FORM_sec_offset' or form == 'DW_FORM_data4':
                     loc_list = self.binary.debug_info.location_lists.get_location_list_at_offset(loc)
                     for loc_entry in loc_list:
@@ -4,6 +4,7 @@ import depgraph
 from common import utils
 from common.constants import UNKNOWN_LABEL, VOID, LOC_VAR, FUN_ARG, INT
 from common.constants import ENUM_DW_FORM_exprloc, ENUM_ABBREV_CODE, TTYPES
+from common.features import make_features
 from elements.ttype import Ttype
 from elements.givs import Node
 
@@ -125,10 +126,8 @@ class DirectOffset(Offset):
                 return '[DirectOffset (WRONGK {} {}) {}]'.format(self.train_name, self.test_name, str(self.ttype))
 
     def train_info(self, die, ttype):
-        origin = self.binary.debug_info.get_name_origin(die)
-        name_attr = origin.attributes.get('DW_AT_name', None)
-        if name_attr is not None:
-            name = name_attr.value.decode('ascii')
+        name = self.binary.debug_info.get_name(die)
+        if name is not None:
             if self.train_name == UNKNOWN_LABEL:
                 self.ttype.train_info(ttype)
                 self.train_name = name
@@ -276,7 +275,7 @@ class IndirectOffset(Offset):
         self.high_pc = None
         self.pcs = set()
         self.blks = set()
-        self.features = set()
+        self.features = make_features(self.binary.config)
 
         if self.binary.config.MACHINE_ARCH == 'x86':
             if self.base_pointer == 'EBP' and self.offset >= 0:
@@ -325,10 +324,8 @@ class IndirectOffset(Offset):
             self.high_pc = pc
 
     def train_info(self, die, ttype):
-        origin = self.binary.debug_info.get_name_origin(die)
-        name_attr = origin.attributes.get('DW_AT_name', None)
-        if name_attr is not None:
-            name = name_attr.value.decode('ascii')
+        name = self.binary.debug_info.get_name(die)
+        if name is not None:
             if self.train_name == UNKNOWN_LABEL:
                 self.ttype.train_info(ttype)
                 self.train_name = name
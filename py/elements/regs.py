@@ -5,6 +5,7 @@ from common import utils
 from common.constants import UNKNOWN_LABEL, VOID, ENUM_ABBREV_CODE
 from common.constants import X64_FUN_ARG_REGS, ARM_FUN_ARG_REGS, INT, TTYPES
 from common.constants import FUN_ARG, LOC_VAR, ENUM_DW_FORM_exprloc
+from common.features import make_features
 from elements.ttype import Ttype
 from elements.givs import Node
 
@@ -97,7 +98,7 @@ class Reg(RegBase):
         self.high_pc = None
         self.ttype = Ttype(owner=self)
         self.n2p_type = self.binary.config.INF
-        self.features = set()
+        self.features = make_features(self.binary.config)
         self.blks = set()
 
         if self.binary.config.MACHINE_ARCH == 'x86':
@@ -149,10 +150,8 @@ class Reg(RegBase):
             self.high_pc = pc
 
     def train_info(self, die, ttype):
-        origin = self.binary.debug_info.get_name_origin(die)
-        name_attr = origin.attributes.get('DW_AT_name', None)
-        if name_attr is not None:
-            name = name_attr.value.decode('ascii')
+        name = self.binary.debug_info.get_name(die)
+        if name is not None:
             if self.train_name == UNKNOWN_LABEL:
                 self.ttype.train_info(ttype)
                 self.train_name = name
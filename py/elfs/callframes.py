@@ -0,0 +1,97 @@
+from bisect import bisect_left, bisect_right
+
+from common.intervals import IntervalIndex
+
+from elfs.framebase import FrameBase
+
+from elftools.dwarf.callframe import CIE, ZERO
+
+
+# the call frame table of cfi entries, decoded on demand for the pc ranges
+# that are looked up. the rows of all entries form one table ordered by pc,
+# and each row holds until the pc of the next row. the rows of an FDE lie in
+# its pc range, the rows of a CIE are at pc 0.
+class CallFrames:
+    def __init__(self, *args, **kwargs):
+        self.reg_mapping = kwargs['reg_mapping']
+        self.high_pc = kwargs['high_pc']
+        self.entries = [entry for entry in kwargs['entries'] if not isinstance(entry, ZERO)]
+        self.index = IntervalIndex(items=range(len(self.entries)),
+                                   low=self.get_entry_low,
+                                   high=self.get_entry_high)
+        # highest pc of the entries up to each position of the index
+        self.max_highs = []
+        for i in self.index.items:
+            high = self.get_entry_high(i)
+            if len(self.max_highs) > 0:
+                high = max(high, self.max_highs[-1])
+            self.max_highs.append(high)
+        self.rows = dict()
+
+    def get_entry_low(self, i):
+        entry = self.entries[i]
+        return 0 if isinstance(entry, CIE) else entry['initial_location']
+
+    def get_entry_high(self, i):
+        entry = self.entries[i]
+        return 0 if isinstance(entry, CIE) else entry['initial_location'] + entry['address_range']
+
+    # ((pc, entry, row), frame base) of the rows of entry i with a cfa register
+    def get_rows(self, i):
+        if i not in self.rows:
+            rows = []
+            for j, row in enumerate(self.entries[i].get_decoded().table):
+                cfa = row['cfa']
+                if cfa.reg is not None and cfa.offset is not None and cfa.reg in self.reg_mapping:
+                    frame_base = FrameBase(base_register=self.reg_mapping[cfa.reg], offset=cfa.offset, low_pc=row['pc'], high_pc=None)
+                    rows.append(((row['pc'], i, j), frame_base))
+            self.rows[i] = rows
+        return self.rows[i]
+
+    # last row before pc
+    def get_row_before(self, pc):
+        best = None
+        k = bisect_left(self.index.lows, pc) - 1
+        while k >= 0 and (best is None or self.max_highs[k] >= best[0][0]):
+            for row in self.get_rows(self.index.items[k]):
+                if row[0][0] < pc and (best is None or row[0] > best[0]):
+                    best = row
+            k -= 1
+        return best
+
+    # first row after pc
+    def get_row_after(self, pc):
+        best = None
+        for i in self.index.containing(pc + 1):
+            for row in self.get_rows(i):
+                if row[0][0] > pc and (best is None or row[0] < best[0]):
+                    best = row
+        k = bisect_right(self.index.lows, pc)
+        while k < len(self.index.items) and (best is None or self.index.lows[k] <= best[0][0]):
+            for row in self.get_rows(self.index.items[k]):
+                if row[0][0] > pc and (best is None or row[0] < best[0]):
+                    best = row
+            k += 1
+        return best
+
+    # frame bases of the rows that hold for some pc in [low_pc, high_pc]
+    def overlapping(self, low_pc, high_pc):
+        if low_pc > high_pc:
+            return []
+        rows = []
+        for i in self.index.overlapping(low_pc, high_pc):
+            rows += [row for row in self.get_rows(i) if low_pc <= row[0][0] <= high_pc]
+        before = self.get_row_before(low_pc)
+        if before is not None:
+            rows.append(before)
+        rows.sort(key=lambda row: row[0])
+
+        after = self.get_row_after(high_pc)
+        for k, (_, frame_base) in enumerate(rows):
+            if k < len(rows) - 1:
+                frame_base.high_pc = rows[k + 1][1].low_pc - 1
+            elif after is not None:
+                frame_base.high_pc = after[1].low_pc - 1
+            else:
+                frame_base.high_pc = self.high_pc
+        return [frame_base for _, frame_base in rows if frame_base.high_pc >= low_pc]
@@ -4,9 +4,10 @@ import ctypes
 
 from common import utils
 
-from elfs.framebase import FrameBase
+from elfs.callframes import CallFrames
+from elfs.dies import DieDecoder, DieIndex
+from elfs.symbols import make_symbols, strip_version, STT_FUNC, STT_OBJECT
 
-from elftools.dwarf.callframe import ZERO
 from elftools.dwarf.locationlists import LocationEntry
 from elftools.elf.elffile import ELFFile
 
@@ -25,23 +26,40 @@ from common.constants import SYMTAB, STRTAB
 from common.utils import decode_sleb128, decode_uleb128, decode_address, encode_address
 
 
+# marks a DIE whose resolution is in progress
+RESOLVING = object()
+
+
 class DebugInfo:
     def __init__(self, *args, **kwargs):
         self.binary = kwargs['binary']
         self.dies = dict()
 
-        self.debug_elffile = ELFFile(kwargs['debug_elffile'])
+        # results of the resolvers below by DIE offset
+        self.pointer_ttype_dies = dict()
+        self.ttype_names = dict()
+        self.name_origins = dict()
+        self.names = dict()
+        self.die_types = dict()
+        self.byte_sizes = dict()
+
+        self.mapping = utils.map_file(kwargs['debug_elffile'])
+        self.debug_elffile = ELFFile(self.mapping)
 
         if self.debug_elffile.has_dwarf_info():
             self.dwarf_info = self.debug_elffile.get_dwarf_info()
+            self.die_decoder = DieDecoder(dwarf_info=self.dwarf_info)
             self.location_lists = self.dwarf_info.location_lists()
 
-        self.symtab = self.debug_elffile.get_section_by_name(SYMTAB)
-        self.strtab = self.debug_elffile.get_section_by_name(STRTAB)
+        self.symbols = make_symbols(self.debug_elffile, SYMTAB, STRTAB)
 
-        self.call_frames = []
         self.init_call_frames()
 
+    # the DIEs are read in place from the mapping, so they cannot be used after
+    def close(self):
+        self.debug_elffile.release_views()
+        self.mapping.close()
+
     def init_call_frames(self):
         cfi_entries = []
         if self.binary.elffile.get_dwarf_info().has_EH_CFI():
@@ -49,23 +67,48 @@ class DebugInfo:
         if self.dwarf_info.has_CFI():
             cfi_entries += self.dwarf_info.CFI_entries()
 
-        call_frames = []
-        for entry in cfi_entries:
-            if not isinstance(entry, ZERO):
-                for row in entry.get_decoded().table:
-                    cfa = row['cfa']
-                    pc = row['pc']
-                    if cfa.reg is not None and cfa.offset is not None and cfa.reg in self.binary.config.REG_MAPPING:
-                        call_frames.append(FrameBase(base_register=self.binary.config.REG_MAPPING[cfa.reg], offset=cfa.offset, low_pc=pc, high_pc=None))
-        call_frames = sorted(call_frames, key=lambda f: f.low_pc)
-        for i, frame in enumerate(call_frames):
-            if i < len(call_frames) - 1:
-                frame.high_pc = call_frames[i + 1].low_pc - 1
-        if len(call_frames) > 0:
-            call_frames[-1].high_pc = self.binary.config.HIGH_PC
-        self.call_frames = call_frames
+        self.call_frames = CallFrames(entries=cfi_entries,
+                                      reg_mapping=self.binary.config.REG_MAPPING,
+                                      high_pc=self.binary.config.HIGH_PC)
+
+    # resolves die with resolve once, later calls return the same result.
+    # a DIE that is reached again while it is resolved (a cycle of type or
+    # origin references) resolves to default.
+    def memoize(self, memo, resolve, die, default):
+        if die.offset in memo:
+            result = memo[die.offset]
+            return default if result is RESOLVING else result
+        memo[die.offset] = RESOLVING
+        try:
+            result = resolve(die)
+        except Exception:
+            del memo[die.offset]
+            raise
+        memo[die.offset] = result
+        return result
 
     def get_pointer_ttype_die(self, die):
+        return self.memoize(self.pointer_ttype_dies, self.resolve_pointer_ttype_die, die, None)
+
+    def get_ttype_name(self, die):
+        return self.memoize(self.ttype_names, self.resolve_ttype_name, die, VOID)
+
+    def get_name_origin(self, die):
+        return self.memoize(self.name_origins, self.resolve_name_origin, die, die)
+
+    # DW_AT_name of the origin of die, None if it has none
+    def get_name(self, die):
+        return self.memoize(self.names, self.resolve_name, die, None)
+
+    def get_die_type(self, die):
+        if die is None:
+            return None
+        return self.memoize(self.die_types, self.resolve_die_type, die, None)
+
+    def get_byte_size(self, die):
+        return self.memoize(self.byte_sizes, self.resolve_byte_size, die, None)
+
+    def resolve_pointer_ttype_die(self, die):
         die_type_offset = die.attributes.get('DW_AT_type', None)
         cu_offset = die.cu.cu_offset
         die_type = None
@@ -88,7 +131,7 @@ class DebugInfo:
             else:
                 return self.get_pointer_ttype_die(die_type)
 
-    def get_ttype_name(self, die):
+    def resolve_ttype_name(self, die):
         if die.tag == 'DW_TAG_pointer_type':
             return POINTER
         elif die.tag == 'DW_TAG_enumeration_type':
@@ -152,7 +195,7 @@ class DebugInfo:
                 else:
                     return VOID
 
-    def get_name_origin(self, die):
+    def resolve_name_origin(self, die):
         name_attr = die.attributes.get('DW_AT_name', None)
         abstract_origin_attr = die.attributes.get('DW_AT_abstract_origin', None)
         specification_attr = die.attributes.get('DW_AT_specification', None)
@@ -169,10 +212,14 @@ class DebugInfo:
         else:
             return die
 
-    def get_die_type(self, die):
-        if die is None:
+    def resolve_name(self, die):
+        name_attr = self.get_name_origin(die).attributes.get('DW_AT_name', None)
+        if name_attr is None:
             return None
+        else:
+            return name_attr.value.decode('ascii')
 
+    def resolve_die_type(self, die):
         die_type_offset = die.attributes.get('DW_AT_type', None)
         cu_offset = die.cu.cu_offset
         if die_type_offset is None:
@@ -193,7 +240,7 @@ class DebugInfo:
             else:
                 return die_type
 
-    def get_byte_size(self, die):
+    def resolve_byte_size(self, die):
         byte_size_attr = die.attributes.get('DW_AT_byte_size', None)
         if byte_size_attr is not None:
             return byte_size_attr.value
@@ -248,13 +295,25 @@ class DebugInfo:
                     else:
                         return None
 
+    # in streaming mode the DIEs of a compile unit are dropped once it is
+    # labeled, together with the results that refer to DIEs
+    def release_dies(self, cu):
+        if self.binary.config.STREAM_DEBUG_INFO:
+            cu.drop_dies()
+            self.dies.release()
+            self.pointer_ttype_dies.clear()
+            self.name_origins.clear()
+            self.die_types.clear()
+
     def binary_train_info(self):
-        for cu in self.dwarf_info.iter_CUs():
-            for die in cu.iter_DIEs():
-                self.dies[die.offset] = die
+        if self.binary.config.STREAM_DEBUG_INFO:
+            self.dies = DieIndex(decoder=self.die_decoder)
+        else:
+            for cu in self.die_decoder.iter_CUs():
+                for die in cu.iter_DIEs():
+                    self.dies[die.offset] = die
 
-        added_die = set()
-        for cu in self.dwarf_info.iter_CUs():
+        for cu in self.die_decoder.iter_CUs():
             top_die = cu.get_top_DIE()
             low_pc_attr = top_die.attributes.get('DW_AT_low_pc', None)
             if low_pc_attr is not None:
@@ -273,7 +332,6 @@ class DebugInfo:
                             function = self.binary.functions.get_function_by_lowpc(low_pc)
                             if function.is_run_init:
                                 self.function_train_info(function, die, cu_low_pc, True)
-                                added_die.add(die)
                         else:
                             pass
                     else:
@@ -294,24 +352,21 @@ class DebugInfo:
                     else:
                         pass
 
-        for sym in self.symtab.iter_symbols():
-            ttype = sym.entry['st_info']['type']
-            name = self.strtab.get_string(sym.entry['st_name'])
-            if '@@' in name:
-                name = name[:name.find('@@')]
-            value = sym.entry['st_value']
+            self.release_dies(cu)
 
-            if ttype == 'STT_FUNC' and self.binary.functions.is_lowpc_function(value):
+        for name, value in self.symbols.of_type(STT_FUNC):
+            if self.binary.functions.is_lowpc_function(value):
                 function = self.binary.functions.get_function_by_lowpc(value)
                 if function.train_name == UNKNOWN_LABEL:
-                    function.train_name = name
+                    function.train_name = strip_version(name)
 
-            if ttype == 'STT_OBJECT' and value in self.binary.direct_offsets:
+        for name, value in self.symbols.of_type(STT_OBJECT):
+            if value in self.binary.direct_offsets:
                 direct_offset = self.binary.direct_offsets[value]
                 if direct_offset.train_name == UNKNOWN_LABEL:
-                    direct_offset.train_name = name
+                    direct_offset.train_name = strip_version(name)
 
-        for cu in self.dwarf_info.iter_CUs():
+        for cu in self.die_decoder.iter_CUs():
             top_die = cu.get_top_DIE()
             low_pc_attr = top_die.attributes.get('DW_AT_low_pc', None)
             if low_pc_attr is not None:
@@ -323,9 +378,8 @@ class DebugInfo:
                 if die.tag == 'DW_TAG_subprogram':
 
                     origin = self.get_name_origin(die)
-                    name_attr = origin.attributes.get('DW_AT_name', None)
-                    if name_attr is not None:
-                        name = name_attr.value.decode('ascii')
+                    name = self.get_name(die)
+                    if name is not None:
                         for function in self.binary.functions.functions:
                             if function.is_run_init \
                                     and (function.name == name or function.train_name == name):
@@ -348,16 +402,16 @@ class DebugInfo:
                                 break
 
                 if die.tag == 'DW_TAG_variable':
-                    origin = self.get_name_origin(die)
-                    name_attr = origin.attributes.get('DW_AT_name', None)
-                    if name_attr is not None:
-                        name = name_attr.value.decode('ascii')
+                    name = self.get_name(die)
+                    if name is not None:
                         for direct_offset in self.binary.direct_offsets.values():
                             if direct_offset.train_name == name \
                                     and direct_offset.ttype.train_name == UNKNOWN_LABEL:
                                 ttype = self.get_ttype_name(die)
                                 direct_offset.ttype.train_info(ttype)
 
+            self.release_dies(cu)
+
         # for f in self.binary.functions.functions:
         #     if f.train_name != UNKNOWN_LABEL \
         #             and f.ttype.train_name == UNKNOWN_LABEL:
@@ -372,10 +426,9 @@ class DebugInfo:
             name = self.get_ttype_name(die)
             function.ttype.train_info(name)
 
-            origin = self.get_name_origin(die)
-            name_attr = origin.attributes.get('DW_AT_name', None)
-            if name_attr is not None:
-                function.train_name = name_attr.value.decode('ascii')
+            name = self.get_name(die)
+            if name is not None:
+                function.train_name = name
 
         descendants = []
 
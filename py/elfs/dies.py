@@ -0,0 +1,385 @@
+import struct
+from bisect import bisect_right
+
+from elftools.common.utils import MemoryViewStream
+from elftools.dwarf.die import AttributeValue
+from elftools.dwarf.enums import DW_FORM_raw2name
+
+
+# the only attributes debin reads, all others are skipped without decoding
+DIE_ATTRS = frozenset([
+    'DW_AT_name',
+    'DW_AT_linkage_name',
+    'DW_AT_type',
+    'DW_AT_location',
+    'DW_AT_low_pc',
+    'DW_AT_frame_base',
+    'DW_AT_abstract_origin',
+    'DW_AT_specification',
+    'DW_AT_byte_size',
+    'DW_AT_upper_bound',
+    'DW_AT_data_member_location',
+])
+
+BLOCK_FORMS = ('DW_FORM_block1', 'DW_FORM_block2', 'DW_FORM_block4', 'DW_FORM_block', 'DW_FORM_exprloc')
+ULEB128_FORMS = ('DW_FORM_udata', 'DW_FORM_ref_udata')
+
+
+def read_uleb128(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7f) << shift
+        shift += 7
+        if b < 0x80:
+            return value, pos
+
+
+def read_sleb128(data, pos):
+    value = 0
+    shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        value |= (b & 0x7f) << shift
+        shift += 7
+        if b < 0x80:
+            if b & 0x40:
+                value -= 1 << shift
+            return value, pos
+
+
+# offset of the first 0 byte at or after pos
+def find_nul(data, pos):
+    if isinstance(data, bytes):
+        return data.index(b'\x00', pos)
+    while True:
+        chunk = bytes(data[pos:pos + 64])
+        if len(chunk) == 0:
+            raise ValueError('unterminated string')
+        if b'\x00' in chunk:
+            return pos + chunk.index(b'\x00')
+        pos += len(chunk)
+
+
+# reads and skips attribute values of one dwarf format, address size and byte
+# order. values are the same as those of the DWARFStructs forms of elftools.
+class Forms:
+    def __init__(self, *args, **kwargs):
+        order = '<' if kwargs['little_endian'] else '>'
+        offset = 'I' if kwargs['dwarf_format'] == 32 else 'Q'
+        address = 'I' if kwargs['address_size'] == 4 else 'Q'
+        formats = dict(
+            DW_FORM_addr=address,
+            DW_FORM_data1='B',
+            DW_FORM_data2='H',
+            DW_FORM_data4='I',
+            DW_FORM_data8='Q',
+            DW_FORM_strp=offset,
+            DW_FORM_flag='B',
+            DW_FORM_ref1='B',
+            DW_FORM_ref2='H',
+            DW_FORM_ref4='I',
+            DW_FORM_ref8='Q',
+            DW_FORM_ref_addr=offset,
+            DW_FORM_sec_offset=offset,
+            DW_FORM_ref_sig8='Q',
+            DW_FORM_GNU_strp_alt=offset,
+            DW_FORM_GNU_ref_alt=offset,
+        )
+        self.fixed = dict((form, struct.Struct(order + fmt)) for form, fmt in formats.items())
+        self.lengths = dict(
+            DW_FORM_block1=struct.Struct(order + 'B'),
+            DW_FORM_block2=struct.Struct(order + 'H'),
+            DW_FORM_block4=struct.Struct(order + 'I'),
+        )
+
+    # size of a value of form, None if it depends on the value
+    def size(self, form):
+        if form in self.fixed:
+            return self.fixed[form].size
+        elif form == 'DW_FORM_flag_present':
+            return 0
+        else:
+            return None
+
+    def block_length(self, form, data, pos):
+        if form in self.lengths:
+            length = self.lengths[form]
+            return length.unpack_from(data, pos)[0], pos + length.size
+        else:
+            return read_uleb128(data, pos)
+
+    def skip(self, form, data, pos):
+        if form in self.fixed:
+            return pos + self.fixed[form].size
+        elif form in BLOCK_FORMS:
+            length, pos = self.block_length(form, data, pos)
+            return pos + length
+        elif form in ULEB128_FORMS or form == 'DW_FORM_sdata':
+            while data[pos] & 0x80:
+                pos += 1
+            return pos + 1
+        elif form == 'DW_FORM_string':
+            return find_nul(data, pos) + 1
+        elif form == 'DW_FORM_flag_present':
+            return pos
+        elif form == 'DW_FORM_indirect':
+            code, pos = read_uleb128(data, pos)
+            return self.skip(DW_FORM_raw2name[code], data, pos)
+        else:
+            raise KeyError(form)
+
+    def read(self, form, data, pos):
+        if form in self.fixed:
+            return self.fixed[form].unpack_from(data, pos)[0]
+        elif form in BLOCK_FORMS:
+            length, pos = self.block_length(form, data, pos)
+            return list(data[pos:pos + length])
+        elif form in ULEB128_FORMS or form == 'DW_FORM_indirect':
+            return read_uleb128(data, pos)[0]
+        elif form == 'DW_FORM_sdata':
+            return read_sleb128(data, pos)[0]
+        elif form == 'DW_FORM_string':
+            return bytes(data[pos:find_nul(data, pos)])
+        elif form == 'DW_FORM_flag_present':
+            return b''
+        else:
+            raise KeyError(form)
+
+
+# decoding plan of the DIEs of one abbreviation: the steps over its attribute
+# values, where consecutive skipped values of fixed size are merged.
+# each step is (index, size, form), the offset of the value is kept at index
+# if it is one of DIE_ATTRS, and the value is skipped by size or by its form.
+class Plan:
+    __slots__ = ('tag', 'has_children', 'names', 'forms', 'steps')
+
+    def __init__(self, abbrev, forms):
+        self.tag = abbrev['tag']
+        self.has_children = abbrev.has_children()
+        self.names = dict()
+        self.forms = []
+        self.steps = []
+        for name, form in abbrev.iter_attr_specs():
+            size = forms.size(form)
+            if name in DIE_ATTRS:
+                if name not in self.names:
+                    self.names[name] = len(self.forms)
+                    self.forms.append(form)
+                else:
+                    self.forms[self.names[name]] = form
+                self.steps.append((self.names[name], size, form))
+            elif size is not None and len(self.steps) > 0 \
+                    and self.steps[-1][0] is None and self.steps[-1][1] is not None:
+                self.steps[-1] = (None, self.steps[-1][1] + size, None)
+            else:
+                self.steps.append((None, size, form))
+
+
+# attributes of a DIE, only decoded when they are read
+class Attributes:
+    __slots__ = ('unit', 'plan', 'offsets', 'values')
+
+    def __init__(self, unit, plan, offsets):
+        self.unit = unit
+        self.plan = plan
+        self.offsets = offsets
+        self.values = None
+
+    def get(self, name, default=None):
+        if self.plan is None or name not in self.plan.names:
+            return default
+        if self.values is None:
+            self.values = dict()
+        if name not in self.values:
+            index = self.plan.names[name]
+            self.values[name] = self.unit.decode(name, self.plan.forms[index], self.offsets[index])
+        return self.values[name]
+
+    def __contains__(self, name):
+        return self.plan is not None and name in self.plan.names
+
+
+class Die:
+    __slots__ = ('cu', 'offset', 'size', 'tag', 'has_children', 'attributes', '_children', '_parent')
+
+    def __init__(self, cu, offset, size, plan, offsets):
+        self.cu = cu
+        self.offset = offset
+        self.size = size
+        self.tag = plan.tag if plan is not None else None
+        self.has_children = plan.has_children if plan is not None else None
+        self.attributes = Attributes(cu, plan, offsets)
+        self._children = []
+        self._parent = None
+
+    def is_null(self):
+        return self.tag is None
+
+    def get_parent(self):
+        return self._parent
+
+    def iter_children(self):
+        return iter(self._children)
+
+
+# the DIEs of a compile unit, decoded with the plans of its abbreviation table
+# into the same tree as CompileUnit.iter_DIEs of elftools
+class Unit:
+    def __init__(self, *args, **kwargs):
+        self.decoder = kwargs['decoder']
+        cu = kwargs['cu']
+        self.cu_offset = cu.cu_offset
+        self.cu_die_offset = cu.cu_die_offset
+        self.header = cu.header
+        self.end = cu.cu_offset + cu['unit_length'] + cu.structs.initial_length_field_size()
+        self.abbrev_table = cu.get_abbrev_table()
+        self.forms = self.decoder.get_forms(cu.structs)
+        self.plans = self.decoder.get_plans(cu['debug_abbrev_offset'], cu.structs)
+        self.dies = None
+        self.dies_by_offset = None
+
+    def __getitem__(self, name):
+        return self.header[name]
+
+    def get_plan(self, code):
+        if code not in self.plans:
+            self.plans[code] = Plan(self.abbrev_table.get_abbrev(code), self.forms)
+        return self.plans[code]
+
+    def parse_dies(self):
+        data = self.decoder.data
+        self.dies = []
+        offset = self.cu_die_offset
+        while offset < self.end:
+            code, pos = read_uleb128(data, offset)
+            if code == 0:
+                self.dies.append(Die(self, offset, pos - offset, None, None))
+            else:
+                plan = self.get_plan(code)
+                offsets = [None] * len(plan.forms)
+                for index, size, form in plan.steps:
+                    if index is not None:
+                        offsets[index] = pos
+                    if size is not None:
+                        pos += size
+                    else:
+                        pos = self.forms.skip(form, data, pos)
+                self.dies.append(Die(self, offset, pos - offset, plan, offsets))
+            offset = pos
+
+        parents = [self.dies[0]]
+        for die in self.dies[1:]:
+            if not die.is_null():
+                parent = parents[-1]
+                parent._children.append(die)
+                die._parent = parent
+                if die.has_children:
+                    parents.append(die)
+            elif len(parents) > 0:
+                parents.pop()
+
+    def iter_DIEs(self):
+        if self.dies is None:
+            self.parse_dies()
+        return iter(self.dies)
+
+    def get_top_DIE(self):
+        if self.dies is None:
+            self.parse_dies()
+        return self.dies[0]
+
+    def get_die(self, offset):
+        if self.dies_by_offset is None:
+            self.dies_by_offset = dict((die.offset, die) for die in self.iter_DIEs())
+        return self.dies_by_offset.get(offset, None)
+
+    # the DIEs are decoded again if they are needed later
+    def drop_dies(self):
+        self.dies = None
+        self.dies_by_offset = None
+
+    def decode(self, name, form, offset):
+        data = self.decoder.data
+        raw_value = self.forms.read(form, data, offset)
+        value = raw_value
+        if form == 'DW_FORM_strp':
+            value = self.decoder.dwarf_info.get_string_from_table(raw_value)
+        elif form == 'DW_FORM_flag':
+            value = not raw_value == 0
+        elif form == 'DW_FORM_indirect':
+            code, pos = read_uleb128(data, offset)
+            value = self.decode(name, DW_FORM_raw2name[code], pos).value
+        return AttributeValue(name=name, form=form, value=value, raw_value=raw_value, offset=offset)
+
+
+# decodes the DIEs of all compile units of a DWARFInfo, sharing the plans of
+# the abbreviation tables between the units that use them
+class DieDecoder:
+    def __init__(self, *args, **kwargs):
+        self.dwarf_info = kwargs['dwarf_info']
+        stream = self.dwarf_info.debug_info_sec.stream
+        if isinstance(stream, MemoryViewStream):
+            self.data = stream.view
+        else:
+            stream.seek(0)
+            self.data = stream.read()
+        self.forms = dict()
+        self.plans = dict()
+        self.units = [Unit(cu=cu, decoder=self) for cu in self.dwarf_info.iter_CUs()]
+
+    def get_forms(self, structs):
+        key = (structs.little_endian, structs.dwarf_format, structs.address_size)
+        if key not in self.forms:
+            self.forms[key] = Forms(little_endian=key[0], dwarf_format=key[1], address_size=key[2])
+        return self.forms[key]
+
+    def get_plans(self, abbrev_offset, structs):
+        key = (abbrev_offset, structs.dwarf_format, structs.address_size)
+        if key not in self.plans:
+            self.plans[key] = dict()
+        return self.plans[key]
+
+    def iter_CUs(self):
+        return iter(self.units)
+
+
+# DIEs by offset, decoded on demand one compile unit at a time. units stay
+# decoded until release, so only the units in use are in memory.
+class DieIndex:
+    def __init__(self, *args, **kwargs):
+        self.units = kwargs['decoder'].units
+        self.starts = [unit.cu_offset for unit in self.units]
+        self.decoded = set()
+
+    def get_unit(self, offset):
+        i = bisect_right(self.starts, offset) - 1
+        if i >= 0 and offset < self.units[i].end:
+            return self.units[i]
+        else:
+            return None
+
+    def get(self, offset, default=None):
+        unit = self.get_unit(offset)
+        if unit is None:
+            return default
+        self.decoded.add(unit)
+        die = unit.get_die(offset)
+        return die if die is not None else default
+
+    def __contains__(self, offset):
+        return self.get(offset) is not None
+
+    def __getitem__(self, offset):
+        die = self.get(offset)
+        if die is None:
+            raise KeyError(offset)
+        return die
+
+    def release(self):
+        for unit in self.decoded:
+            unit.drop_dies()
+        self.decoded.clear()
@@ -11,6 +11,11 @@ class InsnMap:
         self.pc_dict[start_pc] = start_pc + byte_length
         self.insn_dict[start_pc] = insn_name
 
+    def add_record(self, record):
+        if record['t'] == 'pcs':
+            for item in record['pcs']:
+                self.add_pc(item['start_pc'], item['byte_length'], item['insn_name'])
+
     def get_pc(self, pc):
         return self.pc_dict[pc] if pc in self.pc_dict else pc
 
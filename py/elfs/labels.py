@@ -0,0 +1,109 @@
+import os
+import json
+
+from bap.cache import BapCache, file_digest
+from bap.lifter import bap_flags
+
+from common.constants import UNKNOWN_LABEL
+
+
+# bump whenever the extraction of labels or the layout below changes
+LABELS_VERSION = 1
+LABELS_SUFFIX = '.json.gz'
+
+
+# functions that are not initialized have no type
+def ttype_name(node):
+    return node.ttype.train_name if node.ttype is not None else UNKNOWN_LABEL
+
+
+def is_labeled(node):
+    return node.train_name != UNKNOWN_LABEL or ttype_name(node) != UNKNOWN_LABEL
+
+
+# ground truth labels of a binary taken from its debug info, stored in a
+# content-addressed cache keyed by the debug info plus everything that decides
+# which nodes the labels go to: the binary, its BAP-IR and the offset layout.
+# a cached entry lists the labeled nodes:
+#   functions: [low_pc, init_run, name, type]
+#   regs: [low_pc, base_register, index, name, type]
+#   indirect_offsets: [low_pc, base_pointer, offset, index, name, type]
+#   direct_offsets: [offset, name, type]
+class LabelCache:
+    def __init__(self, *args, **kwargs):
+        self.binary = kwargs['binary']
+        config = self.binary.config
+        self.cache = BapCache(cache_dir=config.LABEL_CACHE_DIR, max_size=config.LABEL_CACHE_SIZE,
+                              suffix=LABELS_SUFFIX)
+
+        flags = ['labels', str(LABELS_VERSION), file_digest(config.BINARY_PATH),
+                 str(config.INDIRECT_OFFSET_WITH_INDEX)]
+        if config.BAP_FILE_PATH != '' and os.path.exists(config.BAP_FILE_PATH):
+            flags.append(file_digest(config.BAP_FILE_PATH))
+        else:
+            flags += bap_flags(self.binary.bap.has_symtab, config.BYTEWEIGHT_SIGS_PATH)
+        self.key = self.cache.key(config.DEBUG_INFO_PATH, flags)
+
+    def get_labels(self):
+        functions = []
+        regs = []
+        indirect_offsets = []
+        direct_offsets = []
+
+        for function in self.binary.functions.functions:
+            if function.init_run or is_labeled(function):
+                functions.append([function.low_pc, function.init_run, function.train_name, ttype_name(function)])
+            for (base_register, index), reg in function.regs.items():
+                if is_labeled(reg):
+                    regs.append([function.low_pc, base_register, index, reg.train_name, ttype_name(reg)])
+            for (base_pointer, offset), offsets in function.indirect_offsets.items():
+                for index, indirect_offset in offsets.items():
+                    if is_labeled(indirect_offset):
+                        indirect_offsets.append([function.low_pc, base_pointer, offset, index,
+                                                 indirect_offset.train_name, ttype_name(indirect_offset)])
+
+        for offset, direct_offset in self.binary.direct_offsets.items():
+            if is_labeled(direct_offset):
+                direct_offsets.append([offset, direct_offset.train_name, ttype_name(direct_offset)])
+
+        return dict(functions=functions, regs=regs,
+                    indirect_offsets=indirect_offsets, direct_offsets=direct_offsets)
+
+    # the nodes of the labels, None if one of them is not in the binary
+    def get_nodes(self, labels):
+        functions = self.binary.functions.functions_by_lowpc
+        direct_offsets = self.binary.direct_offsets
+        try:
+            nodes = []
+            for low_pc, init_run, train_name, ttype in labels['functions']:
+                nodes.append((functions[low_pc], train_name, ttype))
+            for low_pc, base_register, index, train_name, ttype in labels['regs']:
+                nodes.append((functions[low_pc].regs[(base_register, index)], train_name, ttype))
+            for low_pc, base_pointer, offset, index, train_name, ttype in labels['indirect_offsets']:
+                nodes.append((functions[low_pc].indirect_offsets[(base_pointer, offset)][index], train_name, ttype))
+            for offset, train_name, ttype in labels['direct_offsets']:
+                nodes.append((direct_offsets[offset], train_name, ttype))
+            return nodes
+        except KeyError:
+            return None
+
+    # sets the cached labels on the nodes, False if there are none for the binary
+    def load(self):
+        data = self.cache.get(self.key)
+        if data is None:
+            return False
+        labels = json.loads(data)
+        nodes = self.get_nodes(labels)
+        if nodes is None:
+            return False
+
+        for low_pc, init_run, _, _ in labels['functions']:
+            self.binary.functions.functions_by_lowpc[low_pc].init_run = init_run
+        for node, train_name, ttype in nodes:
+            node.train_name = train_name
+            if node.ttype is not None:
+                node.ttype.train_name = ttype
+        return True
+
+    def save(self):
+        self.cache.put(self.key, json.dumps(self.get_labels(), separators=(',', ':')))
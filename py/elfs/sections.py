@@ -1,9 +1,18 @@
+from bisect import bisect_right
+
+import numpy
+
 from common import constants
 from common import utils
 from common.constants import TEXT, RODATA, DATA, BSS, INIT, STRTAB
 from common.constants import FINI, PLT, DYNSYM, DYNSTR, GOTPLT, SYMTAB
 from common.constants import GOT, PLTGOT
+from elfs.symbols import make_symbols, strip_symbol_name, STT_FUNC, STT_OBJECT
 
+# kinds of the mapped sections, an address is classified by the name of the
+# section it is in. mapped sections do not overlap in a linked binary, if they
+# do anyway the first kind in this order wins.
+SEC_KINDS = (GOTPLT, BSS, DATA, RODATA, TEXT, PLT, INIT, FINI, GOT, PLTGOT)
 
 class Sections:
     def __init__(self, *args, **kwargs):
@@ -15,7 +24,7 @@ class Sections:
         self.sections[TEXT] = TextSection(data=sec.data(), addr=sec['sh_addr'], binary=self.binary)
         if self.binary.elffile.get_section_by_name(RODATA):
             sec = self.binary.elffile.get_section_by_name(RODATA)
-            self.sections[RODATA] = RodataSection(data=sec.data(), addr=sec['sh_addr'], binary=self.binary)
+            self.sections[RODATA] = RodataSection(data=sec.data(), addr=sec['sh_addr'], binary=self.binary, text=self.sections[TEXT])
         if self.binary.elffile.get_section_by_name(DATA):
             sec = self.binary.elffile.get_section_by_name(DATA)
             self.sections[DATA] = SectionWithoutData(addr=sec['sh_addr'], data_size=sec.data_size, binary=self.binary)
@@ -47,40 +56,62 @@ class Sections:
             sec = self.binary.elffile.get_section_by_name(PLTGOT)
             self.sections[PLTGOT] = SectionWithoutData(addr=sec['sh_addr'], data_size=sec.data_size, binary=self.binary)
 
+        self.sec_starts = []
+        self.sec_ends = []
+        self.sec_kinds = []
+        self.init_sec_table()
+
+        self.symbols = dict()
         self.symbol_names = set()
         self.init_symbol_names()
 
+    # sorted, disjoint intervals [start, end) of the mapped sections
+    def init_sec_table(self):
+        secs = [self.sections[kind] for kind in SEC_KINDS if kind in self.sections]
+        points = sorted(set([sec.addr for sec in secs] + [sec.end_addr for sec in secs]))
+        for start, end in zip(points, points[1:]):
+            kind = None
+            for k in SEC_KINDS:
+                if k in self.sections and self.sections[k].is_in_sec(start):
+                    kind = k
+                    break
+            if kind is None:
+                continue
+            if len(self.sec_kinds) > 0 and self.sec_kinds[-1] == kind and self.sec_ends[-1] == start:
+                self.sec_ends[-1] = end
+            else:
+                self.sec_starts.append(start)
+                self.sec_ends.append(end)
+                self.sec_kinds.append(kind)
+
+    def get_sec_kind(self, addr):
+        i = bisect_right(self.sec_starts, addr) - 1
+        if i >= 0 and addr < self.sec_ends[i]:
+            return self.sec_kinds[i]
+        else:
+            return None
+
+    # decoded symbols of a symbol table, shared by all their users
+    def get_symbols(self, symtab_name, strtab_name):
+        if symtab_name not in self.symbols:
+            self.symbols[symtab_name] = make_symbols(self.binary.elffile, symtab_name, strtab_name)
+        return self.symbols[symtab_name]
+
     def init_symbol_names(self):
-        if self.has_sec(DYNSYM) and self.has_sec(DYNSTR):
-            dynsym = self.get_sec(DYNSYM)
-            dynstr = self.get_sec(DYNSTR)
-            if hasattr(dynsym, 'iter_symbols'):
-                for sym in dynsym.iter_symbols():
-                    name = dynstr.get_string(sym.entry['st_name'])
-                    if '@@' in name:
-                        name = name[:name.find('@@')]
-                    if '.' in name:
-                        name = name[:name.find('.')]
-                    self.symbol_names.add(name)
-        
-        symtab = self.binary.elffile.get_section_by_name(SYMTAB)
-        strtab = self.binary.elffile.get_section_by_name(STRTAB)
-
-        if symtab is not None \
-                and strtab is not None \
-                and self.binary.config.MODE == self.binary.config.TEST:
-            if hasattr(symtab, 'iter_symbols'):
-                for sym in symtab.iter_symbols():
-                    name = strtab.get_string(sym.entry['st_name'])
-                    if '@@' in name:
-                        name = name[:name.find('@@')]
-                    if '.' in name:
-                        name = name[:name.find('.')]
-                    self.symbol_names.add(name)
-
-                    ttype = sym.entry['st_info']['type']
-                    value = sym.entry['st_value']
-                    if ttype == 'STT_OBJECT' and value in self.binary.direct_offsets:
+        dynsym = self.get_symbols(DYNSYM, DYNSTR)
+        if dynsym is not None:
+            for name in dynsym.names:
+                self.symbol_names.add(strip_symbol_name(name))
+
+        if self.binary.config.MODE == self.binary.config.TEST:
+            symtab = self.get_symbols(SYMTAB, STRTAB)
+            if symtab is not None:
+                for name in symtab.names:
+                    self.symbol_names.add(strip_symbol_name(name))
+
+                for name, value in symtab.of_type(STT_OBJECT):
+                    if value in self.binary.direct_offsets:
+                        name = strip_symbol_name(name)
                         direct_offset = self.binary.direct_offsets[value]
                         direct_offset.name = name
                         direct_offset.train_name = name
@@ -136,48 +167,33 @@ class Sections:
         return addr if GOTPLT not in self.sections else self.sections[GOTPLT].get_offset(addr)
 
     def init_dynsym_functions(self):
-        if self.has_sec(DYNSYM) and self.has_sec(DYNSTR):
-            dynsym = self.get_sec(DYNSYM)
-            dynstr = self.get_sec(DYNSTR)
-            if hasattr(dynsym, 'iter_symbols'):
-                for sym in dynsym.iter_symbols():
-                    ttype = sym.entry['st_info']['type']
-                    name = dynstr.get_string(sym.entry['st_name'])
+        dynsym = self.get_symbols(DYNSYM, DYNSTR)
+        if dynsym is not None:
+            for name, value in dynsym.of_type(STT_FUNC):
+                if self.binary.functions.is_lowpc_function(value):
                     if '@' in name:
                         name = name[:name.find('@')]
-                    value = sym.entry['st_value']
-
-                    if ttype == 'STT_FUNC' and self.binary.functions.is_lowpc_function(value):
-                        function = self.binary.functions.get_function_by_lowpc(value)
-                        function.name = name
-                        function.train_name = name
-                        function.test_name = name
-                        function.is_name_given = True
-                        if self.is_in_text_sec(value):
-                            function.is_run_init = True
-                        else:
-                            function.is_run_init = False
+                    function = self.binary.functions.get_function_by_lowpc(value)
+                    function.name = name
+                    function.train_name = name
+                    function.test_name = name
+                    function.is_name_given = True
+                    if self.is_in_text_sec(value):
+                        function.is_run_init = True
+                    else:
+                        function.is_run_init = False
 
     def init_dynsym_offsets(self):
-        if self.has_sec(DYNSYM) and self.has_sec(DYNSTR):
-            dynsym = self.get_sec(DYNSYM)
-            dynstr = self.get_sec(DYNSTR)
-            if hasattr(dynsym, 'iter_symbols'):
-                for sym in dynsym.iter_symbols():
-                    ttype = sym.entry['st_info']['type']
-                    name = dynstr.get_string(sym.entry['st_name'])
-                    if '@@' in name:
-                        name = name[:name.find('@@')]
-                    if '.' in name:
-                        name = name[:name.find('.')]
-                    value = sym.entry['st_value']
-
-                    if ttype == 'STT_OBJECT' and value in self.binary.direct_offsets:
-                        direct_offset = self.binary.direct_offsets[value]
-                        direct_offset.name = name
-                        direct_offset.train_name = name
-                        direct_offset.test_name = name
-                        direct_offset.is_name_given = True
+        dynsym = self.get_symbols(DYNSYM, DYNSTR)
+        if dynsym is not None:
+            for name, value in dynsym.of_type(STT_OBJECT):
+                if value in self.binary.direct_offsets:
+                    name = strip_symbol_name(name)
+                    direct_offset = self.binary.direct_offsets[value]
+                    direct_offset.name = name
+                    direct_offset.train_name = name
+                    direct_offset.test_name = name
+                    direct_offset.is_name_given = True
 
 
 class Section:
@@ -203,64 +219,106 @@ class SectionWithoutData(Section):
         self.end_addr = self.addr + kwargs['data_size']
 
 
-class RodataSection(SectionWithData):
-    def get_rodata_addrs(self, addr):
-        if not self.is_in_sec(addr):
-            return None
+# whether a byte is printable, a string is a run of them ending with a 0 byte
+PRINTABLE_BYTES = numpy.zeros(256, dtype=bool)
+PRINTABLE_BYTES[list(constants.BYTES_PRINTABLE_SET)] = True
 
-        off = addr - self.addr
-        addrs = []
 
-        while off < len(self.data) and (off + self.binary.config.ADDRESS_BYTE_SIZE) < len(self.data):
-            a = utils.decode_address(self.data[off:], self.binary)
-            if self.is_in_sec(a):
-                addrs.append(a)
-            else:
-                break
-            off += self.binary.config.ADDRESS_BYTE_SIZE
+# starts and ends of the runs of true values of mask, as offsets into mask
+def true_runs(mask):
+    edges = numpy.flatnonzero(numpy.diff(mask.view(numpy.int8), prepend=0, append=0))
+    return edges[0::2].astype(numpy.int32), edges[1::2].astype(numpy.int32)
 
-        return addrs
 
-    def get_text_addrs(self, addr):
-        if not self.is_in_sec(addr):
-            return None
+# end of the run in runs that contains i, or None
+def run_end(runs, i):
+    starts, ends = runs
+    k = numpy.searchsorted(starts, i, side='right') - 1
+    if k >= 0 and i < ends[k]:
+        return int(ends[k])
+    return None
 
-        off = addr - self.addr
-        addrs = []
 
-        while off < len(self.data) and (off + self.binary.config.ADDRESS_BYTE_SIZE) < len(self.data):
-            a = utils.decode_address(self.data[off:], self.binary)
-            if self.binary.sections.is_in_text_sec(a):
-                addrs.append(a)
+class RodataSection(SectionWithData):
+    # strings and runs of pointers are found by scanning the section once, on
+    # their first lookup, and then looked up by offset instead of being decoded
+    # again for every reference. only the starts and ends of the runs are kept,
+    # so the memory is in the number of runs rather than the size of the section.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.byte_size = int(self.binary.config.ADDRESS_BYTE_SIZE)
+        self.text = kwargs['text']
+        self.string_runs = None
+        self.strings = dict()
+        self.init_pointers()
+        self.rodata_runs = None
+        self.text_runs = None
+
+    # a string is a run of printable bytes ending with a 0 byte
+    def init_strings(self):
+        data = numpy.frombuffer(self.data, dtype=numpy.uint8)
+        starts, ends = true_runs(PRINTABLE_BYTES[data])
+        terminated = ends < len(data)
+        terminated[terminated] = data[ends[terminated]] == 0
+        self.string_runs = starts[terminated], ends[terminated]
+
+    # the pointer at offset off is the little-endian address in
+    # data[off:off + byte_size], it is only read if off + byte_size < len(data).
+    # pointers are unaligned, so there is one view of the data per offset
+    # modulo byte_size, each as an array of native-width pointers.
+    def init_pointers(self):
+        dtype = numpy.dtype('<u{}'.format(self.byte_size))
+        self.pointers = []
+        for shift in range(self.byte_size):
+            count = max(0, (len(self.data) - shift - 1) // self.byte_size)
+            if count > 0:
+                pointers = numpy.frombuffer(self.data, dtype=dtype, count=count, offset=shift)
             else:
-                break
-            off += self.binary.config.ADDRESS_BYTE_SIZE
+                pointers = numpy.zeros(0, dtype=dtype)
+            self.pointers.append(pointers)
 
-        return addrs
+    # runs of pointers in a row into sec, for each view of the pointers
+    def pointer_runs(self, sec):
+        dtype = numpy.dtype('<u{}'.format(self.byte_size))
+        low, high = dtype.type(sec.addr), dtype.type(sec.end_addr)
+        return [true_runs((pointers >= low) & (pointers < high)) for pointers in self.pointers]
 
-    def get_string(self, addr):
+    def get_pointers(self, addr, runs):
+        off = addr - self.addr
+        shift, index = off % self.byte_size, off // self.byte_size
+        end = run_end(runs[shift], index)
+        if end is None:
+            return []
+        return self.pointers[shift][index:end].tolist()
+
+    def get_rodata_addrs(self, addr):
         if not self.is_in_sec(addr):
             return None
+        if self.rodata_runs is None:
+            self.rodata_runs = self.pointer_runs(self)
+        return self.get_pointers(addr, self.rodata_runs)
 
-        off = addr - self.addr
+    def get_text_addrs(self, addr):
+        if not self.is_in_sec(addr):
+            return None
+        if self.text_runs is None:
+            self.text_runs = self.pointer_runs(self.text)
+        return self.get_pointers(addr, self.text_runs)
 
-        txt = []
-        c = 0
-        i = 0
-        while off < len(self.data):
-            c = self.data[off]
-            if c == 0:
-                break
-            if c not in constants.BYTES_PRINTABLE_SET:
-                break
-            txt.append(utils.get_char(c))
-            off += 1
-            i += 1
-
-        if c != 0 or i == 0:
+    def get_string(self, addr):
+        if not self.is_in_sec(addr):
             return None
-        else:
-            return ''.join(txt)
+
+        off = addr - self.addr
+        if off not in self.strings:
+            if self.string_runs is None:
+                self.init_strings()
+            end = run_end(self.string_runs, off)
+            if end is None:
+                self.strings[off] = None
+            else:
+                self.strings[off] = ''.join(map(utils.get_char, self.data[off:end]))
+        return self.strings[off]
 
 
 class TextSection(SectionWithData):
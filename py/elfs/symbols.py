@@ -0,0 +1,89 @@
+import numpy
+
+from elftools.elf.enums import ENUM_ST_INFO_TYPE
+
+STT_OBJECT = ENUM_ST_INFO_TYPE['STT_OBJECT']
+STT_FUNC = ENUM_ST_INFO_TYPE['STT_FUNC']
+
+
+# Elf32_Sym and Elf64_Sym as numpy structured dtypes, (name, format, offset)
+SYM_FIELDS = {
+    32: (('st_name', 'u4', 0), ('st_value', 'u4', 4), ('st_size', 'u4', 8),
+         ('st_info', 'u1', 12), ('st_other', 'u1', 13), ('st_shndx', 'u2', 14)),
+    64: (('st_name', 'u4', 0), ('st_info', 'u1', 4), ('st_other', 'u1', 5),
+         ('st_shndx', 'u2', 6), ('st_value', 'u8', 8), ('st_size', 'u8', 16)),
+}
+
+
+def sym_dtype(elffile, entsize):
+    byteorder = '<' if elffile.little_endian else '>'
+    fields = SYM_FIELDS[elffile.elfclass]
+    return numpy.dtype({
+        'names': [name for name, _, _ in fields],
+        'formats': [byteorder + fmt for _, fmt, _ in fields],
+        'offsets': [offset for _, _, offset in fields],
+        'itemsize': entsize,
+    })
+
+
+# the symbols of a symbol table, decoded in one pass over the section
+class Symbols:
+    def __init__(self, *args, **kwargs):
+        elffile = kwargs['elffile']
+        symtab = kwargs['symtab']
+        strtab = kwargs['strtab']
+
+        entsize = symtab['sh_entsize']
+        syms = numpy.frombuffer(symtab.data(), dtype=sym_dtype(elffile, entsize),
+                                count=symtab['sh_size'] // entsize)
+        self.values = syms['st_value'].tolist()
+        self.types = syms['st_info'] & 0xf
+        self.names = self.get_names(syms['st_name'], strtab)
+
+    # names are the nul-terminated strings at st_name in the string table
+    def get_names(self, offsets, strtab):
+        table = bytes(strtab.data())
+        nuls = numpy.flatnonzero(numpy.frombuffer(table, dtype=numpy.uint8) == 0)
+        ends = numpy.searchsorted(nuls, offsets)
+        names = []
+        strings = dict()
+        for offset, end in zip(offsets.tolist(), ends.tolist()):
+            if offset not in strings:
+                if end < len(nuls):
+                    strings[offset] = table[offset:nuls[end]].decode('ascii')
+                else:
+                    # not terminated in the table, read it as elftools does
+                    strings[offset] = strtab.get_string(offset)
+            names.append(strings[offset])
+        return names
+
+    def __len__(self):
+        return len(self.names)
+
+    # (name, value) of the symbols of type ttype, in the order of the table
+    def of_type(self, ttype):
+        for i in numpy.flatnonzero(self.types == ttype).tolist():
+            yield self.names[i], self.values[i]
+
+
+# drops the version of a name, e.g. of memcpy@@GLIBC_2.14
+def strip_version(name):
+    if '@@' in name:
+        name = name[:name.find('@@')]
+    return name
+
+
+# also drops the suffix of a name, e.g. of foo.part.0
+def strip_symbol_name(name):
+    name = strip_version(name)
+    if '.' in name:
+        name = name[:name.find('.')]
+    return name
+
+
+def make_symbols(elffile, symtab_name, strtab_name):
+    symtab = elffile.get_section_by_name(symtab_name)
+    strtab = elffile.get_section_by_name(strtab_name)
+    if symtab is None or strtab is None or not hasattr(symtab, 'iter_symbols'):
+        return None
+    return Symbols(elffile=elffile, symtab=symtab, strtab=strtab)
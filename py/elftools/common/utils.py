@@ -12,6 +12,35 @@ from .py3compat import int2byte
 from ..construct import ConstructError
 
 
+class MemoryViewStream(object):
+    """ A read-only stream over a memoryview (e.g. of an mmap), which reads
+        from the view without copying all of it into a BytesIO.
+    """
+    def __init__(self, view):
+        self.view = view
+        self.pos = 0
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += len(self.view)
+        self.pos = offset
+        return self.pos
+
+    def tell(self):
+        return self.pos
+
+    def read(self, size=-1):
+        start = min(self.pos, len(self.view))
+        if size is None or size < 0:
+            end = len(self.view)
+        else:
+            end = min(start + size, len(self.view))
+        self.pos = max(self.pos, end)
+        return self.view[start:end].tobytes()
+
+
 def bytelist2string(bytelist):
     """ Convert a list of byte values (e.g. [0x10 0x20 0x00]) to a bytes object
         (e.g. b'\x10\x20\x00').
@@ -152,13 +152,13 @@ class CallFrameInfo(object):
             entry_structs.initial_length_field_size())
 
         # At this point self.stream is at the start of the instruction list
-        # for this entry
-        instructions = self._parse_instructions(
-            entry_structs, self.stream.tell(), end_offset)
+        # for this entry. The instructions are only parsed when they are
+        # first used.
+        instructions_offset = self.stream.tell()
 
         if is_CIE:
             self._entry_cache[offset] = CIE(
-                header=header, instructions=instructions, offset=offset,
+                header=header, instructions=None, offset=offset,
                 augmentation_dict=aug_dict,
                 augmentation_bytes=aug_bytes,
                 structs=entry_structs)
@@ -166,11 +166,20 @@ class CallFrameInfo(object):
         else: # FDE
             cie = self._parse_cie_for_fde(offset, header, entry_structs)
             self._entry_cache[offset] = FDE(
-                header=header, instructions=instructions, offset=offset,
+                header=header, instructions=None, offset=offset,
                 augmentation_bytes=aug_bytes,
                 structs=entry_structs, cie=cie)
+        self._entry_cache[offset]._instructions_range = (
+            self, instructions_offset, end_offset)
+        self.stream.seek(end_offset)
         return self._entry_cache[offset]
 
+    def parse_instructions_of(self, entry, offset, end_offset):
+        """ Parse the instructions of an entry, without moving the stream.
+        """
+        with preserve_stream_pos(self.stream):
+            return self._parse_instructions(entry.structs, offset, end_offset)
+
     def _parse_instructions(self, structs, offset, end_offset):
         """ Parse a list of CFI instructions from self.stream, starting with
             the offset and until (not including) end_offset.
@@ -455,13 +464,25 @@ class CFIEntry(object):
             augmentation_dict={}, augmentation_bytes=b'', cie=None):
         self.header = header
         self.structs = structs
-        self.instructions = instructions
+        self._instructions = instructions
+        self._instructions_range = None
         self.offset = offset
         self.cie = cie
         self._decoded_table = None
         self.augmentation_dict = augmentation_dict
         self.augmentation_bytes = augmentation_bytes
 
+    @property
+    def instructions(self):
+        """ The list of CallFrameInstruction of this entry, parsed on first
+            access for entries read from a CallFrameInfo.
+        """
+        if self._instructions is None and self._instructions_range is not None:
+            cfi, offset, end_offset = self._instructions_range
+            self._instructions = cfi.parse_instructions_of(
+                self, offset, end_offset)
+        return self._instructions
+
     def get_decoded(self):
         """ Decode the CFI contained in this entry and return a
             DecodedCallFrameTable object representing it. See the documentation
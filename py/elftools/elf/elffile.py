@@ -7,6 +7,7 @@
 # This code is in the public domain
 #-------------------------------------------------------------------------------
 import io
+import mmap
 import struct
 import zlib
 
@@ -20,7 +21,7 @@ except ImportError:
 
 from ..common.py3compat import BytesIO
 from ..common.exceptions import ELFError
-from ..common.utils import struct_parse, elf_assert
+from ..common.utils import struct_parse, elf_assert, MemoryViewStream
 from .structs import ELFStructs
 from .sections import (
         Section, StringTableSection, SymbolTableSection,
@@ -37,7 +38,8 @@ from ..dwarf.dwarfinfo import DWARFInfo, DebugSectionDescriptor, DwarfConfig
 
 class ELFFile(object):
     """ Creation: the constructor accepts a stream (file-like object) with the
-        contents of an ELF file.
+        contents of an ELF file. If the stream is an mmap, section contents
+        are returned as memoryview slices of it instead of being copied.
 
         Accessible attributes:
 
@@ -64,6 +66,9 @@ class ELFFile(object):
     """
     def __init__(self, stream):
         self.stream = stream
+        self.view = memoryview(stream) if isinstance(stream, mmap.mmap) else None
+        self._views = []
+        self._sections = {}
         self._identify_file()
         self.structs = ELFStructs(
             little_endian=self.little_endian,
@@ -84,12 +89,35 @@ class ELFFile(object):
         """
         return self['e_shnum']
 
+    def get_view(self, offset, size):
+        """ A memoryview of size bytes at offset of an mmap stream, which
+            is released by release_views.
+        """
+        view = self.view[offset:offset + size]
+        self._views.append(view)
+        return view
+
+    def release_views(self):
+        """ Release all memoryviews of an mmap stream, so that the mmap can
+            be closed. Data read from sections in place can no longer be used
+            afterwards, and sections are read again from the stream.
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self.view is not None:
+            self.view.release()
+            self.view = None
+        self._sections = {}
+
     def get_section(self, n):
         """ Get the section at index #n from the file (Section object or a
-            subclass)
+            subclass). Sections are parsed once and then reused.
         """
-        section_header = self._get_section_header(n)
-        return self._make_section(section_header)
+        if n not in self._sections:
+            section_header = self._get_section_header(n)
+            self._sections[n] = self._make_section(section_header)
+        return self._sections[n]
 
     def get_section_by_name(self, name):
         """ Get a section from the file, by name. Return None if no such
@@ -404,13 +432,19 @@ class ELFFile(object):
         """ Read the contents of a DWARF section from the stream and return a
             DebugSectionDescriptor. Apply relocations if asked to.
         """
-        # The section data is read into a new stream, for processing
-        section_stream = BytesIO()
-        section_stream.write(section.data())
-
+        reloc_section = None
         if relocate_dwarf_sections:
             reloc_handler = RelocationHandler(self)
             reloc_section = reloc_handler.find_relocations_for_section(section)
+
+        data = section.data()
+        if reloc_section is None and isinstance(data, memoryview):
+            # Nothing to relocate, read the section in place
+            section_stream = MemoryViewStream(data)
+        else:
+            # The section data is read into a new stream, for processing
+            section_stream = BytesIO()
+            section_stream.write(data)
             if reloc_section is not None:
                 reloc_handler.apply_section_relocations(
                         section_stream, reloc_section)
@@ -71,7 +71,8 @@ class Section(object):
         """ The section data from the file.
 
         Note that data is decompressed if the stored section data is
-        compressed.
+        compressed. If the file is an mmap, uncompressed data is a memoryview
+        of it, see ELFFile.release_views.
         """
         # If this section is compressed, deflate it
         if self.compressed:
@@ -95,6 +96,9 @@ class Section(object):
                     'Decompressed data is {} bytes long, should be {} bytes'
                     ' long'.format(len(result), self._decompressed_size)
                 )
+        elif self.elffile.view is not None:
+            offset = self['sh_offset']
+            result = self.elffile.get_view(offset, self._decompressed_size)
         else:
             self.stream.seek(self['sh_offset'])
             result = self.stream.read(self._decompressed_size)
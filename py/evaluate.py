@@ -4,6 +4,7 @@ import argparse
 import pickle
 import subprocess
 from common.config import Config
+from common.features import HashVectorizer
 from common.timer import TIMER
 from binary import Binary
 
@@ -19,6 +20,12 @@ def get_args():
                         help='Path of the debugging info.')
     parser.add_argument('--bap', dest='bap', type=str, default='',
                         help='path of cached BAP-IR file.')
+    parser.add_argument('--bap_cache', dest='bap_cache', type=str, default='',
+                        help='directory of the content-addressed BAP-IR cache.')
+    parser.add_argument('--bap_format', dest='bap_format', type=str, default='json', choices=['json', 'ndjson'],
+                        help='output format of the loc plugin when lifting, ndjson needs a plugin built from ocaml/loc.ml.')
+    parser.add_argument('--label_cache', dest='label_cache', type=str, default='',
+                        help='directory of the cache of ground truth labels taken from debug information.')
 
     parser.add_argument('-two_pass', dest='two_pass', action='store_true', default=False,
                         help='whether to use two passes (variable classification and structured prediction). Setting it to false only will only invoke structured prediction.')
@@ -37,7 +44,7 @@ def get_args():
     return args
 
 
-def evaluate_binary(binary, bap, debug_info, n2p_url, stat, two_pass, fp_model, output='', elf_modify=''):
+def evaluate_binary(binary, bap, debug_info, n2p_url, stat, two_pass, fp_model, output='', elf_modify='', bap_cache='', label_cache='', bap_format='json'):
     
     if os.path.isfile(stat):
         return
@@ -49,6 +56,9 @@ def evaluate_binary(binary, bap, debug_info, n2p_url, stat, two_pass, fp_model,
     config.BINARY_PATH = binary
     config.BINARY_NAME = binary
     config.BAP_FILE_PATH = bap
+    config.BAP_CACHE_DIR = bap_cache
+    config.BAP_FORMAT = bap_format
+    config.LABEL_CACHE_DIR = label_cache
     config.DEBUG_INFO_PATH = debug_info
 
     config.N2P_SERVER_URL = n2p_url
@@ -82,6 +92,10 @@ def evaluate_binary(binary, bap, debug_info, n2p_url, stat, two_pass, fp_model,
         config.OFF_MODEL = pickle.load(off_model, encoding='latin1')
         config.OFF_MODEL.n_jobs = 1
 
+        # the features of the binary are extracted the way the models were trained on
+        if isinstance(config.REG_DICT, HashVectorizer):
+            config.FEATURE_HASH_BITS = config.REG_DICT.bits
+
     with open(config.BINARY_PATH, 'rb') as elffile, open(config.DEBUG_INFO_PATH, 'rb') as debug_elffile:
         TIMER.start_scope('0ALL')
         b = Binary(config, elffile, debug_elffile)
@@ -90,6 +104,7 @@ def evaluate_binary(binary, bap, debug_info, n2p_url, stat, two_pass, fp_model,
         TIMER.end_scope()
         TIMER.end_scope()
         b.dump_stat()
+        b.close()
 
     if config.TWO_PASS:
         reg_dict.close()
@@ -103,4 +118,5 @@ def evaluate_binary(binary, bap, debug_info, n2p_url, stat, two_pass, fp_model,
 if __name__ == '__main__':
     args = get_args()
     evaluate_binary(args.binary, args.bap, args.debug_info, args.n2p_url,
-                    args.stat, args.two_pass, args.fp_model, args.output, args.elf_modifier)
+                    args.stat, args.two_pass, args.fp_model, args.output, args.elf_modifier,
+                    args.bap_cache, args.label_cache, args.bap_format)
@@ -19,6 +19,12 @@ def get_args():
                         help='Directory of binaries with debug symbols')
     parser.add_argument('--bap', dest='bap', type=str, default='',
                         help='path of cached BAP-IR file.')
+    parser.add_argument('--bap_cache', dest='bap_cache', type=str, default='',
+                        help='directory of the content-addressed BAP-IR cache.')
+    parser.add_argument('--bap_format', dest='bap_format', type=str, default='json', choices=['json', 'ndjson'],
+                        help='output format of the loc plugin when lifting, ndjson needs a plugin built from ocaml/loc.ml.')
+    parser.add_argument('--label_cache', dest='label_cache', type=str, default='',
+                        help='directory of the cache of ground truth labels taken from debug information.')
     parser.add_argument('-two_pass', dest='two_pass', action='store_true', default=False,
                         help='whether to use two passes (variable classification and structured prediction). Setting it to false only will only invoke structured prediction.')
     parser.add_argument('--classifier', type=str, required=True,
@@ -31,11 +37,12 @@ def get_args():
     return parser.parse_args()
 
 
-def run_eval(binary, bap, debug_info, n2p_url, stat, two_pass, fp_model):
+def run_eval(binary, bap, debug_info, n2p_url, stat, two_pass, fp_model, bap_cache='', label_cache='', bap_format='json'):
     if not os.path.isfile(stat):
         print('not file ' + stat)
         evaluate_binary(binary, bap, debug_info, n2p_url,
-                        stat, two_pass, fp_model)
+                        stat, two_pass, fp_model, bap_cache=bap_cache, label_cache=label_cache,
+                        bap_format=bap_format)
         print('evaluated binary {}, loading results...'.format(binary))
 
     with open(stat) as f:
@@ -52,7 +59,7 @@ def main():
         arguments = [(os.path.join(args.bin_dir, bin), args.bap,
                       os.path.join(args.debug_dir, bin), args.n2p_url,
                       os.path.join(args.log_dir, bin + '.json'),
-                      args.two_pass, args.classifier) for bin in binaries]
+                      args.two_pass, args.classifier, args.bap_cache, args.label_cache, args.bap_format) for bin in binaries]
         results = [x for x in pool.starmap(run_eval, arguments) if x]
 
     name = [n for n in sorted(os.listdir(os.path.dirname(args.log_dir)))][-1]
@@ -0,0 +1,119 @@
+import os
+import json
+import argparse
+import traceback
+import multiprocessing
+
+from common.config import Config
+from common.utils import write_file
+from common.shards import SHARD_SUFFIX, write_shard
+from binary import Binary
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Debin to hack binaries. '
+                                     'This script analyzes each binary of a list once and writes both its features '
+                                     'for the variable classification (train_variable.py --feature_dir) and its '
+                                     'dependency graph with ground truth for Nice2Predict (train_crf.py --log_dir).')
+
+    parser.add_argument('--bin_list', dest='bin_list', type=str, required=True,
+                        help='list of binaries to analyze.')
+    parser.add_argument('--bin_dir', dest='bin_dir', type=str, required=True,
+                        help='directory of the stripped binaries.')
+    parser.add_argument('--debug_dir', dest='debug_dir', type=str, required=True,
+                        help='directory of debug information files.')
+    parser.add_argument('--bap_dir', dest='bap_dir', type=str, default='',
+                        help='directory of cached BAP-IR files.')
+    parser.add_argument('--bap_cache', dest='bap_cache', type=str, default='',
+                        help='directory of the content-addressed BAP-IR cache.')
+    parser.add_argument('--bap_format', dest='bap_format', type=str, default='json', choices=['json', 'ndjson'],
+                        help='output format of the loc plugin when lifting, ndjson needs a plugin built from ocaml/loc.ml.')
+    parser.add_argument('--label_cache', dest='label_cache', type=str, default='',
+                        help='directory of the cache of ground truth labels taken from debug information.')
+    parser.add_argument('--feature_dir', dest='feature_dir', type=str, required=True,
+                        help='directory of the output features, one file per binary.')
+    parser.add_argument('--graph_dir', dest='graph_dir', type=str, required=True,
+                        help='directory of the output graphs, one file per binary.')
+    parser.add_argument('-fused_pipeline', dest='fused_pipeline', action='store_true', default=False,
+                        help='whether to extract features and dependency elements of a statement in one traversal. The output is the same as without it.')
+    parser.add_argument('-stream_debug_info', dest='stream_debug_info', action='store_true', default=False,
+                        help='whether to read the debugging info one compilation unit at a time, so its memory does not grow with the size of the debugging info. The output is the same as without it.')
+    parser.add_argument('--feature_hash_bits', dest='feature_hash_bits', type=int, default=0,
+                        help='number of bits the features of the variables are hashed to, 0 to keep them as strings.')
+    parser.add_argument('--workers', dest='workers', type=int, default=1,
+                        help='number of workers (i.e., parallization).')
+
+    args = parser.parse_args()
+    return args
+
+
+# the feature shard of a binary, see common/shards.py
+def feature_path(feature_dir, b):
+    return os.path.join(feature_dir, b + SHARD_SUFFIX)
+
+
+def write_graph(path, graph):
+    # the same content as Binary.dump_graph
+    write_file(path, lambda f: f.write((json.dumps(graph) + '\n').encode('utf-8')))
+
+
+def extract(b, bin_dir, debug_dir, bap_dir, bap_cache, label_cache, feature_dir, graph_dir,
+            fused_pipeline=False, stream_debug_info=False, feature_hash_bits=0, bap_format='json'):
+    features_path = feature_path(feature_dir, b)
+    graph_path = os.path.join(graph_dir, b)
+    if os.path.isfile(features_path) and os.path.isfile(graph_path):
+        return b, 'cached'
+
+    try:
+        config = Config()
+        config.MODE = config.TRAIN
+        config.BINARY_NAME = b
+        config.BINARY_PATH = os.path.join(bin_dir, b)
+        config.DEBUG_INFO_PATH = os.path.join(debug_dir, b)
+        if bap_dir != '':
+            config.BAP_FILE_PATH = os.path.join(bap_dir, b)
+        config.BAP_CACHE_DIR = bap_cache
+        config.BAP_FORMAT = bap_format
+        config.LABEL_CACHE_DIR = label_cache
+        config.FUSED_PIPELINE = fused_pipeline
+        config.STREAM_DEBUG_INFO = stream_debug_info
+        config.FEATURE_HASH_BITS = feature_hash_bits
+
+        with open(config.BINARY_PATH, 'rb') as elffile, open(config.DEBUG_INFO_PATH, 'rb') as debug_elffile:
+            binary = Binary(config, elffile, debug_elffile)
+            try:
+                features = binary.get_features()
+                graph = binary.to_json()
+            finally:
+                binary.close()
+
+        write_graph(graph_path, graph)
+        write_shard(features_path, features, feature_hash_bits)
+        return b, 'extracted'
+    except Exception:
+        traceback.print_exc()
+        return b, 'failed'
+
+
+def extract_task(task):
+    return extract(*task)
+
+
+def main():
+    args = get_args()
+
+    with open(args.bin_list) as f:
+        bins = list(map(lambda l: l.strip('\r\n'), f.readlines()))
+
+    tasks = [(b, args.bin_dir, args.debug_dir, args.bap_dir, args.bap_cache, args.label_cache,
+              args.feature_dir, args.graph_dir, args.fused_pipeline, args.stream_debug_info, args.feature_hash_bits,
+              args.bap_format)
+             for b in bins]
+
+    with multiprocessing.Pool(args.workers) as pool:
+        for i, (b, status) in enumerate(pool.imap_unordered(extract_task, tasks)):
+            print('[{}/{}] {} {}'.format(i + 1, len(bins), status, b))
+
+
+if __name__ == '__main__':
+    main()
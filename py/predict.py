@@ -4,6 +4,7 @@ import argparse
 import pickle
 import subprocess
 from common.config import Config
+from common.features import HashVectorizer
 from binary import Binary
 
 
@@ -17,11 +18,17 @@ def get_args():
                         help='path of output binary.')
     parser.add_argument('--bap', dest='bap', type=str, default='',
                         help='path of cached BAP-IR file.')
+    parser.add_argument('--bap_cache', dest='bap_cache', type=str, default='',
+                        help='directory of the content-addressed BAP-IR cache.')
+    parser.add_argument('--bap_format', dest='bap_format', type=str, default='json', choices=['json', 'ndjson'],
+                        help='output format of the loc plugin when lifting, ndjson needs a plugin built from ocaml/loc.ml.')
     parser.add_argument('--elf_modifier', dest='elf_modifier', type=str, default='', required=True,
                         help='path of the library for modifying ELF binaries.')
 
     parser.add_argument('-two_pass', dest='two_pass', action='store_true', default=False,
                         help='whether to use two passes (variable classification and structured prediction). Setting it to false only will only invoke structured prediction.')
+    parser.add_argument('-fused_pipeline', dest='fused_pipeline', action='store_true', default=False,
+                        help='whether to extract features and dependency elements of a statement in one traversal. The output is the same as without it.')
     parser.add_argument('--fp_model', dest='fp_model', type=str, default='',
                         help='Path of the models for the first pass (variable classification).')
 
@@ -44,9 +51,12 @@ def main():
     config.BINARY_NAME = args.binary
     config.OUTPUT_BINARY_PATH = args.output
     config.BAP_FILE_PATH = args.bap
+    config.BAP_CACHE_DIR = args.bap_cache
+    config.BAP_FORMAT = args.bap_format
     config.MODIFY_ELF_LIB_PATH = args.elf_modifier
 
     config.TWO_PASS = args.two_pass
+    config.FUSED_PIPELINE = args.fused_pipeline
     config.FP_MODEL_PATH = args.fp_model
     if config.TWO_PASS:
         reg_dict = open(os.path.join(config.FP_MODEL_PATH, 'reg.dict'), 'rb')
@@ -67,12 +77,17 @@ def main():
         config.OFF_MODEL = pickle.load(off_model, encoding='latin1')
         config.OFF_MODEL.n_jobs = 1
 
+        # the features of the binary are extracted the way the models were trained on
+        if isinstance(config.REG_DICT, HashVectorizer):
+            config.FEATURE_HASH_BITS = config.REG_DICT.bits
+
     config.N2P_SERVER_URL = args.n2p_url
 
     with open(config.BINARY_PATH, 'rb') as elffile:
         b = Binary(config, elffile)
         b.set_test_result_from_server()
         b.modify_elf()
+        b.close()
 
     if config.TWO_PASS:
         reg_dict.close()
@@ -0,0 +1,166 @@
+import os
+import shutil
+import argparse
+import tempfile
+import traceback
+import multiprocessing.dummy
+
+from elftools.elf.elffile import ELFFile
+
+from common.constants import SYMTAB
+from bap.cache import BapCache, DEFAULT_CACHE_SIZE
+from bap.compact import write_records
+from bap.lifter import bap_flags, iter_ir, lift, lift_to_file, run_bap_batch
+from common.utils import write_file
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Debin to hack binaries. '
+                                     'This script lifts a list of binaries ahead of time into the BAP-IR cache '
+                                     'or a directory of BAP-IR files, so that later training and evaluation runs '
+                                     'do not lift them again.')
+
+    parser.add_argument('--bin_list', dest='bin_list', type=str, required=True,
+                        help='list of binaries to lift.')
+    parser.add_argument('--bin_dir', dest='bin_dir', type=str, required=True,
+                        help='directory of the stripped binaries.')
+    parser.add_argument('--bap_cache', dest='bap_cache', type=str, default='',
+                        help='directory of the BAP-IR cache.')
+    parser.add_argument('--bap_cache_size', dest='bap_cache_size', type=int, default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+                        help='size limit of the BAP-IR cache in MB.')
+    parser.add_argument('--bap_dir', dest='bap_dir', type=str, default='',
+                        help='directory to write one compact BAP-IR file per binary to, instead of the cache.')
+    parser.add_argument('--byteweight_sigs', dest='byteweight_sigs', type=str, default='',
+                        help='path of the byteweight signatures used by BAP.')
+    parser.add_argument('--bap_format', dest='bap_format', type=str, default='json', choices=['json', 'ndjson'],
+                        help='output format of the loc plugin, ndjson needs a plugin built from ocaml/loc.ml.')
+    parser.add_argument('--batch_size', dest='batch_size', type=int, default=1,
+                        help='number of binaries lifted by one BAP process, more than one needs a plugin built from ocaml/loc.ml.')
+    parser.add_argument('--workers', dest='workers', type=int, default=1,
+                        help='number of BAP processes to run at the same time.')
+
+    args = parser.parse_args()
+    if (args.bap_cache == '') == (args.bap_dir == ''):
+        parser.error('exactly one of --bap_cache and --bap_dir is required.')
+    return args
+
+
+def has_symtab(path):
+    with open(path, 'rb') as f:
+        return ELFFile(f).get_section_by_name(SYMTAB) is not None
+
+
+def prewarm(b, bin_dir, cache, byteweight_sigs, bap_format):
+    path = os.path.join(bin_dir, b)
+    try:
+        flags = bap_flags(has_symtab(path), byteweight_sigs)
+        key = cache.key(path, flags)
+        if cache.has(key):
+            return [(b, 'cached')]
+        lift(path, flags, cache, bap_format, key)
+        return [(b, 'lifted')]
+    except Exception:
+        traceback.print_exc()
+        return [(b, 'failed')]
+
+
+def prewarm_batch(batch, bin_dir, cache, bap_dir, flags, bap_format):
+    # a batch of one is lifted without --loc-batch, so it works with any loc plugin
+    if len(batch) == 1:
+        b = batch[0]
+        path = os.path.join(bin_dir, b)
+        try:
+            if cache is not None:
+                lift(path, flags, cache, bap_format)
+            else:
+                write_file(os.path.join(bap_dir, b), lambda f: lift_to_file(path, flags, f, bap_format))
+            return [(b, 'lifted')]
+        except Exception:
+            traceback.print_exc()
+            return [(b, 'failed')]
+
+    # the loc plugin writes json, so results are first written next to where
+    # they are stored in the compact format
+    work_dir = tempfile.mkdtemp(dir=cache.cache_dir if cache is not None else bap_dir)
+    try:
+        entries = [(os.path.join(bin_dir, b), os.path.join(work_dir, str(i))) for i, b in enumerate(batch)]
+        failed = set(run_bap_batch(entries, flags, bap_format))
+
+        results = []
+        for b, (path, output) in zip(batch, entries):
+            if path in failed:
+                results.append((b, 'failed'))
+                continue
+            with open(output) as f:
+                if cache is not None:
+                    cache.put_records(cache.key(path, flags), iter_ir(f))
+                else:
+                    write_file(os.path.join(bap_dir, b), lambda out: write_records(iter_ir(f), out))
+            results.append((b, 'lifted'))
+        return results
+    except Exception:
+        traceback.print_exc()
+        return [(b, 'failed') for b in batch]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def make_batches(bins, args, cache):
+    # binaries in one bap process have to share its flags
+    groups = dict()
+    done = []
+    for b in bins:
+        path = os.path.join(args.bin_dir, b)
+        try:
+            flags = bap_flags(has_symtab(path), args.byteweight_sigs)
+        except Exception:
+            traceback.print_exc()
+            done.append((b, 'failed'))
+            continue
+        if cache is not None and cache.has(cache.key(path, flags)) \
+                or cache is None and os.path.isfile(os.path.join(args.bap_dir, b)):
+            done.append((b, 'cached'))
+            continue
+        groups.setdefault(tuple(flags), []).append(b)
+
+    batches = []
+    for flags, group in groups.items():
+        for i in range(0, len(group), args.batch_size):
+            batches.append((group[i:i + args.batch_size], list(flags)))
+    return batches, done
+
+
+def main():
+    args = get_args()
+
+    with open(args.bin_list) as f:
+        bins = list(map(lambda l: l.strip('\r\n'), f.readlines()))
+
+    cache = None
+    if args.bap_cache != '':
+        cache = BapCache(cache_dir=args.bap_cache, max_size=args.bap_cache_size * 1024 * 1024)
+    else:
+        os.makedirs(args.bap_dir, exist_ok=True)
+
+    if cache is not None and args.batch_size == 1:
+        done = []
+        tasks = [(prewarm, (b, args.bin_dir, cache, args.byteweight_sigs, args.bap_format)) for b in bins]
+    else:
+        batches, done = make_batches(bins, args, cache)
+        tasks = [(prewarm_batch, (batch, args.bin_dir, cache, args.bap_dir, flags, args.bap_format))
+                 for batch, flags in batches]
+
+    for i, (b, status) in enumerate(done):
+        print('[{}/{}] {} {}'.format(i + 1, len(bins), status, b))
+
+    # each task mostly waits on its bap subprocess, so threads are enough to bound the pool
+    i = len(done)
+    with multiprocessing.dummy.Pool(args.workers) as pool:
+        for results in pool.imap_unordered(lambda t: t[0](*t[1]), tasks):
+            for b, status in results:
+                i += 1
+                print('[{}/{}] {} {}'.format(i, len(bins), status, b))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import io
+import struct
+import unittest
+
+from elftools.dwarf.dwarfinfo import DWARFInfo, DebugSectionDescriptor, DwarfConfig
+
+from elfs.dies import DIE_ATTRS, DieDecoder
+
+
+def uleb128(n):
+    out = bytearray()
+    while True:
+        b = n & 0x7f
+        n >>= 7
+        if n == 0:
+            out.append(b)
+            return bytes(out)
+        out.append(b | 0x80)
+
+
+def sleb128(n):
+    out = bytearray()
+    while True:
+        b = n & 0x7f
+        n >>= 7
+        if n == 0 and not b & 0x40 or n == -1 and b & 0x40:
+            out.append(b)
+            return bytes(out)
+        out.append(b | 0x80)
+
+
+def section(name, data):
+    return DebugSectionDescriptor(stream=io.BytesIO(data), name=name, global_offset=0, size=len(data), address=0)
+
+
+# one compile unit with a subrange type whose attributes are of the forms
+# DW_FORM_flag_present, DW_FORM_udata and DW_FORM_sdata, both read by debin and
+# skipped, followed by a string that is only found if they are skipped right
+def make_dwarf_info():
+    abbrev = b''.join([
+        uleb128(1), uleb128(0x11), b'\x01',  # DW_TAG_compile_unit, children
+        uleb128(0x03), uleb128(0x08),  # DW_AT_name, DW_FORM_string
+        b'\x00\x00',
+        uleb128(2), uleb128(0x21), b'\x00',  # DW_TAG_subrange_type, no children
+        uleb128(0x3f), uleb128(0x19),  # DW_AT_external, DW_FORM_flag_present
+        uleb128(0x0d), uleb128(0x0f),  # DW_AT_bit_size, DW_FORM_udata
+        uleb128(0x22), uleb128(0x0d),  # DW_AT_lower_bound, DW_FORM_sdata
+        uleb128(0x0b), uleb128(0x0f),  # DW_AT_byte_size, DW_FORM_udata
+        uleb128(0x2f), uleb128(0x0d),  # DW_AT_upper_bound, DW_FORM_sdata
+        uleb128(0x38), uleb128(0x19),  # DW_AT_data_member_location, DW_FORM_flag_present
+        uleb128(0x03), uleb128(0x08),  # DW_AT_name, DW_FORM_string
+        b'\x00\x00',
+        b'\x00',
+    ])
+    dies = b''.join([
+        uleb128(1), b'unit.c\x00',
+        uleb128(2), uleb128(70000), sleb128(-300), uleb128(129), sleb128(-70000), b'range\x00',
+        uleb128(2), uleb128(0), sleb128(63), uleb128(127), sleb128(64), b'\x00',
+        b'\x00',
+    ])
+    # version 4 header of a 32-bit unit with 8-byte addresses
+    header = struct.pack('<HIB', 4, 0, 8)
+    info = struct.pack('<I', len(header) + len(dies)) + header + dies
+
+    return DWARFInfo(config=DwarfConfig(little_endian=True, machine_arch='x64', default_address_size=8),
+                     debug_info_sec=section('.debug_info', info),
+                     debug_aranges_sec=None,
+                     debug_abbrev_sec=section('.debug_abbrev', abbrev),
+                     debug_frame_sec=None,
+                     eh_frame_sec=None,
+                     debug_str_sec=None,
+                     debug_loc_sec=None,
+                     debug_ranges_sec=None,
+                     debug_line_sec=None)
+
+
+class DieDecoderTest(unittest.TestCase):
+    def setUp(self):
+        self.dwarf_info = make_dwarf_info()
+        self.units = list(DieDecoder(dwarf_info=self.dwarf_info).iter_CUs())
+        self.cus = list(self.dwarf_info.iter_CUs())
+
+    def test_dies(self):
+        self.assertEqual(len(self.units), len(self.cus))
+        for unit, cu in zip(self.units, self.cus):
+            dies = [(die.offset, die.size, die.tag) for die in unit.iter_DIEs()]
+            expected = [(die.offset, die.size, die.tag) for die in cu.iter_DIEs()]
+            self.assertEqual(dies, expected)
+
+    def test_attributes(self):
+        checked = 0
+        for unit, cu in zip(self.units, self.cus):
+            for die, expected in zip(unit.iter_DIEs(), cu.iter_DIEs()):
+                for name, attr in expected.attributes.items():
+                    self.assertEqual(unit.decode(name, attr.form, attr.offset), attr)
+                    if name in DIE_ATTRS:
+                        self.assertEqual(die.attributes.get(name), attr)
+                        checked += 1
+                    else:
+                        self.assertNotIn(name, die.attributes)
+        self.assertGreater(checked, 0)
+
+    def test_forms(self):
+        subranges = [die for die in self.cus[0].iter_DIEs() if die.tag == 'DW_TAG_subrange_type']
+        attributes = self.units[0].get_die(subranges[0].offset).attributes
+        self.assertEqual(attributes.get('DW_AT_byte_size').value, 129)
+        self.assertEqual(attributes.get('DW_AT_upper_bound').value, -70000)
+        self.assertEqual(attributes.get('DW_AT_data_member_location').form, 'DW_FORM_flag_present')
+        self.assertEqual(attributes.get('DW_AT_name').value, b'range')
+
+
+if __name__ == '__main__':
+    unittest.main()
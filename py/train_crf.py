@@ -15,6 +15,12 @@ def get_args():
                         help='directory of debug information files.')
     parser.add_argument('--bap_dir', dest='bap_dir', type=str, default='',
                         help='directory of cached BAP-IR files.')
+    parser.add_argument('--bap_cache', dest='bap_cache', type=str, default='',
+                        help='directory of the content-addressed BAP-IR cache.')
+    parser.add_argument('--bap_format', dest='bap_format', type=str, default='json', choices=['json', 'ndjson'],
+                        help='output format of the loc plugin when lifting, ndjson needs a plugin built from ocaml/loc.ml.')
+    parser.add_argument('--label_cache', dest='label_cache', type=str, default='',
+                        help='directory of the cache of ground truth labels taken from debug information.')
     parser.add_argument('--workers', dest='workers', type=int, default=1,
                         help='number of workers (i.e., parallization).')
     parser.add_argument('--out_model', dest='out_model', type=str, required=True,
@@ -59,6 +65,11 @@ def main():
             os.path.join(args.bap_dir, '%'),
             os.path.join(args.log_dir, '%')
         )
+    if args.bap_cache != '':
+        cmd += ' --bap_cache {}'.format(args.bap_cache)
+    if args.label_cache != '':
+        cmd += ' --label_cache {}'.format(args.label_cache)
+    cmd += ' --bap_format {}'.format(args.bap_format)
     subprocess.call(cmd, shell=True)
 
     cmd = 'cat {} | xargs -I % sh -c \'cat {}\' > {}'.format(
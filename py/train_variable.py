@@ -3,16 +3,19 @@ import pickle
 import random
 import argparse
 import multiprocessing
-import gzip
-import traceback
 
+import numpy
+import scipy.sparse
 from sklearn.feature_extraction import DictVectorizer
 from sklearn.utils import shuffle
 from sklearn.ensemble import ExtraTreesClassifier
 from sklearn.feature_selection import SelectKBest, chi2
 
 from common.config import Config
+from common.features import HashVectorizer
+from common.shards import Vocabulary, load_samples, write_shard
 from binary import Binary
+from extract_train_data import feature_path
 
 
 def get_args():
@@ -28,6 +31,20 @@ def get_args():
                         help='directory of debug information files.')
     parser.add_argument('--bap_dir', dest='bap_dir', type=str, default='',
                         help='directory of cached BAP-IR files.')
+    parser.add_argument('--bap_cache', dest='bap_cache', type=str, default='',
+                        help='directory of the content-addressed BAP-IR cache.')
+    parser.add_argument('--bap_format', dest='bap_format', type=str, default='json', choices=['json', 'ndjson'],
+                        help='output format of the loc plugin when lifting, ndjson needs a plugin built from ocaml/loc.ml.')
+    parser.add_argument('--label_cache', dest='label_cache', type=str, default='',
+                        help='directory of the cache of ground truth labels taken from debug information.')
+    parser.add_argument('--feature_dir', dest='feature_dir', type=str, default='',
+                        help='directory of features written by extract_train_data.py, binaries without them are analyzed.')
+    parser.add_argument('--feature_hash_bits', dest='feature_hash_bits', type=int, default=0,
+                        help='number of bits the features of the variables are hashed to, 0 to keep them as strings.')
+    parser.add_argument('-fused_pipeline', dest='fused_pipeline', action='store_true', default=False,
+                        help='whether to extract features and dependency elements of a statement in one traversal. The output is the same as without it.')
+    parser.add_argument('-stream_debug_info', dest='stream_debug_info', action='store_true', default=False,
+                        help='whether to read the debugging info one compilation unit at a time, so its memory does not grow with the size of the debugging info. The output is the same as without it.')
     parser.add_argument('--workers', dest='workers', type=int, default=1,
                         help='number of workers (i.e., parallization).')
     parser.add_argument('--out_model', dest='out_model', type=str, required=True,
@@ -51,7 +68,8 @@ def get_args():
     return args
 
 
-def generate_feature(b, bin_dir, debug_dir, bap_dir):
+def generate_feature(b, bin_dir, debug_dir, bap_dir, bap_cache='', label_cache='', feature_hash_bits=0, bap_format='json',
+                     fused_pipeline=False, stream_debug_info=False):
     try:
         config = Config()
         config.BINARY_NAME = b
@@ -59,54 +77,64 @@ def generate_feature(b, bin_dir, debug_dir, bap_dir):
         config.DEBUG_INFO_PATH = os.path.join(debug_dir, b)
         if bap_dir != '':
             config.BAP_FILE_PATH = os.path.join(bap_dir, b)
+        config.BAP_CACHE_DIR = bap_cache
+        config.BAP_FORMAT = bap_format
+        config.LABEL_CACHE_DIR = label_cache
+        config.FEATURE_HASH_BITS = feature_hash_bits
+        config.FUSED_PIPELINE = fused_pipeline
+        config.STREAM_DEBUG_INFO = stream_debug_info
         with open(config.BINARY_PATH, 'rb') as elffile, open(config.DEBUG_INFO_PATH, 'rb') as debug_elffile:
             b = Binary(config, elffile, debug_elffile)
-            return b.get_features()
+            try:
+                return b.get_features()
+            finally:
+                b.close()
     except Exception as e:
-        print('Exception in binary anaylsis: ' + e)
+        print('Exception in binary anaylsis: {}'.format(e))
         return [], [], [], []
 
 
-def train(X_raw, Y_raw, num_p, num_n, num_f, n_estimators, n_jobs, name, output_dir):
-    X, Y = [], []
-    i_p, i_n = 0, 0
+# the features are written by the worker, so they are not sent back to the parent
+def checkpoint_feature(task):
+    b, path, feature_hash_bits, arguments = task
+    write_shard(path, generate_feature(*arguments), feature_hash_bits)
+    return b
 
-    for x, y in zip(X_raw, Y_raw):
-        if i_p < num_p or i_n < num_n:
-            if (y == 1 and i_p < num_p) or (y == 0 and i_n < num_n):
-                if y == 1:
-                    i_p += 1
-                else:
-                    i_n += 1
-
-                x = dict(map(lambda item: (item, 1), x))
-                X.append(x)
-                Y.append(y)
-        else:
-            break
 
+# X is a CSR matrix over the ids of terms. the columns of the samples are put
+# in the order of their names, which is the order DictVectorizer.fit gives them,
+# so the pickled DictVectorizer maps the features at prediction the same way.
+# hashed features are already the columns of X, and a HashVectorizer maps them.
+def train(X, Y, terms, hash_bits, num_f, n_estimators, n_jobs, name, output_dir):
     X, Y = shuffle(X, Y)
 
     dict_path = os.path.join(output_dir, '{}.dict'.format(name))
     support_path = os.path.join(output_dir, '{}.support'.format(name))
     model_path = os.path.join(output_dir, '{}.model'.format(name))
 
-    dict_vec = DictVectorizer(sparse=True)
-    print('fitting DictVectorizer')
-    dict_vec = dict_vec.fit(X)
+    if hash_bits > 0:
+        dict_vec = HashVectorizer(bits=hash_bits)
+    else:
+        print('fitting DictVectorizer')
+        used = sorted(numpy.unique(X.indices).tolist(), key=lambda i: terms[i])
+        columns = numpy.zeros(len(terms), dtype=numpy.int64)
+        columns[used] = numpy.arange(len(used))
+        X = scipy.sparse.csr_matrix((X.data, columns[X.indices], X.indptr), shape=(X.shape[0], len(used)))
+        X.sort_indices()
+
+        dict_vec = DictVectorizer(sparse=True)
+        dict_vec.feature_names_ = [terms[i] for i in used]
+        dict_vec.vocabulary_ = dict((term, i) for i, term in enumerate(dict_vec.feature_names_))
     with open(dict_path, 'wb') as dict_file:
         pickle.dump(dict_vec, dict_file)
 
-    X_dict = X
-    X = dict_vec.transform(X)
-
     print('fitting SelectKBest')
     support = SelectKBest(chi2, k=num_f).fit(X, Y)
     with open(support_path, 'wb') as support_file:
         pickle.dump(support, support_file)
 
     dict_vec.restrict(support.get_support())
-    X = dict_vec.transform(X_dict)
+    X = X[:, support.get_support()]
 
     model = ExtraTreesClassifier(n_estimators=n_estimators, n_jobs=n_jobs)
     print('fitting ExtraTreesClassifier')
@@ -117,34 +145,45 @@ def train(X_raw, Y_raw, num_p, num_n, num_f, n_estimators, n_jobs, name, output_
     print('done training {}'.format(name))
 
 
-def block_process(bins, args):
-    block_size = args.workers // 2
-    blocks = [bins[i: i + block_size] for i in range(0, len(bins), block_size)]
-
-    def block_path(i): return os.path.join(args.out_model, '{}.block'.format(i))
-
-    for i, block in enumerate(blocks):
-        path = block_path(i)
-        if os.path.isfile(path):
-            print('skipping bap analysis for {}'.format(path))
-            continue
-
-        with multiprocessing.Pool(args.workers // 2) as pool:
-            arguments = [(b, args.bin_dir, args.debug_dir, args.bap_dir)
-                         for b in block]
-            results = pool.starmap(generate_feature, arguments)
-        print('writing block {} to {}'.format(i, path))
-        with gzip.open(path, 'wb') as f:
-            pickle.dump(results, f)
-
-    results = []
-    for i, _ in enumerate(blocks):
-        path = block_path(i)
-        print('reading block {}'.format(path))
-        with gzip.open(path, 'rb') as f:
-            results = results + pickle.load(f)
-    print('ran bap for {} binaries'.format(len(results)))
-    return results
+# the features of each binary are checkpointed as soon as it is analyzed, and
+# listed in a manifest once written. a restarted run only analyzes binaries
+# that are not in the manifest.
+def process_bins(bins, args):
+    checkpoint_dir = os.path.join(args.out_model, 'checkpoints')
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    manifest_path = os.path.join(checkpoint_dir, 'manifest')
+
+    paths = dict()
+    done = set()
+    for b in bins:
+        if args.feature_dir != '' and os.path.isfile(feature_path(args.feature_dir, b)):
+            paths[b] = feature_path(args.feature_dir, b)
+            done.add(b)
+        else:
+            paths[b] = feature_path(checkpoint_dir, b)
+
+    if os.path.isfile(manifest_path):
+        with open(manifest_path) as f:
+            for line in f:
+                b = line.rstrip('\n')
+                if b in paths and os.path.isfile(paths[b]):
+                    done.add(b)
+
+    todo = [b for b in sorted(set(bins)) if b not in done]
+    print('{} binaries done, {} to analyze'.format(len(paths) - len(todo), len(todo)))
+    if len(todo) > 0:
+        tasks = [(b, paths[b], args.feature_hash_bits, (b, args.bin_dir, args.debug_dir, args.bap_dir, args.bap_cache, args.label_cache,
+                                                      args.feature_hash_bits, args.bap_format,
+                                                      args.fused_pipeline, args.stream_debug_info))
+                 for b in todo]
+        with multiprocessing.Pool(max(1, args.workers // 2)) as pool, open(manifest_path, 'a') as manifest:
+            for i, b in enumerate(pool.imap_unordered(checkpoint_feature, tasks)):
+                manifest.write(b + '\n')
+                manifest.flush()
+                print('[{}/{}] analyzed {}'.format(i + 1, len(todo), b))
+
+    print('ran bap for {} binaries'.format(len(bins)))
+    return [paths[b] for b in bins]
 
 
 def main():
@@ -158,23 +197,23 @@ def main():
     #     for b in bins:
     #         arguments.append((b, args.bin_dir, args.debug_dir, args.bap_dir))
     #     results = pool.starmap(generate_feature, arguments)
-    results = block_process(bins, args)
-    random.shuffle(results)
-
-    flatten = lambda l: [item for sublist in l for item in sublist]
-
-    reg_x, reg_y, off_x, off_y = zip(*results)
-    reg_x = flatten(reg_x)
-    reg_y = bytearray(flatten(reg_y))
-    off_x = flatten(off_x)
-    off_y = bytearray(flatten(off_y))
+    paths = process_bins(bins, args)
+    random.shuffle(paths)
 
     if not os.path.exists(args.out_model):
         os.makedirs(args.out_model)
 
-    train(reg_x, reg_y, args.reg_num_p, args.reg_num_n, args.reg_num_f,
+    # ids of features shared by the shards of all binaries
+    vocabulary = Vocabulary(path=os.path.join(args.out_model, 'features.vocab'))
+
+    reg_x, reg_y = load_samples(paths, 'reg', args.reg_num_p, args.reg_num_n, vocabulary, args.feature_hash_bits)
+    vocabulary.save()
+    train(reg_x, reg_y, vocabulary.terms, args.feature_hash_bits, args.reg_num_f,
           args.n_estimators, args.workers, 'reg', args.out_model)
-    train(off_x, off_y, args.off_num_p, args.off_num_n, args.off_num_f,
+
+    off_x, off_y = load_samples(paths, 'off', args.off_num_p, args.off_num_n, vocabulary, args.feature_hash_bits)
+    vocabulary.save()
+    train(off_x, off_y, vocabulary.terms, args.feature_hash_bits, args.off_num_f,
           args.n_estimators, args.workers, 'off', args.out_model)
 
 
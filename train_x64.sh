@@ -9,6 +9,7 @@ debug_dir="$dataset_dir/debug/"
 out_model_var="$out_model/variable"
 out_model_crf="$out_model/crf/model"
 log_dir="$out_model/log"
+feature_dir="$out_model/features"
 n2p_train="~/debin/Nice2Predict/bazel-bin/n2p/training/train_json"
 
 if [ ! -d "/mnt/cache/bap" ]; then
@@ -17,14 +18,23 @@ if [ ! -d "/mnt/cache/bap" ]; then
 	ln -s /mnt/cache/bap ~/.cache/bap
 fi
 
-mkdir -p $out_model_var $out_model_crf $log_dir
+mkdir -p $out_model_var $out_model_crf $log_dir $feature_dir
 
 
-echo "STARTING VARIABLE TRAINING" &&
+echo "STARTING EXTRACTION" &&
+	python3 py/extract_train_data.py \
+		--bin_list $bin_list \
+		--bin_dir $bin_dir \
+		--debug_dir $debug_dir \
+		--feature_dir $feature_dir \
+		--graph_dir $log_dir \
+		--workers $((workers / 2)) &&
+	echo "STARTING VARIABLE TRAINING" &&
 	python3 py/train_variable.py \
 		--bin_list $bin_list \
 		--bin_dir $bin_dir \
 		--debug_dir $debug_dir \
+		--feature_dir $feature_dir \
 		--out_model $out_model_var \
 		--workers $workers &&
 	echo "STARTING CRF TRAINING" &&